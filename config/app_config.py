@@ -49,7 +49,98 @@ DEBUG_MODE = True  # Set to False for production
 # KARAOKE PATHS (Phase 1: Core Modules)
 # =============================================================================
 AUDIO_FILE = 'assets/audio/Ibp - Energia da Revolucao.wav'
+INSTRUMENTAL_FILE = 'assets/audio/Ibp - Energia da Revolucao_Voiceless.wav'
 LYRICS_FILE = 'data/lyrics.json'
+VIDEO_FILE = 'assets/video/Ibp - Energia da Revolucao.mp4'
+
+# Song catalog: one folder per song under SONG_LIBRARY_DIR with a song.json
+# manifest (title, artist and the audio, instrumental, vocals, lyrics and
+# video files, relative to the folder). The files above are always in the
+# catalog as DEFAULT_SONG_ID.
+SONG_LIBRARY_DIR = 'assets/songs'
+DEFAULT_SONG_ID = 'energia-da-revolucao'
+
+# =============================================================================
+# AUDIO ENGINE
+# =============================================================================
+# Audio devices, found by name substring, host API substring and minimum
+# channels of their kind (Windows re-numbers device indices when USB audio
+# is re-enumerated, so indices are never stored)
+AUDIO_DEVICES = {
+    'headphone': {'name': 'USB Audio', 'hostapi': 'MME', 'channels': 2},  # Singer
+    'speaker': {'name': 'Realtek', 'hostapi': 'MME', 'channels': 2},  # Audience
+    'mic': {'name': 'USB Audio', 'hostapi': 'MME', 'channels': 1, 'kind': 'input'},
+}
+
+# Stream tracks from disk through a prefetch ring buffer instead of decoding
+# them fully into memory (constant RAM, near-instant load)
+AUDIO_STREAMING = False
+
+# Memory budget for decoded tracks shared by all AudioRouters (LRU eviction);
+# the song library evicts whole songs to keep the next one within it
+AUDIO_CACHE_BUDGET_MB = 512
+
+# Sample type of in-memory tracks: 'int16' halves their RAM (the stream
+# callbacks convert each block to float32); see tools/benchmark_sample_format.py
+AUDIO_SAMPLE_FORMAT = 'float32'
+
+# Tracks are resampled once to each output device's native rate and kept
+# here (keyed by content hash and rate), memory-mapped on later boots.
+# Safe to delete at any time.
+AUDIO_RESAMPLE_CACHE_DIR = 'data/audio_cache'
+
+# Reference melody of each song (f0 contour, voiced regions, onsets of the
+# vocal track), extracted offline by tools/extract_reference_pitch.py and
+# stored as <content hash>.npz, so AudioAnalyzer never analyses the
+# reference at runtime
+REFERENCE_PITCH_DIR = 'data/reference_pitch'
+
+# Click-free gain automation: every start (play, seek, resume) fades in,
+# stop/pause fade out, and each output device has its own master volume
+# (0.0 - 1.0, see AudioRouter.set_volume)
+AUDIO_FADE_IN_SECONDS = 0.020
+AUDIO_FADE_OUT_SECONDS = 0.050
+AUDIO_MASTER_VOLUME = {'headphone': 1.0, 'speaker': 1.0}
+
+# Stem mode: songs with an isolated vocal stem (song.json "vocals") play
+# the instrumental on the speakers and instrumental + vocal x guide volume
+# on the headphones, mixed in the callback; the singer sets the guide
+# volume (0.0 - 1.0) during the rehearsal
+AUDIO_STEM_MODE = True
+AUDIO_GUIDE_VOLUME = 1.0
+
+# Keep output streams open from app start (silence when idle) so play/stop
+# only swap the source at a block boundary
+AUDIO_PERSISTENT_STREAMS = False
+
+# Run the headphone output and the microphone as one full-duplex stream so
+# captured audio is sample-aligned with the vocal guide
+AUDIO_DUPLEX = False
+
+# Per-device output latency profile written by tools/calibrate_latency.py
+LATENCY_PROFILE_FILE = 'data/audio_latency.json'
+
+# Named stream settings, lowest latency first. 'latency' is passed to
+# PortAudio ('low', 'high' or seconds).
+AUDIO_STREAM_PROFILES = {
+    'low': {'blocksize': 256, 'latency': 'low'},
+    'balanced': {'blocksize': 1024, 'latency': 'low'},
+    'safe': {'blocksize': 2048, 'latency': 'high'},
+}
+AUDIO_STREAM_PROFILE_ORDER = ['low', 'balanced', 'safe']
+
+# Profile for devices the xrun tuner has not seen yet; the tuner moves a
+# device to the next safer profile after XRUN_THRESHOLD_PER_MINUTE output
+# underflows within a minute, and to the next lower-latency one (unless
+# the device already failed it) after XRUN_STEP_DOWN_SECONDS of streaming
+# without an underflow, and remembers it in LATENCY_PROFILE_FILE
+AUDIO_STREAM_PROFILE = 'balanced'
+XRUN_THRESHOLD_PER_MINUTE = 5
+XRUN_STEP_DOWN_SECONDS = 1800
+
+# One JSON line of audio engine health metrics (callback load, xruns,
+# drift) appended per song; None disables it
+AUDIO_METRICS_FILE = 'data/audio_metrics.jsonl'
 
 # =============================================================================
 # KARAOKE TIMING (Phase 1: Core Modules)
@@ -123,6 +123,12 @@ class KaraokeApp(App):
         print("Application closing. Cleaning up resources...")
         self.app_manager.cleanup()
 
+        # Close audio streams kept open by the karaoke screens
+        for screen in self.app_manager.sm.screens:
+            router = getattr(screen, 'audio_router', None)
+            if router is not None:
+                router.close_streams()
+
 
 if __name__ == '__main__':
     print("="*60)
@@ -0,0 +1,71 @@
+"""
+Output backends for the AudioRouter.
+
+The router never talks to sounddevice directly for streams, device
+enumeration or waiting on its callbacks: it goes through a backend.
+SoundDeviceBackend (the default) is PortAudio and the real devices;
+modules.offline_backend renders the same callbacks offline, and
+modules.device_simulator on simulated devices.
+
+A backend provides now(), query_devices(), query_hostapis(),
+reinitialize(), output_stream(), duplex_stream() and wait(), plus the
+CallbackStop and CallbackAbort exception types its streams honour.
+
+sounddevice is imported on first use, not with this module, so code
+that only runs offline never needs libportaudio.
+"""
+import time
+from typing import Dict, List
+
+
+def sounddevice():
+    """The sounddevice module, imported on first use (needs libportaudio)."""
+    import sounddevice as sd
+    return sd
+
+
+class SoundDeviceBackend:
+    """PortAudio streams on the real devices, through sounddevice."""
+
+    name = 'sounddevice'
+    persist_state = True  # Routers use the kiosk's latency profile and metrics log
+
+    @property
+    def CallbackStop(self):
+        """sd.CallbackStop."""
+        return sounddevice().CallbackStop
+
+    @property
+    def CallbackAbort(self):
+        """sd.CallbackAbort."""
+        return sounddevice().CallbackAbort
+
+    def now(self) -> float:
+        """Host clock the stream DAC times are converted to."""
+        return time.perf_counter()
+
+    def query_devices(self) -> List[Dict]:
+        """Device list, as sd.query_devices()."""
+        return sounddevice().query_devices()
+
+    def query_hostapis(self) -> List[Dict]:
+        """Host API list, as sd.query_hostapis()."""
+        return sounddevice().query_hostapis()
+
+    def reinitialize(self) -> None:
+        """Re-initialize PortAudio so hot-plugged devices show up."""
+        sd = sounddevice()
+        sd._terminate()
+        sd._initialize()
+
+    def output_stream(self, **options):
+        """Create an output stream (sd.OutputStream arguments)."""
+        return sounddevice().OutputStream(**options)
+
+    def duplex_stream(self, **options):
+        """Create a full-duplex stream (sd.Stream arguments)."""
+        return sounddevice().Stream(**options)
+
+    def wait(self, event, timeout: float) -> bool:
+        """Wait for an event the stream callbacks set."""
+        return event.wait(timeout)
@@ -0,0 +1,316 @@
+"""
+Process-wide cache of decoded audio assets.
+
+RehearsalScreen and PerformanceScreen each own an AudioRouter and both
+play the same vocal track. Without a cache every guest decodes that
+file twice, on the UI thread, during screen transitions. This module
+keeps decoded tracks in memory keyed by (path, mtime, sample rate,
+sample type),
+evicts least-recently-used entries beyond a memory budget, and hands
+out read-only arrays so any number of routers can share one copy.
+
+Tracks packed offline into raw PCM assets (see pcm_assets) are
+memory-mapped instead of decoded, so a miss costs about as little as a
+hit. A track requested at a rate other than its own is resampled once
+and written to an on-disk cache keyed by the file's content hash and
+the target rate; later boots memory-map that ready-to-play buffer
+instead of decoding and resampling again.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from config.app_config import AUDIO_CACHE_BUDGET_MB, AUDIO_RESAMPLE_CACHE_DIR
+from modules.pcm_assets import convert_samples, open_pcm, packed_asset, to_float32
+from modules.resampler import resample
+
+
+CacheKey = Tuple[str, int, Optional[int], str]
+
+
+class AudioAssetCache:
+    """
+    LRU cache of decoded audio with a memory budget.
+
+    Arrays returned by get() are marked read-only and shared between all
+    callers: a cache hit costs a dict lookup and no copy. Concurrent
+    requests for a file that is still being decoded wait for that decode
+    instead of starting a second one.
+    """
+
+    def __init__(self, budget_bytes: int, disk_dir: Optional[str] = None):
+        """
+        Initialize cache.
+
+        Args:
+            budget_bytes: Maximum total size of cached arrays in bytes
+            disk_dir: Directory for resampled tracks (None keeps them
+                in memory only)
+        """
+        self.budget_bytes = budget_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[CacheKey, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._pending: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(filepath: str, samplerate: Optional[int] = None,
+                 dtype: str = 'float32') -> CacheKey:
+        """
+        Build the cache key for a file.
+
+        Args:
+            filepath: Path to the audio file
+            samplerate: Target sample rate (None = file's native rate)
+            dtype: Sample type, 'float32' or 'int16'
+
+        Returns:
+            Tuple of (resolved path, mtime in ns, target sample rate,
+            sample type)
+        """
+        path = Path(filepath).resolve()
+        return (str(path), os.stat(path).st_mtime_ns, samplerate, dtype)
+
+    def get(self, filepath: str, samplerate: Optional[int] = None,
+            dtype: str = 'float32') -> Tuple[np.ndarray, int]:
+        """
+        Get decoded audio, decoding and caching it on a miss.
+
+        Args:
+            filepath: Path to the audio file
+            samplerate: Target sample rate (None = file's native rate);
+                other rates are resampled through the disk cache
+            dtype: Sample type, 'float32' or 'int16' (half the memory;
+                ArraySource converts each block when it is played)
+
+        Returns:
+            Tuple of (read-only array, sample rate)
+        """
+        key = self.make_key(filepath, samplerate, dtype)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+
+                pending = self._pending.get(key)
+                if pending is None:
+                    # We decode it; others wait on this event
+                    pending = threading.Event()
+                    self._pending[key] = pending
+                    self.misses += 1
+                    break
+
+            pending.wait()
+
+        try:
+            entry = self._decode(filepath, samplerate, dtype)
+            with self._lock:
+                self._store(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def _decode(self, filepath: str, samplerate: Optional[int],
+                dtype: str) -> Tuple[np.ndarray, int]:
+        """Decode (and if needed resample) a file into a read-only array."""
+        packed = packed_asset(filepath)
+        if packed is not None:
+            # Packed asset: mapping it is the whole load (unless it was
+            # packed with the other sample type)
+            data, sr = open_pcm(packed)
+            if samplerate is not None and sr != samplerate:
+                data, sr = self._resampled(filepath, samplerate, dtype), samplerate
+            else:
+                data = convert_samples(data, dtype)
+        elif samplerate is None or sf.info(str(filepath)).samplerate == samplerate:
+            data, sr = sf.read(str(filepath), dtype=dtype)
+        else:
+            data, sr = self._resampled(filepath, samplerate, dtype), samplerate
+        data.flags.writeable = False
+        return data, sr
+
+    def disk_path(self, filepath: str, samplerate: int,
+                  dtype: str = 'float32') -> Optional[Path]:
+        """
+        Location of a file's resampled copy in the disk cache.
+
+        Returns:
+            <disk_dir>/<content hash>_<rate>.npy (<rate>_int16.npy for
+            int16 copies), or None without a disk cache
+        """
+        if self.disk_dir is None:
+            return None
+        suffix = '_int16' if dtype == 'int16' else ''
+        return self.disk_dir / f"{source_hash(filepath)}_{samplerate}{suffix}.npy"
+
+    def _resampled(self, filepath: str, samplerate: int, dtype: str) -> np.ndarray:
+        """Memory-map a file's resampled copy, creating it on a disk cache miss."""
+        path = self.disk_path(filepath, samplerate, dtype)
+        if path is not None and path.exists():
+            try:
+                return np.load(str(path), mmap_mode='r')
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable resample cache {path.name}: {e}")
+
+        packed = packed_asset(filepath)
+        if packed is not None:
+            data, sr = open_pcm(packed)
+            data = to_float32(data)
+        else:
+            data, sr = sf.read(str(filepath), dtype='float32')
+        started = time.perf_counter()
+        data = resample(data, sr, samplerate)
+        print(
+            f"🔁 Resampled {Path(filepath).name} {sr} → {samplerate} Hz "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        data = convert_samples(data, dtype)
+        if path is not None:
+            self._write_disk(path, data)
+        return data
+
+    @staticmethod
+    def _write_disk(path: Path, data: np.ndarray) -> None:
+        """Write a resampled track atomically (readers never see a partial file)."""
+        temp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp, 'wb') as f:
+                np.save(f, data)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"⚠️ Could not write resample cache {path}: {e}")
+            if temp.exists():
+                temp.unlink()
+
+    def _store(self, key: CacheKey, entry: Tuple[np.ndarray, int]) -> None:
+        """Insert an entry and evict LRU entries over budget. Lock held."""
+        nbytes = entry[0].nbytes
+        if nbytes > self.budget_bytes:
+            return  # Too large to ever fit - serve it uncached
+
+        # Drop stale entries for the same path (file changed on disk)
+        for old_key in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+            self._remove(old_key)
+
+        self._entries[key] = entry
+        self.size_bytes += nbytes
+        while self.size_bytes > self.budget_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: CacheKey) -> None:
+        """Remove one entry. Lock held."""
+        data, _ = self._entries.pop(key)
+        self.size_bytes -= data.nbytes
+
+    def preload(self, filepaths: Iterable[str], samplerate: Optional[int] = None,
+                dtype: str = 'float32') -> threading.Thread:
+        """
+        Decode files into the cache on a background thread.
+
+        Args:
+            filepaths: Audio files to warm up (missing files are skipped)
+            samplerate: Rate the files will be played at (None = native)
+            dtype: Sample type the files will be played from
+
+        Returns:
+            The started daemon thread
+        """
+        paths = [p for p in filepaths if Path(p).exists()]
+
+        def _worker():
+            for path in paths:
+                try:
+                    self.get(path, samplerate, dtype)
+                except Exception as e:
+                    print(f"⚠️ Audio preload failed for {path}: {e}")
+
+        thread = threading.Thread(target=_worker, daemon=True, name="AudioPreload")
+        thread.start()
+        return thread
+
+    def nbytes(self, filepath: str) -> int:
+        """Memory held by a file's cached entries (every rate and type)."""
+        path = str(Path(filepath).resolve())
+        with self._lock:
+            return sum(data.nbytes for key, (data, _) in self._entries.items()
+                       if key[0] == path)
+
+    def evict(self, filepath: str) -> int:
+        """
+        Drop a file's cached entries (every rate and type).
+
+        Routers that already borrowed the arrays keep playing them; the
+        memory is freed when they load another song.
+
+        Returns:
+            Bytes released from the budget
+        """
+        path = str(Path(filepath).resolve())
+        with self._lock:
+            before = self.size_bytes
+            for key in [k for k in self._entries if k[0] == path]:
+                self._remove(key)
+            return before - self.size_bytes
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+
+# Hashes already computed, keyed by (path, mtime, size): hashing a long
+# WAV takes tens of milliseconds, looking it up again does not
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_hashes_lock = threading.Lock()
+
+
+def source_hash(filepath: str) -> str:
+    """Content hash of a file (identifies a track independently of its path)."""
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        cached = _hashes.get(key)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _hashes_lock:
+        _hashes[key] = value
+    return value
+
+
+_cache: Optional[AudioAssetCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioAssetCache:
+    """Return the process-wide audio cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioAssetCache(
+                AUDIO_CACHE_BUDGET_MB * 1024 * 1024, AUDIO_RESAMPLE_CACHE_DIR
+            )
+        return _cache
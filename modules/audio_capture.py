@@ -0,0 +1,91 @@
+"""
+Microphone capture buffer for IBP-KaraokeLive.
+
+In duplex mode the headphone stream is a full-duplex sd.Stream: the same
+callback that writes the vocal guide reads the microphone block, so
+captured audio runs on the playback clock and never drifts from it. The
+callback copies each input block into a CaptureBuffer (lock-free ring)
+and tags the first one with the song frame the singer was hearing when
+it reached the microphone; every later sample follows contiguously.
+AudioAnalyzer reads the buffer from its own thread.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from modules.audio_sources import RingBuffer
+
+
+class CaptureBuffer:
+    """
+    Captured microphone frames aligned with song frames.
+
+    Single producer (a stream callback) and single consumer (the
+    analyzer). If the consumer falls more than the buffer length behind,
+    the newest frames are dropped and counted in `dropped`; alignment of
+    later frames is then off by that many frames.
+
+    Attributes:
+        samplerate: Capture rate (the playback rate in duplex mode)
+        origin_frame: Song frame heard when the first captured frame
+            reached the microphone (None until the first block)
+        dropped: Frames lost because the buffer was full
+    """
+
+    BUFFER_SECONDS = 2.0
+
+    def __init__(self, samplerate: int, channels: int = 1,
+                 buffer_seconds: Optional[float] = None, dtype: str = 'float32'):
+        """
+        Initialize capture buffer.
+
+        Args:
+            samplerate: Capture rate in Hz
+            channels: Input channels
+            buffer_seconds: Ring length (default BUFFER_SECONDS)
+            dtype: Sample type of the input blocks ('float32' from the
+                duplex stream, 'int16' from the analyzer's own stream)
+        """
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+        seconds = buffer_seconds or self.BUFFER_SECONDS
+        self._ring = RingBuffer(int(samplerate * seconds), channels, dtype)
+        self.origin_frame: Optional[int] = None
+        self.dropped = 0
+        self._consumed = 0  # Frames read by the consumer
+
+    @property
+    def available(self) -> int:
+        """Captured frames waiting to be read."""
+        return self._ring.available
+
+    def write(self, indata: np.ndarray, song_frame: int) -> None:
+        """
+        Append an input block (producer side, audio thread).
+
+        Args:
+            indata: Input block, shape (frames, channels)
+            song_frame: Song frame heard when the block's first frame
+                reached the microphone (only used for the first block)
+        """
+        if self.origin_frame is None:
+            self.origin_frame = song_frame
+        written = self._ring.write(indata)
+        if written < len(indata):
+            self.dropped += len(indata) - written
+
+    def read_into(self, out: np.ndarray) -> Tuple[int, int]:
+        """
+        Move captured frames into `out` (consumer side).
+
+        Args:
+            out: Destination buffer, shape (frames, channels)
+
+        Returns:
+            Tuple of (frames copied, song frame of the first copied frame)
+        """
+        first = (self.origin_frame or 0) + self._consumed
+        count = self._ring.read_into(out)
+        self._consumed += count
+        return count, first
@@ -0,0 +1,212 @@
+"""
+Audio engine health metrics for IBP-KaraokeLive.
+
+The stream callbacks record how long each block took to render against
+its budget (blocksize / sample rate), xrun flags and frames output; the
+speaker callback also samples the headphone/speaker drift. Each counter
+has a single writer (its stream's callback) and is only read elsewhere,
+so no locks are needed; histograms are preallocated numpy arrays
+updated in place. The UI thread reads them through snapshot(), and the
+router appends one snapshot per song to AUDIO_METRICS_FILE so kiosks
+that run close to the budget can be spotted before guests hear a glitch.
+"""
+import datetime
+import json
+import os
+import platform
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+# Callback duration as a fraction of the block budget: ten 10 % bins
+# plus one for blocks that took longer than the budget
+LOAD_BINS = 11
+NEAR_MISS_LOAD = 0.8  # Blocks above this fraction of the budget are close calls
+
+
+class StreamMetrics:
+    """
+    Counters for one output stream. Written only by its callback.
+
+    Attributes:
+        budget: Seconds available to render one block
+        callbacks: Callbacks run
+        frames: Frames output (audio and silence)
+        xruns: Callbacks with any status flag set
+        underflows: Callbacks flagged output_underflow
+        overflows: Callbacks flagged output_overflow or input_overflow
+        max_duration: Longest callback in seconds
+        load_histogram: Callback count per LOAD_BINS bin
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.budget = 0.0
+        self.load_histogram = np.zeros(LOAD_BINS, dtype=np.int64)
+        self.reset()
+
+    def configure(self, blocksize: int, samplerate: int) -> None:
+        """Set the block budget when the stream is opened."""
+        self.budget = blocksize / samplerate
+
+    def reset(self) -> None:
+        """Zero the counters (start of a session)."""
+        self.callbacks = 0
+        self.frames = 0
+        self.xruns = 0
+        self.underflows = 0
+        self.overflows = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.load_histogram.fill(0)
+
+    def record_status(self, status) -> None:
+        """Count the xrun flags of a callback (audio thread)."""
+        self.xruns += 1
+        if status.output_underflow:
+            self.underflows += 1
+        if status.output_overflow or status.input_overflow:
+            self.overflows += 1
+
+    def record_callback(self, duration: float, frames: int) -> None:
+        """
+        Record one rendered block (audio thread, allocation-free).
+
+        Args:
+            duration: Seconds spent in the callback
+            frames: Frames output
+        """
+        self.callbacks += 1
+        self.frames += frames
+        self.total_duration += duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if self.budget > 0:
+            index = int(duration / self.budget * (LOAD_BINS - 1))
+            self.load_histogram[min(index, LOAD_BINS - 1)] += 1
+
+    def snapshot(self) -> Dict:
+        """Copy the counters into a plain, JSON-serializable dict."""
+        histogram = self.load_histogram.copy()
+        near_miss_bin = int(NEAR_MISS_LOAD * (LOAD_BINS - 1))
+        budget = self.budget
+        return {
+            'budget_ms': budget * 1000,
+            'callbacks': self.callbacks,
+            'frames': self.frames,
+            'xruns': self.xruns,
+            'underflows': self.underflows,
+            'overflows': self.overflows,
+            'mean_load': (self.total_duration / self.callbacks / budget
+                          if self.callbacks and budget else 0.0),
+            'max_load': self.max_duration / budget if budget else 0.0,
+            'near_misses': int(histogram[near_miss_bin:].sum()),
+            'over_budget': int(histogram[-1]),
+            'load_histogram': histogram.tolist(),
+        }
+
+
+class DriftMetrics:
+    """Headphone/speaker drift samples. Written only by the speaker callback."""
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero the counters (start of a session)."""
+        self.samples = 0
+        self.last = 0.0
+        self.total_abs = 0.0
+        self.max_abs = 0.0
+
+    def record(self, drift: float) -> None:
+        """Record one drift measurement in seconds (audio thread)."""
+        self.samples += 1
+        self.last = drift
+        magnitude = abs(drift)
+        self.total_abs += magnitude
+        if magnitude > self.max_abs:
+            self.max_abs = magnitude
+
+    def snapshot(self) -> Dict:
+        """Copy the counters into a plain, JSON-serializable dict (ms)."""
+        return {
+            'samples': self.samples,
+            'last_ms': self.last * 1000,
+            'mean_abs_ms': self.total_abs / self.samples * 1000 if self.samples else 0.0,
+            'max_abs_ms': self.max_abs * 1000,
+        }
+
+
+class AudioMetrics:
+    """Per-stream and drift metrics of one AudioRouter."""
+
+    def __init__(self, stream_keys: Iterable[str] = ('headphone', 'speaker')):
+        """
+        Initialize metrics.
+
+        Args:
+            stream_keys: Streams to keep counters for
+        """
+        self.streams: Dict[str, StreamMetrics] = {key: StreamMetrics() for key in stream_keys}
+        self.drift = DriftMetrics()
+        self.session: Dict = {}
+
+    def start_session(self, **info) -> None:
+        """
+        Reset every counter for a new song.
+
+        Args:
+            **info: Extra fields stored with the session (mode, track...)
+        """
+        for stream in self.streams.values():
+            stream.reset()
+        self.drift.reset()
+        self.session = {
+            'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            **info,
+        }
+
+    def snapshot(self) -> Dict:
+        """
+        Read every counter (safe from any thread).
+
+        Counters are read without locking, so a snapshot taken during
+        playback may be one block out of date for some fields.
+        """
+        return {
+            **self.session,
+            'streams': {key: stream.snapshot() for key, stream in self.streams.items()},
+            'drift': self.drift.snapshot(),
+        }
+
+    def dump(self, path: Optional[str]) -> Optional[Dict]:
+        """
+        Append the current snapshot to a JSON-lines file.
+
+        Args:
+            path: File to append to (None disables dumping)
+
+        Returns:
+            The snapshot written, or None if there was no session
+        """
+        if not path or not self.session:
+            return None
+
+        record = {
+            'host': platform.node(),
+            'ended_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            **self.snapshot(),
+        }
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not write audio metrics to {path}: {e}")
+        self.session = {}
+        return record
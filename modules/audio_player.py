@@ -59,9 +59,36 @@ class SimpleAudioPlayer:
             self.router.play()
 
     def stop(self):
-        """Stop audio playback on all devices."""
+        """Stop audio playback on all devices (after a short fade-out)."""
         self.router.stop()
 
+    def pause(self):
+        """Pause playback on all devices (streams stay open)."""
+        self.router.pause()
+
+    def resume(self):
+        """Resume playback after pause()."""
+        self.router.resume()
+
+    def seek(self, seconds: float):
+        """
+        Jump to a position on all devices.
+
+        Args:
+            seconds: Song time to continue from
+        """
+        self.router.seek(seconds)
+
+    def set_volume(self, stream_key: str, volume: float):
+        """
+        Set one device's master volume (ramped, click-free).
+
+        Args:
+            stream_key: 'headphone' or 'speaker'
+            volume: Gain from 0.0 to 1.0
+        """
+        self.router.set_volume(stream_key, volume)
+
     def get_position(self) -> float:
         """
         Get current playback position.
@@ -82,9 +109,8 @@ class SimpleAudioPlayer:
         Returns:
             Total duration in seconds (0.0 if not loaded)
         """
-        if self.is_loaded and self.router.audio_data is not None:
-            # Calculate duration: samples / sample_rate
-            return len(self.router.audio_data) / self.router.sample_rate
+        if self.is_loaded:
+            return self.router.get_duration()
         return 0.0
 
     def is_playing(self) -> bool:
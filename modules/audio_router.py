@@ -4,19 +4,39 @@ Audio routing and playback for IBP-KaraokeLive.
 This module manages audio playback to specific output devices using
 sounddevice for direct hardware control. Supports rehearsal mode
 (headphones only) and performance mode (headphones + speakers with
-separate audio files).
+separate audio files). In stem mode (load_stems) the headphone mix is
+built in the callback from an instrumental and a vocal-only stem.
 
 REFACTORED: Improved stop mechanism to ensure both streams stop immediately.
 """
 import threading
 import time
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 
+from config.app_config import (
+    AUDIO_FADE_IN_SECONDS, AUDIO_FADE_OUT_SECONDS, AUDIO_GUIDE_VOLUME, AUDIO_MASTER_VOLUME,
+    AUDIO_METRICS_FILE, AUDIO_STREAM_PROFILES
+)
+from modules.audio_backends import SoundDeviceBackend
+from modules.audio_cache import get_audio_cache
+from modules.audio_capture import CaptureBuffer
+from modules.audio_metrics import AudioMetrics
+from modules.audio_sources import ArraySource, MixSource, StreamingSource
+from modules.device_registry import DeviceRegistry, get_device_registry
+from modules.gain_ramp import GainRamp
+from modules.latency_calibration import LatencyProfile
+from modules.pcm_assets import packed_asset
+from modules.playback_clock import PlaybackClock
+from modules.xrun_tuner import XrunTuner
+
+AudioSource = Union[ArraySource, StreamingSource, MixSource]
+# (song frame to continue from or None for the current one, host time it must be heard)
+Cue = Tuple[Optional[int], float]
+
 
 class AudioRouter:
     """
@@ -25,36 +45,164 @@ class AudioRouter:
     Manages audio playback to specific output devices identified during
     testing. Uses sounddevice for low-latency, direct hardware access.
 
-    Device IDs (from AUDIO-ROUTING-TEST-RESULTS.md):
-        - Device 8: Speakers (Realtek) - Public/audience
-        - Device 9: Speakers (USB Audio Device) - Singer/headphones
+    Devices are resolved by name through the device registry
+    (AUDIO_DEVICES):
+        - speaker: Speakers (Realtek) - Public/audience
+        - headphone: Speakers (USB Audio Device) - Singer/headphones
+    If a stream dies because its device disappeared, the registry
+    re-enumerates devices in the background and the streams are
+    reopened on the re-resolved devices.
+
+    In duplex mode the headphone stream is a full-duplex sd.Stream that
+    also reads the microphone, so captured audio (get_capture) is
+    sample-aligned with the vocal guide.
+
+    seek(), pause()/resume() and loop regions (set_loop) move the cursors
+    of every stream at their next block boundary and line them up on a
+    common start time, without reopening streams.
+
+    Every start fades in and stop(), pause() and seek() fade out first,
+    so the waveform is never cut mid-cycle; set_volume() ramps each
+    device's master volume the same way.
+
+    In stem mode (load_stems) the speakers play the instrumental stem
+    and the headphones a MixSource of the same instrumental plus the
+    vocal stem at the guide volume (set_guide_volume), so a single
+    instrumental buffer is shared by both devices when their rates match.
+
+    Streams are created through a backend: PortAudio by default, or an
+    OfflineBackend that renders the same callbacks into memory on a
+    virtual clock (see modules.audio_backends).
     """
 
-    # Device IDs identified in audio routing tests
-    DEVICE_SPEAKER = 8  # Native speakers (public)
-    DEVICE_HEADPHONE = 9  # USB headphones (singer)
+    START_MARGIN = 0.010  # Seconds of slack when scheduling a synchronized start
+    FADE_SLACK = 0.100  # Seconds beyond a fade-out to wait for the callbacks
+    VOLUME_RAMP = 0.020  # Seconds to ramp a master volume change
+
+    def __init__(self, streaming: bool = False, persistent: bool = False,
+                 duplex: bool = False, sample_format: str = 'float32',
+                 backend=None):
+        """
+        Initialize audio router.
 
-    def __init__(self):
-        """Initialize audio router."""
+        Args:
+            streaming: If True, stream tracks from disk through a prefetch
+                ring buffer instead of decoding them fully into memory
+            persistent: If True, keep warm output streams open between
+                songs (see open_streams); play/stop only swap sources
+            duplex: If True, capture the microphone in the headphone
+                stream's callback (see get_capture)
+            sample_format: Storage of in-memory tracks, 'float32' or
+                'int16' (half the RAM; the callbacks convert each block)
+            backend: Audio backend for devices, streams and waits (default
+                SoundDeviceBackend); an OfflineBackend brings its own
+                virtual devices
+        """
+        if sample_format not in ('float32', 'int16'):
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        self.streaming = streaming
+        self.persistent = persistent
+        self.duplex = duplex
+        self.sample_format = sample_format
+        self.backend = backend if backend is not None else SoundDeviceBackend()
+        # Decoded tracks held by the sources ('guide' is the vocal stem)
         self.audio_data: Dict[str, Optional[np.ndarray]] = {
+            'headphone': None,
+            'speaker': None,
+            'guide': None
+        }
+        # Per-stream sources consumed by the callbacks
+        self.sources: Dict[str, Optional[AudioSource]] = {
             'headphone': None,
             'speaker': None
         }
-        self.sample_rate: Optional[int] = None
+        self.sample_rate: Optional[int] = None  # Rate of the vocal track (clock master)
         self.mode = 'rehearsal'  # 'rehearsal' or 'performance'
         self.is_loaded = False
-        self.start_time = 0
         self.duration = 0
         self.is_playing_flag = False
-        
-        # Store actual stream objects for direct control
-        self.active_streams: Dict[str, Optional[sd.OutputStream]] = {
+
+        # Shared clock advanced by the stream callbacks
+        self.clock = PlaybackClock(now=self.backend.now)
+
+        # Inter-device sync: calibrated latency beyond what PortAudio
+        # reports, each stream's reported latency, the pending cue (frame
+        # and host time it must be heard, consumed by the next callback)
+        # and the lead-in silence still to output. Offline and simulated
+        # backends keep their profile in memory.
+        self.latency_profile = (
+            LatencyProfile.load() if self.backend.persist_state else LatencyProfile(path=None)
+        )
+        self.sync_offsets: Dict[str, float] = {'headphone': 0.0, 'speaker': 0.0}
+        self.output_latency: Dict[str, float] = {'headphone': 0.0, 'speaker': 0.0}
+        self.cues: Dict[str, Optional[Cue]] = {'headphone': None, 'speaker': None}
+        self.lead_frames: Dict[str, int] = {'headphone': 0, 'speaker': 0}
+
+        # Transport: while paused the callbacks hold their cursors; loop
+        # regions are (start frame, end frame) and wrap inside a block
+        self.paused = threading.Event()
+        self._resume_position: Optional[float] = None  # Set by seek() while paused
+        self.loops: Dict[str, Optional[Tuple[int, int]]] = {'headphone': None, 'speaker': None}
+
+        # Gain automation: master volume per device, fade lengths, and the
+        # ramp each stream callback applies (created with the callback)
+        self.volumes: Dict[str, float] = {
+            key: AUDIO_MASTER_VOLUME.get(key, 1.0) for key in ('headphone', 'speaker')
+        }
+        self.fade_in = AUDIO_FADE_IN_SECONDS
+        self.fade_out = AUDIO_FADE_OUT_SECONDS
+        self.gains: Dict[str, Optional[GainRamp]] = {'headphone': None, 'speaker': None}
+        self.guide_volume = AUDIO_GUIDE_VOLUME  # Vocal stem level in the headphone mix
+
+        # Duplex capture: buffer the headphone callback writes mic blocks
+        # into during a song (None = not capturing), and input latency
+        # used when the host API reports no ADC time
+        self.captures: Dict[str, Optional[CaptureBuffer]] = {'headphone': None}
+        self.input_latency: Dict[str, float] = {'headphone': 0.0}
+        self.duplex_active = False  # Headphone stream currently reads the mic
+
+        # Output devices resolved by name; streams that died with their
+        # device are reopened once the registry has re-enumerated them
+        self.devices = (
+            get_device_registry() if backend is None else DeviceRegistry(backend=backend)
+        )
+        self._recovering = False  # Streams closed for a device rescan
+        self._reopen_keys: List[str] = []
+        self._lost_streams: Set[str] = set()
+
+        # Stream profile (blocksize, PortAudio latency) per device, chosen
+        # by the xrun tuners; the callbacks post the change their tuner
+        # asked for (its escalate or step_down) in tune_requests and the
+        # tuner thread applies it
+        self.tuners: Dict[str, XrunTuner] = {}
+        self.blocksizes: Dict[str, int] = {
+            key: self._tuner_for(key).settings['blocksize'] for key in ('headphone', 'speaker')
+        }
+        self.tune_requests: Dict[str, Optional[Callable[[], bool]]] = {
+            'headphone': None, 'speaker': None
+        }
+        self.tune_event = threading.Event()
+
+        # Source each stream callback is playing right now (None = idle).
+        # Swapped with a single assignment, picked up at the next block.
+        self.stream_sources: Dict[str, Optional[AudioSource]] = {
+            'headphone': None,
+            'speaker': None
+        }
+
+        # Health metrics written by the callbacks (see get_metrics)
+        self.metrics = AudioMetrics()
+        self.metrics_file = AUDIO_METRICS_FILE if self.backend.persist_state else None
+        self.track_name: Optional[str] = None
+
+        # Written by the callbacks, reported by the stream threads
+        self.callback_errors: Dict[str, Optional[Exception]] = {
             'headphone': None,
             'speaker': None
         }
         
-        # Thread management
-        self.playback_threads: Dict[str, Optional[threading.Thread]] = {
+        # Store actual stream objects for direct control
+        self.active_streams: Dict[str, Optional[object]] = {  # sd.OutputStream / sd.Stream
             'headphone': None,
             'speaker': None
         }
@@ -62,12 +210,151 @@ class AudioRouter:
         # Stop control
         self.stop_lock = threading.Lock()
         self.should_stop = threading.Event()  # Thread-safe event flag
-        self.is_stopping = False  # Prevent duplicate stop calls
+
+        # Completion: set when every stream of the current song has ended
+        # naturally; the notifier thread then calls the listeners
+        self.finished_event = threading.Event()
+        self.finished_listeners: List[Callable[[], None]] = []
+        self._generation = 0  # Incremented by every play()
+        self._finished_generation = -1
+        self._notifier = threading.Thread(
+            target=self._notify_loop, daemon=True, name="AudioNotifier"
+        )
+        self._notifier.start()
+        self._tuner_thread = threading.Thread(
+            target=self._tune_loop, daemon=True, name="AudioTuner"
+        )
+        self._tuner_thread.start()
+        self.devices.add_listener(self._suspend_streams, self._resume_streams)
+
+    def _open_source(self, path: Path, stream_key: str,
+                     data_key: Optional[str] = None) -> AudioSource:
+        """
+        Open a track as a playback source for one stream.
+
+        Args:
+            path: Path to the audio file
+            stream_key: Stream the source feeds ('headphone' or 'speaker')
+            data_key: audio_data entry holding the decoded track
+                (default: stream_key)
+
+        The track is played at its device's native rate (see
+        device_rate), so the OS mixer never resamples it; tracks at
+        another rate are resampled once through the audio cache.
+
+        Returns:
+            StreamingSource in streaming mode when the file is already at
+            the device rate and has no packed asset, otherwise an
+            ArraySource over a read-only array (or memory-mapped packed
+            asset or resampled copy) shared through the audio cache
+        """
+        data_key = data_key or stream_key
+        rate = self.device_rate(stream_key)
+        if self.streaming and packed_asset(path) is None:
+            source = StreamingSource(str(path))
+            if rate is None or source.samplerate == rate:
+                self.audio_data[data_key] = None
+                return source
+            # Streaming would put the OS resampler back in the path - play
+            # the memory-mapped resampled copy instead
+            source.close()
+
+        data, sr = get_audio_cache().get(str(path), rate, self.sample_format)
+        self.audio_data[data_key] = data
+        return ArraySource(data, sr)
+
+    def device_rate(self, stream_key: str) -> Optional[int]:
+        """
+        Native sample rate of a stream's output device.
+
+        Returns:
+            The device's default sample rate in Hz, or None if the
+            device is not connected (tracks then keep their own rate)
+        """
+        device = self._device_for(stream_key)
+        if device is None:
+            return None
+        return int(self.devices.device_info(device)['default_samplerate'])
+
+    def preload(self, vocal_filepath: str,
+                instrumental_filepath: Optional[str] = None) -> List[threading.Thread]:
+        """
+        Warm the audio cache in the background for a later load_audio().
+
+        Decodes (and resamples to each device's rate) the tracks that
+        load_audio() will borrow from the cache; in streaming mode only
+        tracks that need resampling are prepared.
+
+        Args:
+            vocal_filepath: Path to vocal track (for headphones)
+            instrumental_filepath: Path to instrumental track (for speakers)
+
+        Returns:
+            The started preload threads (join them to wait for the cache)
+        """
+        tracks = [('headphone', vocal_filepath)]
+        if instrumental_filepath:
+            tracks.append(('speaker', instrumental_filepath))
+        return self._preload_tracks(tracks)
+
+    def preload_stems(self, instrumental_filepath: str,
+                      vocals_filepath: str) -> List[threading.Thread]:
+        """
+        Warm the audio cache in the background for a later load_stems().
+
+        Returns:
+            The started preload threads (join them to wait for the cache)
+        """
+        return self._preload_tracks([
+            ('headphone', instrumental_filepath),
+            ('headphone', vocals_filepath),
+            ('speaker', instrumental_filepath),
+        ])
+
+    def _preload_tracks(self, tracks: List[Tuple[str, str]]) -> List[threading.Thread]:
+        """Preload (stream key, path) pairs at each stream's device rate."""
+        threads = []
+        for key, path in tracks:
+            rate = self.device_rate(key)
+            if self.streaming and packed_asset(path) is None and (
+                    rate is None or not Path(path).exists()
+                    or sf.info(path).samplerate == rate):
+                continue
+            threads.append(get_audio_cache().preload([path], rate, self.sample_format))
+        return threads
+
+    def _load_note(self, stream_key: str) -> str:
+        """How a stream's track was loaded, for the load log line."""
+        source = self.sources.get(stream_key)
+        if isinstance(source, MixSource):
+            source = source.instrumental
+        if isinstance(source, StreamingSource):
+            return ', streaming'
+        if isinstance(self.audio_data.get(stream_key), np.memmap):
+            return ', mapped'
+        return ''
+
+    def _release_sources(self) -> None:
+        """Close all sources from a previous load."""
+        for key, source in self.sources.items():
+            if source is not None:
+                source.close()
+            self.sources[key] = None
+        for key in self.audio_data:
+            self.audio_data[key] = None
 
     def load_audio(self, vocal_filepath: str,
                    instrumental_filepath: Optional[str] = None) -> bool:
         """
-        Load audio file(s) into memory.
+        Load audio file(s) for playback.
+
+        Packed assets (a .pcm path, or one packed next to the file by
+        tools/pack_audio.py) are memory-mapped through the process-wide
+        audio cache. Otherwise, in streaming mode the files are only
+        opened and their first block decoded; without it they are
+        decoded fully into memory once and then borrowed from the cache. Each track is
+        converted to its own device's native rate, so the vocal and
+        instrumental files may have different rates.
 
         Args:
             vocal_filepath: Path to vocal track (for headphones)
@@ -82,28 +369,35 @@ class AudioRouter:
             print(f"❌ Vocal audio file not found: {vocal_path}")
             return False
 
+        if self.is_playing_flag:
+            self.stop()
+        self._release_sources()
+        self.clear_loop()
+
         try:
-            # Load vocal track
-            data, sr = sf.read(str(vocal_path), dtype='float32')
-            self.audio_data['headphone'] = data
+            # Load vocal track (its rate drives the playback clock)
+            vocal = self._open_source(vocal_path, 'headphone')
+            self.sources['headphone'] = vocal
+            sr = vocal.samplerate
             self.sample_rate = sr
-            self.duration = len(data) / sr
+            self.track_name = vocal_path.name
+            self.duration = vocal.frames / sr
             
             print(
                 f"✅ Vocal audio loaded: {vocal_path.name} "
-                f"({sr} Hz, {self.duration:.1f}s)"
+                f"({sr} Hz, {self.duration:.1f}s{self._load_note('headphone')})"
             )
             
             # Load instrumental track if provided
             if instrumental_filepath:
                 inst_path = Path(instrumental_filepath)
                 if inst_path.exists():
-                    inst_data, inst_sr = sf.read(str(inst_path), dtype='float32')
-                    if inst_sr != sr:
-                        print(f"⚠️ Sample rate mismatch: {inst_sr} vs {sr}")
-                        return False
-                    self.audio_data['speaker'] = inst_data
-                    print(f"✅ Instrumental audio loaded: {inst_path.name}")
+                    instrumental = self._open_source(inst_path, 'speaker')
+                    self.sources['speaker'] = instrumental
+                    print(
+                        f"✅ Instrumental audio loaded: {inst_path.name} "
+                        f"({instrumental.samplerate} Hz{self._load_note('speaker')})"
+                    )
                 else:
                     print(f"⚠️ Instrumental file not found: {inst_path}")
             
@@ -111,140 +405,738 @@ class AudioRouter:
             return True
         except Exception as e:
             print(f"❌ Error loading audio: {e}")
+            self._release_sources()
             self.is_loaded = False
             return False
 
-    def _play_stream(self, device: int, data: np.ndarray, stream_key: str) -> None:
+    def load_stems(self, instrumental_filepath: str, vocals_filepath: str) -> bool:
         """
-        Play audio stream on specified device using callback-based non-blocking approach.
+        Load an instrumental and a vocal-only stem (stem mode).
+
+        The speakers play the instrumental; the headphones play it mixed
+        in the callback with the vocal stem at the guide volume (see
+        set_guide_volume). Both devices borrow the instrumental from the
+        audio cache, so it is held in memory once per device rate.
 
         Args:
-            device: Device ID
-            data: Audio data array
-            stream_key: Key for storing stream reference ('headphone' or 'speaker')
+            instrumental_filepath: Path to the instrumental stem
+            vocals_filepath: Path to the vocal-only stem
+
+        Returns:
+            True if loaded successfully, False otherwise
         """
-        stream = None
-        current_frame = [0]  # Use list to allow modification in callback
-        
+        inst_path = Path(instrumental_filepath)
+        vocal_path = Path(vocals_filepath)
+        for path in (inst_path, vocal_path):
+            if not path.exists():
+                print(f"❌ Stem file not found: {path}")
+                return False
+
+        if self.is_playing_flag:
+            self.stop()
+        self._release_sources()
+        self.clear_loop()
+
+        try:
+            # Headphone mix (its rate drives the playback clock)
+            self.sources['headphone'] = MixSource(
+                self._open_source(inst_path, 'headphone'),
+                self._open_source(vocal_path, 'headphone', data_key='guide'),
+                vocal_gain=self.guide_volume,
+                blocksize=max(p['blocksize'] for p in AUDIO_STREAM_PROFILES.values()),
+            )
+            sr = self.sources['headphone'].samplerate
+            self.sample_rate = sr
+            self.track_name = inst_path.name
+            self.duration = self.sources['headphone'].frames / sr
+
+            self.sources['speaker'] = self._open_source(inst_path, 'speaker')
+            shared = self.audio_data['speaker'] is not None and (
+                self.audio_data['speaker'] is self.audio_data['headphone'])
+            print(
+                f"✅ Stems loaded: {inst_path.name} + {vocal_path.name} "
+                f"({sr} Hz, {self.duration:.1f}s{self._load_note('headphone')}"
+                f"{', shared instrumental' if shared else ''})"
+            )
+
+            self.is_loaded = True
+            return True
+        except Exception as e:
+            print(f"❌ Error loading stems: {e}")
+            self._release_sources()
+            self.is_loaded = False
+            return False
+
+    def _make_callback(self, stream_key: str, channels: int, blocksize: int,
+                       samplerate: int, persistent: bool = False):
+        """
+        Build the real-time callback for one output stream.
+
+        The callback plays whatever source is currently assigned in
+        `stream_sources[stream_key]`, so a new song (or silence) takes
+        over at the next block boundary. Every buffer it needs is
+        allocated here, before the stream starts; the callback itself
+        only copies samples with np.copyto / out= ufuncs, never prints
+        and never imports. Status flags and errors are recorded for the
+        stream thread to report.
+
+        Transport changes are picked up at block boundaries too. A cue
+        in `cues[stream_key]` (play, seek, resume) gives the song frame
+        to continue from and the host time it must be heard: the block
+        computes, from its DAC time, how many frames of silence to
+        output first (or how many to drop if it is late), so every
+        stream hears that frame at the same instant. While `paused` is
+        set the block is silent and the cursor holds. When the cursor
+        reaches the end of `loops[stream_key]` it wraps to the loop
+        start inside the block.
+
+        Finally the block is multiplied by the stream's GainRamp
+        (`gains[stream_key]`): each cue restarts it with a fade-in to the
+        device's master volume, and the UI thread posts fade-outs and
+        volume changes as ramp targets.
+
+        Args:
+            stream_key: Stream key ('headphone' or 'speaker')
+            channels: Number of device output channels
+            blocksize: Expected frames per callback
+            samplerate: Stream sample rate
+            persistent: If True, output silence when no source is
+                assigned instead of ending the stream
+
+        Returns:
+            Callback suitable for sd.OutputStream
+        """
+        # Scratch block used only when device and source channels differ
+        scratch = np.zeros((blocksize, 2), dtype='float32')
+        clock = self.clock
+        should_stop = self.should_stop
+        paused = self.paused
+        stream_sources = self.stream_sources
+        stream_metrics = self.metrics.streams[stream_key]
+        # Drift is sampled by the speaker stream, which only runs in
+        # performance mode alongside the headphones
+        drift_metrics = self.metrics.drift if stream_key == 'speaker' else None
+        perf_counter = time.perf_counter
+        callback_errors = self.callback_errors
+        signal_if_finished = self._signal_if_finished
+        tuner = self.tuners[stream_key]
+        # Bound once: the callback posts them without allocating, and the
+        # tuner thread changes this stream's tuner even if the stream has
+        # been reopened on another device since
+        escalate, step_down = tuner.escalate, tuner.step_down
+        CallbackStop, CallbackAbort = self.backend.CallbackStop, self.backend.CallbackAbort
+        tune_requests = self.tune_requests
+        tune_event = self.tune_event
+        dac_host_time = clock.dac_host_time
+        output_latency = self.output_latency
+        sync_offsets = self.sync_offsets
+        cues = self.cues
+        loops = self.loops
+        lead_frames = self.lead_frames
+        volumes = self.volumes
+        gain = GainRamp(samplerate, blocksize, volumes[stream_key])
+        self.gains[stream_key] = gain
+        fade_in_frames = int(round(self.fade_in * samplerate))
+
+        def render(source: AudioSource, dest: np.ndarray) -> int:
+            """Copy the source's next frames into `dest`, matching channels."""
+            nonlocal scratch
+            wanted = len(dest)
+            source_channels = source.channels
+            if source_channels == channels:
+                # Shapes match - copy straight into the device buffer
+                return source.read_into(dest)
+
+            if len(scratch) < wanted or scratch.shape[1] < source_channels:
+                # Unusual block size or channel count; grow once
+                scratch = np.zeros(
+                    (max(wanted, len(scratch)), max(source_channels, scratch.shape[1])),
+                    dtype='float32'
+                )
+            block = scratch[:wanted, :source_channels]
+            count = source.read_into(block)
+            block[count:] = 0
+            if channels == 1:
+                # Multi-channel audio on a mono device - mix down
+                np.sum(block, axis=1, out=dest[:, 0])
+                np.multiply(dest, 1.0 / source_channels, out=dest)
+            elif source_channels == 1:
+                # Mono audio on a multi-channel device - broadcast
+                np.copyto(dest, block)
+            else:
+                shared = min(channels, source_channels)
+                np.copyto(dest[:, :shared], block[:, :shared])
+                dest[:, shared:] = 0
+            return count
+
         def audio_callback(outdata, frames, time_info, status):
             """Callback function for audio playback."""
+            started = perf_counter()
             try:
                 if status:
-                    print(f"⚠️ Stream '{stream_key}' status: {status}")
+                    stream_metrics.record_status(status)
+                if status and status.output_underflow:
+                    if tuner.record_underflow():
+                        tune_requests[stream_key] = escalate
+                        tune_event.set()
+                elif tuner.record_clean(frames / samplerate):
+                    tune_requests[stream_key] = step_down
+                    tune_event.set()
                 
-                # Check if we should stop
-                if self.should_stop.is_set():
-                    raise sd.CallbackStop()
+                source = stream_sources[stream_key]
                 
-                # Calculate how much data to write
-                start = current_frame[0]
-                end = min(start + frames, len(data))
+                # Check if we should stop or the audio ended
+                if (source is None or source.finished or
+                        (not persistent and should_stop.is_set())):
+                    if not persistent:
+                        raise CallbackStop()
+                    if source is not None:
+                        # Song ended - go idle until the next play()
+                        stream_sources[stream_key] = None
+                        clock.mark_finished(stream_key)
+                        signal_if_finished()
+                    outdata.fill(0)
+                    return
                 
-                if start >= len(data):
-                    # Reached end of audio
-                    raise sd.CallbackStop()
+                if paused.is_set():
+                    # Hold the cursor; resume() cues every stream again
+                    outdata.fill(0)
+                    return
                 
-                # Get the chunk to play
-                chunk = data[start:end]
+                # When this block's first frame will be heard
+                host_time = dac_host_time(
+                    time_info, output_latency[stream_key], sync_offsets[stream_key]
+                )
                 
-                # If chunk is shorter than frames, pad with zeros
-                if len(chunk) < frames:
-                    needed = frames - len(chunk)
-                    if len(data.shape) > 1:
-                        # Stereo - pad with zeros matching the channel count
-                        padding = np.zeros((needed, data.shape[1]), dtype='float32')
-                        chunk = np.concatenate([chunk, padding], axis=0)
+                cue = cues[stream_key]
+                if cue is not None:
+                    # First block after play/seek/resume: line the cued
+                    # frame up with the requested host time, sample-accurately
+                    cues[stream_key] = None
+                    frame, start_time = cue
+                    lead = int(round((start_time - host_time) * samplerate))
+                    lead_frames[stream_key] = lead if lead > 0 else 0
+                    gain.restart(volumes[stream_key], fade_in_frames)
+                    if frame is None:
+                        # Continue from the current frame (play, device recovery)
+                        if lead < 0:
+                            # Started late - drop frames to stay aligned
+                            source.skip(-lead)
                     else:
-                        # Mono - pad with zeros
-                        padding = np.zeros(needed, dtype='float32')
-                        chunk = np.concatenate([chunk, padding])
+                        source.cue(frame - lead if lead < 0 else frame)
+                        clock.jump(stream_key, frame)
+                
+                # Lead-in silence before the cued frame
+                skip = min(lead_frames[stream_key], frames)
+                if skip:
+                    outdata[:skip] = 0
+                    lead_frames[stream_key] -= skip
+                    dest = outdata[skip:]
+                else:
+                    dest = outdata
+                wanted = frames - skip
                 
-                # Handle shape matching for output
-                if len(chunk.shape) == 1 and len(outdata.shape) == 2:
-                    # Mono audio but stereo output expected - broadcast to both channels
-                    outdata[:, 0] = chunk
-                    outdata[:, 1] = chunk
-                elif len(chunk.shape) == 2 and len(outdata.shape) == 1:
-                    # Stereo audio but mono output - mix down
-                    outdata[:] = np.mean(chunk, axis=1)
+                start = source.position
+                loop = loops[stream_key]
+                if loop is not None and start < loop[1] <= start + wanted:
+                    # Loop end falls in this block: play up to it and wrap
+                    first = loop[1] - start
+                    count = render(source, dest[:first])
+                    if count == first:
+                        source.cue(loop[0])
+                        clock.jump(stream_key, loop[0])
+                        start = loop[0] - first
+                        if first < wanted:
+                            count += render(source, dest[first:])
                 else:
-                    # Shapes match - direct copy
-                    outdata[:] = chunk
+                    count = render(source, dest)
+                
+                # Pad the tail (end of audio or streaming underrun)
+                if count < wanted:
+                    dest[count:] = 0
+                gain.apply(dest)
                 
-                current_frame[0] = end
+                # Record which source frames this block sends to the DAC
+                clock.advance(stream_key, start - skip, skip + count, host_time=host_time)
+                if drift_metrics is not None:
+                    drift_metrics.record(clock.get_drift())
                 
-            except sd.CallbackStop:
+            except CallbackStop:
                 # Re-raise CallbackStop
                 raise
             except Exception as e:
-                print(f"❌ Callback error in '{stream_key}': {e}")
-                import traceback
-                traceback.print_exc()
-                raise sd.CallbackStop()
-        
+                # Reported by the stream thread, not on the audio thread
+                callback_errors[stream_key] = e
+                if not persistent:
+                    raise CallbackAbort()
+                outdata.fill(0)
+            finally:
+                stream_metrics.record_callback(perf_counter() - started, frames)
+
+        return audio_callback
+
+    def _make_duplex_callback(self, stream_key: str, render, samplerate: int):
+        """
+        Wrap an output callback for a full-duplex sd.Stream.
+
+        The block is rendered first, so the clock anchor holds the song
+        frame this output block starts with; the input block is then
+        copied into the current capture buffer, tagged with the song
+        frame that was being heard when it reached the microphone.
+
+        Args:
+            stream_key: Stream key (only 'headphone' captures)
+            render: Output callback from _make_callback
+            samplerate: Stream sample rate
+
+        Returns:
+            Callback suitable for sd.Stream
+        """
+        clock = self.clock
+        captures = self.captures
+        input_latency = self.input_latency
+        now = clock.now
+
+        def duplex_callback(indata, outdata, frames, time_info, status):
+            """Callback function for playback plus microphone capture."""
+            render(outdata, frames, time_info, status)
+
+            capture = captures[stream_key]
+            anchor = clock.get_anchor(stream_key)
+            if capture is None or anchor is None:
+                return  # Not capturing, or the song has not started yet
+
+            # Host time the input block was captured
+            adc_time = getattr(time_info, 'inputBufferAdcTime', 0.0)
+            current_time = getattr(time_info, 'currentTime', 0.0)
+            if adc_time > 0 and current_time >= adc_time:
+                adc_host_time = now() - (current_time - adc_time)
+            else:
+                adc_host_time = now() - input_latency[stream_key]
+
+            # Output block starts at song frame `frame`, heard at
+            # `host_time`; step back by the capture-to-playback delay
+            frame, _, host_time = anchor
+            capture.write(indata, frame - int(round((host_time - adc_host_time) * samplerate)))
+
+        return duplex_callback
+
+    def _device_for(self, stream_key: str) -> Optional[int]:
+        """Return the output device ID for a stream key (None if not connected)."""
+        return self.devices.resolve(stream_key)
+
+    def _output_channels(self, device: int, wanted: int) -> int:
+        """Clamp a channel count to what the device supports."""
+        max_channels = self.devices.device_info(device)['max_output_channels']
+        if 0 < max_channels < wanted:
+            return max_channels
+        return wanted
+
+    def open_streams(self, stream_keys=('headphone', 'speaker'),
+                     samplerate: Optional[int] = None) -> None:
+        """
+        Open warm persistent output streams (persistent mode).
+
+        The streams start immediately and output silence until play()
+        assigns a source. Streams that are already open at the requested
+        rate and with their device's current stream profile are left
+        untouched, so this is cheap to call again; a stream whose profile
+        the xrun tuner changed is reopened here with the new one.
+
+        Args:
+            stream_keys: Streams to open ('headphone', 'speaker')
+            samplerate: Stream rate; defaults to the loaded track's rate
+                (the device's native rate unless it was not connected at
+                load time), then to the device's default rate
+        """
+        for key in stream_keys:
+            device = self._device_for(key)
+            if device is None:
+                print(f"❌ Could not open warm stream '{key}': device not connected")
+                self._drop_stream_source(key)
+                continue
+            source = self.sources.get(key)
+            rate = samplerate or (source.samplerate if source is not None else None)
+            if rate is None:
+                rate = int(self.devices.device_info(device)['default_samplerate'])
+
+            tuner = self._tuner_for(key)
+            settings = tuner.settings
+
+            with self.stop_lock:
+                existing = self.active_streams.get(key)
+            if (existing is not None and existing.active and existing.samplerate == rate
+                    and existing.blocksize == settings['blocksize']):
+                continue
+            if existing is not None:
+                self._close_stream(key)
+
+            try:
+                channels = self._output_channels(device, 2)
+                stream = self._create_stream(
+                    key, device, rate, channels, persistent=True,
+                    finished_callback=lambda key=key: self._on_warm_stream_finished(key)
+                )
+                stream.start()
+                with self.stop_lock:
+                    self.active_streams[key] = stream
+                print(
+                    f"🔈 Warm stream '{key}' open on device {device} "
+                    f"({rate} Hz, {tuner.profile_name} profile)"
+                )
+            except Exception as e:
+                print(f"❌ Could not open warm stream '{key}' on device {device}: {e}")
+                self._drop_stream_source(key)
+
+    def _drop_stream_source(self, stream_key: str) -> None:
+        """End the song on a stream that could not be (re)opened."""
+        if self.stream_sources.get(stream_key) is not None:
+            self.stream_sources[stream_key] = None
+            self.clock.mark_finished(stream_key)
+            self._signal_if_finished()
+
+    def _on_warm_stream_finished(self, stream_key: str) -> None:
+        """
+        Handle the end of a warm stream (PortAudio finished_callback).
+
+        Warm streams only end when closed by the router, which forgets
+        them first; anything else means the device went away.
+        """
+        if self.active_streams.get(stream_key) is None:
+            return
+        print(f"⚠️ Warm stream '{stream_key}' ended unexpectedly - rescanning devices")
+        self.devices.refresh_async()
+
+    def _create_stream(self, stream_key: str, device: int, samplerate: int,
+                       channels: int, persistent: bool = False,
+                       finished_callback: Optional[Callable[[], None]] = None):
+        """
+        Create (but do not start) the stream for one key.
+
+        Uses the device's current stream profile. In duplex mode the
+        headphone stream is a full-duplex sd.Stream that also reads the
+        microphone; if no microphone is found it falls back to output
+        only.
+
+        Returns:
+            sd.Stream or sd.OutputStream
+        """
+        tuner = self._tuner_for(stream_key)
+        settings = tuner.settings
+        callback = self._make_callback(
+            stream_key, channels, settings['blocksize'], samplerate, persistent
+        )
+        options = dict(
+            samplerate=samplerate,
+            blocksize=settings['blocksize'],
+            latency=settings['latency'],
+            dtype='float32',
+            finished_callback=finished_callback,
+        )
+
+        mic = None
+        if self.duplex and stream_key in self.captures:
+            mic = self.devices.resolve('mic')
+            if mic is None:
+                print("⚠️ No microphone found - headphone stream opened without capture")
+
+        if mic is not None:
+            stream = self.backend.duplex_stream(
+                device=(mic, device),
+                channels=(1, channels),
+                callback=self._make_duplex_callback(stream_key, callback, samplerate),
+                **options
+            )
+            input_latency, output_latency = stream.latency
+            self.input_latency[stream_key] = float(input_latency)
+        else:
+            stream = self.backend.output_stream(
+                device=device, channels=channels, callback=callback, **options
+            )
+            output_latency = stream.latency
+        if stream_key in self.captures:
+            self.duplex_active = mic is not None
+
+        self.output_latency[stream_key] = float(output_latency)
+        self.blocksizes[stream_key] = settings['blocksize']
+        self.metrics.streams[stream_key].configure(settings['blocksize'], samplerate)
+        tuner.mark_opened()
+        return stream
+
+    def _close_stream(self, stream_key: str) -> None:
+        """Stop and close one stream, ignoring backend errors."""
+        with self.stop_lock:
+            stream = self.active_streams.get(stream_key)
+            self.active_streams[stream_key] = None
+        if stream is not None:
+            try:
+                if stream.active:
+                    stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"⚠️ Error closing stream '{stream_key}': {e}")
+
+    def close_streams(self) -> None:
+        """Close warm persistent streams (call on application exit)."""
+        self.stop()
+        for key in list(self.active_streams):
+            self._close_stream(key)
+
+    def _open_song_stream(self, stream_key: str, source: AudioSource) -> bool:
+        """
+        Open (but do not start) a callback stream for one song.
+
+        No thread waits on the stream: PortAudio calls
+        _on_stream_finished when it ends, naturally or via stop().
+
+        Args:
+            stream_key: Stream key ('headphone' or 'speaker')
+            source: Audio source feeding this stream
+
+        Returns:
+            True if the stream was opened
+        """
+        device = self._device_for(stream_key)
+        self.callback_errors[stream_key] = None
+        self.stream_sources[stream_key] = source
+
+        tuner = self._tuner_for(stream_key)
+
         try:
-            print(f"🎵 Starting stream '{stream_key}' on device {device}")
+            if device is None:
+                raise RuntimeError("device not connected")
+            print(
+                f"🎵 Opening stream '{stream_key}' on device {device} "
+                f"({tuner.profile_name} profile)"
+            )
             
-            # Determine number of channels
-            channels = data.shape[1] if len(data.shape) > 1 else 1
+            # Determine number of channels (mix down if the device has fewer)
+            channels = self._output_channels(device, source.channels)
             
             # Create output stream with callback (non-blocking)
-            stream = sd.OutputStream(
-                device=device,
-                samplerate=self.sample_rate,
-                channels=channels,
-                callback=audio_callback,
-                blocksize=2048,
-                dtype='float32'
+            stream = self._create_stream(
+                stream_key, device, source.samplerate, channels,
+                finished_callback=lambda: self._on_stream_finished(stream_key)
             )
             
             # Store stream reference for external control
             with self.stop_lock:
                 self.active_streams[stream_key] = stream
-            
-            # Start stream (non-blocking - callback handles the data)
+            return True
+        except Exception as e:
+            print(f"❌ Error in stream '{stream_key}' on device {device}: {e}")
+            self._close_stream(stream_key)
+            self._drop_stream_source(stream_key)
+            if device is not None:
+                # The device may have been re-enumerated - look again
+                self.devices.refresh_async()
+            return False
+
+    def _start_song_stream(self, stream_key: str) -> None:
+        """Start a stream opened by _open_song_stream."""
+        with self.stop_lock:
+            stream = self.active_streams.get(stream_key)
+        if stream is None:
+            return
+        try:
             stream.start()
             print(f"  ✓ Stream '{stream_key}' started (active={stream.active})")
-            
-            # Wait for completion or stop signal
-            iteration = 0
-            while stream.active and not self.should_stop.is_set():
-                time.sleep(0.05)
-                iteration += 1
-                # Log every 2 seconds to monitor progress
-                if iteration % 40 == 0:
-                    elapsed = current_frame[0] / self.sample_rate
-                    print(f"  ⏱️ Stream '{stream_key}': {elapsed:.1f}s / {len(data)/self.sample_rate:.1f}s")
-            
-            # Check why we exited
-            if self.should_stop.is_set():
-                print(f"⏹️ Stream '{stream_key}' stopped by signal")
-            elif not stream.active:
-                print(f"✅ Stream '{stream_key}' completed naturally")
-            else:
-                print(f"⚠️ Stream '{stream_key}' exited loop unexpectedly")
-                
-        except sd.CallbackStop:
-            # Normal callback stop - not an error
-            print(f"✅ Stream '{stream_key}' stopped via callback")
         except Exception as e:
-            print(f"❌ Error in stream '{stream_key}' on device {device}: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # Clean up stream
-            if stream is not None:
+            print(f"❌ Error starting stream '{stream_key}': {e}")
+            self._close_stream(stream_key)
+            self._drop_stream_source(stream_key)
+
+    def _device_name(self, stream_key: str) -> str:
+        """Name of a stream's output device (used to look up its latency profile)."""
+        device = self._device_for(stream_key)
+        if device is None:
+            return f"{stream_key} (not connected)"
+        return self.devices.device_info(device)['name']
+
+    def _tuner_for(self, stream_key: str) -> XrunTuner:
+        """Xrun tuner of the device currently resolved for a stream."""
+        name = self._device_name(stream_key)
+        tuner = self.tuners.get(stream_key)
+        if tuner is None or tuner.device_name != name:
+            tuner = XrunTuner(name, self.latency_profile)
+            self.tuners[stream_key] = tuner
+        return tuner
+
+    def _suspend_streams(self) -> None:
+        """
+        Close every stream before PortAudio is re-initialized.
+
+        Called by the device registry; the sources keep their positions
+        so _resume_streams can continue where playback stopped.
+        """
+        self._recovering = True
+        with self.stop_lock:
+            open_keys = [key for key, stream in self.active_streams.items() if stream is not None]
+        self._reopen_keys = open_keys
+        for key in open_keys:
+            self._close_stream(key)
+
+    def _resume_streams(self) -> None:
+        """
+        Reopen streams on the re-resolved devices after a refresh.
+
+        Warm streams are always reopened. Per-song streams are reopened
+        only while their song is still playing and start together again,
+        continuing from the sources' current frames.
+        """
+        keys = set(self._lost_streams)
+        self._lost_streams.clear()
+        if self._recovering:
+            keys.update(self._reopen_keys)
+            self._reopen_keys = []
+            self._recovering = False
+        ordered = [key for key in ('headphone', 'speaker') if key in keys]
+        if not ordered:
+            return
+
+        print(f"🔌 Reopening audio streams {ordered} after device refresh")
+        if self.persistent:
+            self.open_streams(ordered)
+            return
+
+        if not self.is_playing_flag:
+            return
+        reopened = [
+            key for key in ordered
+            if self.sources[key] is not None and not self.sources[key].finished
+            and self._open_song_stream(key, self.sources[key])
+        ]
+        if reopened:
+            self._schedule_start(reopened)
+        for key in reopened:
+            self._start_song_stream(key)
+
+    def _schedule_start(self, stream_keys: List[str],
+                        position: Optional[float] = None) -> None:
+        """
+        Cue every stream to be heard from the same frame at the same instant.
+
+        Each stream's DAC time already includes its reported latency;
+        the calibration profile adds what PortAudio does not report. The
+        start is placed far enough ahead that every stream's next block
+        can still reach it, and the callbacks pad with silence up to it.
+
+        Args:
+            stream_keys: Streams taking part in this song
+            position: Song time to continue from, converted to each
+                stream's frames (None keeps each stream's current frame,
+                e.g. frame 0 after play())
+        """
+        names = {key: self._device_name(key) for key in stream_keys}
+        offsets = self.latency_profile.get_relative_offsets(names)
+        for key in stream_keys:
+            self.sync_offsets[key] = offsets.get(key, 0.0)
+
+        margin = (
+            self.START_MARGIN
+            + max(
+                self.blocksizes[key] / self.sources[key].samplerate
+                + self.output_latency[key] + self.sync_offsets[key]
+                for key in stream_keys
+            )
+        )
+        start_at = self.clock.now() + margin
+        for key in stream_keys:
+            frame = None if position is None else self._to_frame(position, key)
+            self.cues[key] = (frame, start_at)
+
+    def _on_stream_finished(self, stream_key: str) -> None:
+        """
+        Handle the end of a per-song stream (PortAudio finished_callback).
+
+        Runs on a PortAudio thread after the last callback, so it may
+        print. The stream itself is closed later by stop() or play().
+        A stream that ends mid-song without a stop request or callback
+        error lost its device: a device rescan is requested and the
+        stream is reopened by _resume_streams.
+        """
+        if self._recovering:
+            return  # Closed for a device rescan, reopened afterwards
+
+        source = self.stream_sources[stream_key]
+        if (self.is_playing_flag and not self.should_stop.is_set()
+                and self.callback_errors[stream_key] is None
+                and source is not None and not source.finished):
+            print(f"⚠️ Stream '{stream_key}' ended mid-song - rescanning devices")
+            self._lost_streams.add(stream_key)
+            self.devices.refresh_async()
+            return
+
+        self.stream_sources[stream_key] = None
+        self.clock.mark_finished(stream_key)
+
+        # Report what the callback recorded
+        xruns = self.metrics.streams[stream_key].xruns
+        if xruns:
+            print(f"⚠️ Stream '{stream_key}': {xruns} callbacks reported xrun status")
+        if self.callback_errors[stream_key] is not None:
+            print(f"❌ Callback error in '{stream_key}': {self.callback_errors[stream_key]!r}")
+
+        if self.should_stop.is_set():
+            print(f"⏹️ Stream '{stream_key}' stopped by signal")
+        else:
+            print(f"✅ Stream '{stream_key}' completed naturally")
+            self._signal_if_finished()
+
+    def _signal_if_finished(self) -> None:
+        """Wake the notifier once every stream of the song has ended."""
+        if self.clock.is_finished():
+            self._finished_generation = self._generation
+            self.finished_event.set()
+
+    def _notify_loop(self) -> None:
+        """Deliver on_finished notifications (blocks, never polls)."""
+        while True:
+            self.finished_event.wait()
+            self.finished_event.clear()
+
+            # Ignore songs that were stopped or replaced in the meantime
+            if self._finished_generation != self._generation or not self.is_playing_flag:
+                continue
+
+            self.is_playing_flag = False
+            self.metrics.dump(self.metrics_file)
+            for listener in list(self.finished_listeners):
                 try:
-                    if stream.active:
-                        stream.stop()
-                    stream.close()
+                    listener()
                 except Exception as e:
-                    print(f"⚠️ Error closing stream '{stream_key}': {e}")
-            
-            # Clear stream reference
-            with self.stop_lock:
-                if self.active_streams.get(stream_key) == stream:
-                    self.active_streams[stream_key] = None
+                    print(f"⚠️ on_finished listener error: {e}")
+
+    def _tune_loop(self) -> None:
+        """Apply the profile changes posted by the callbacks (blocks, never polls)."""
+        while True:
+            self.tune_event.wait()
+            self.tune_event.clear()
+            for key in self.tune_requests:
+                request = self.tune_requests[key]
+                if request is not None:
+                    self.tune_requests[key] = None
+                    # Takes effect when the stream is next opened
+                    request()
+
+    def add_finished_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Subscribe to the end of playback.
+
+        The listener is called once when a song plays to its end (not
+        when stop() is called). It runs on the router's notifier thread;
+        UI code should hop to the main thread (e.g. Clock.schedule_once).
+
+        Args:
+            listener: Callable taking no arguments
+        """
+        if listener not in self.finished_listeners:
+            self.finished_listeners.append(listener)
+
+    def remove_finished_listener(self, listener: Callable[[], None]) -> None:
+        """Unsubscribe a listener added with add_finished_listener."""
+        if listener in self.finished_listeners:
+            self.finished_listeners.remove(listener)
 
     def set_rehearsal_mode(self) -> None:
         """Switch to rehearsal mode (headphones only)."""
@@ -256,92 +1148,133 @@ class AudioRouter:
         self.mode = 'performance'
         print("🔊 Mode: Performance (vocal+instrumental)")
 
-    def play(self) -> None:
+    def play(self) -> bool:
         """
         Play audio according to current mode.
 
         Routes to appropriate device(s) based on mode:
         - Rehearsal mode: vocal on headphones only
         - Performance mode: vocal on headphones + instrumental on speakers
+
+        In persistent mode the warm streams simply start playing the
+        sources at their next block; otherwise a callback stream is
+        opened per device. Either way completion is reported through
+        add_finished_listener, not by polling.
+
+        Returns:
+            True if playback started
         """
         if not self.is_loaded:
             print("⚠️ No audio loaded")
-            return
+            return False
         
         # Prevent multiple simultaneous playbacks
         if self.is_playing_flag:
             print("⚠️ Already playing - ignoring play() call")
-            return
+            return False
+
+        if self.mode == 'performance':
+            stream_keys = ['headphone', 'speaker']
+            if self.sources['speaker'] is None:
+                print("⚠️ Performance mode requires both vocal and instrumental tracks")
+                return False
+        else:
+            stream_keys = ['headphone']
+        
+        if self.sources['headphone'] is None:
+            print("⚠️ No vocal track loaded")
+            return False
+
+        if any(self._device_for(key) is None for key in stream_keys):
+            # A device may have been plugged in since the last scan
+            self.devices.refresh(rescan=True)
+            missing = [key for key in stream_keys if self._device_for(key) is None]
+            if missing:
+                print(f"❌ Output device not connected for {missing}")
+                return False
+
+        if not self.persistent:
+            # Release streams left over from a song that ended naturally
+            for key in list(self.active_streams):
+                self._close_stream(key)
 
         # CRITICAL: Reset stop flag before starting new playback
         self.should_stop.clear()
-        
-        self.start_time = time.time()
+        self.paused.clear()
+        self._resume_position = None
+
+        for key in stream_keys:
+            self.sources[key].rewind()
+        self._generation += 1
+        rates = {key: self.sources[key].samplerate for key in stream_keys}
+        self.clock.reset(self.sample_rate, stream_keys, rates)
+        self.metrics.start_session(
+            mode=self.mode,
+            track=self.track_name,
+            samplerates=rates,
+            profiles={key: self.tuners[key].profile_name for key in stream_keys},
+        )
         self.is_playing_flag = True
 
         if self.mode == 'rehearsal':
-            # Rehearsal: vocal on headphones only
-            if self.audio_data['headphone'] is not None:
-                print(f"🎧 Starting rehearsal on device {self.DEVICE_HEADPHONE}")
-                
-                thread = threading.Thread(
-                    target=self._play_stream,
-                    args=(self.DEVICE_HEADPHONE, self.audio_data['headphone'], 'headphone'),
-                    daemon=True,
-                    name="AudioThread-Headphone"
-                )
-                
-                self.playback_threads['headphone'] = thread
-                thread.start()
-        
-        elif self.mode == 'performance':
-            # Performance: vocal on headphones + instrumental on speakers
-            if (self.audio_data['headphone'] is not None and
-                self.audio_data['speaker'] is not None):
-                
-                print(f"🔊🎧 Starting performance mode:")
-                print(f"  - Vocal on device {self.DEVICE_HEADPHONE}")
-                print(f"  - Instrumental on device {self.DEVICE_SPEAKER}")
-                
-                # Create both threads
-                headphone_thread = threading.Thread(
-                    target=self._play_stream,
-                    args=(self.DEVICE_HEADPHONE, self.audio_data['headphone'], 'headphone'),
-                    daemon=True,
-                    name="AudioThread-Headphone"
-                )
-                
-                speaker_thread = threading.Thread(
-                    target=self._play_stream,
-                    args=(self.DEVICE_SPEAKER, self.audio_data['speaker'], 'speaker'),
-                    daemon=True,
-                    name="AudioThread-Speaker"
-                )
-                
-                # Store references
-                self.playback_threads['headphone'] = headphone_thread
-                self.playback_threads['speaker'] = speaker_thread
-                
-                # Start both simultaneously
-                headphone_thread.start()
-                speaker_thread.start()
-            else:
-                print("⚠️ Performance mode requires both vocal and instrumental tracks")
+            print(f"🎧 Starting rehearsal on device {self._device_for('headphone')}")
+        else:
+            print(f"🔊🎧 Starting performance mode:")
+            print(f"  - Vocal on device {self._device_for('headphone')}")
+            print(f"  - Instrumental on device {self._device_for('speaker')}")
+
+        if self.persistent:
+            # Warm streams: opening is a no-op unless the rate changed
+            self.open_streams(stream_keys)
+            self._start_capture()
+            self._schedule_start(stream_keys)
+            # Both streams pick the song up at their next block and pad
+            # with silence up to the common start time
+            for key in stream_keys:
+                self.stream_sources[key] = self.sources[key]
+            return True
+
+        # Open every stream first, then start them against one schedule
+        opened = [key for key in stream_keys if self._open_song_stream(key, self.sources[key])]
+        self._start_capture()
+        if opened:
+            self._schedule_start(opened)
+        for key in opened:
+            self._start_song_stream(key)
+        return True
 
     def stop(self) -> None:
         """
-        Stop all audio playback immediately and forcefully.
-        
-        Safe to call multiple times or when not playing.
+        Stop all audio playback after a short fade-out.
         
-        This method uses multiple strategies to ensure ALL audio stops:
-        1. Sets thread-safe stop flag
-        2. Stops individual stream objects
-        3. Calls global sd.stop() as backup
-        4. Waits for threads to terminate
+        Safe to call multiple times or when not playing. Playing streams
+        are first faded to silence (fade_out, 50 ms by default), which
+        blocks the caller for about that long. In persistent mode the
+        sources are then detached; otherwise the stop flag is set so
+        callbacks end at their next block, and each stream is stopped
+        and closed. No thread joins.
         """
+        if self.is_playing_flag and not self.paused.is_set():
+            self._fade_out(self._audible_keys())
+
+        if self.persistent:
+            # Warm streams keep running; they output silence from the
+            # next block on
+            was_playing = self.is_playing_flag
+            self.is_playing_flag = False
+            for key in self.stream_sources:
+                self.stream_sources[key] = None
+            self.paused.clear()
+            self.captures['headphone'] = None
+            if was_playing:
+                self.metrics.dump(self.metrics_file)
+            return
+
+        with self.stop_lock:
+            streams = [(k, st) for k, st in self.active_streams.items() if st is not None]
+
         # If not playing, nothing to do
-        if not self.is_playing_flag and not any(self.playback_threads.values()):
+        if not self.is_playing_flag and not streams:
             print("ℹ️ No active playback to stop")
             return
         
@@ -349,58 +1282,279 @@ class AudioRouter:
         
         # Mark as not playing
         self.is_playing_flag = False
+        self.captures['headphone'] = None
         
-        # Signal all threads to stop (thread-safe)
+        # Callbacks end at their next block; stream.stop() returns once
+        # PortAudio has run finished_callback, so nothing needs to wait
         self.should_stop.set()
+        self.paused.clear()
         
-        # Small delay to let callbacks see the stop flag
-        time.sleep(0.05)
-        
-        # STRATEGY 1: Stop individual streams directly
-        with self.stop_lock:
-            for key, stream in list(self.active_streams.items()):
-                if stream is not None:
-                    try:
-                        print(f"  ⏹️ Stopping stream: {key}")
-                        if stream.active:
-                            stream.stop()
-                        stream.close()
-                    except Exception as e:
-                        print(f"  ⚠️ Error stopping {key}: {e}")
-                    finally:
-                        self.active_streams[key] = None
-        
-        # STRATEGY 2: Global sounddevice stop (catches any orphaned streams)
-        try:
-            sd.stop()
-            print("  ✅ Global sd.stop() called")
-        except Exception as e:
-            print(f"  ⚠️ sd.stop() error: {e}")
-        
-        # Give audio backend time to actually stop
-        time.sleep(0.1)
-        
-        # STRATEGY 3: Wait for threads to finish
-        for key, thread in list(self.playback_threads.items()):
-            if thread and thread.is_alive():
-                print(f"  ⏳ Waiting for thread '{key}'...")
-                thread.join(timeout=0.5)
-                if thread.is_alive():
-                    print(f"  ⚠️ Thread '{key}' did not stop gracefully (will exit on its own)")
-        
-        # Clear all references
-        self.playback_threads = {'headphone': None, 'speaker': None}
-        self.active_streams = {'headphone': None, 'speaker': None}
+        for key, stream in streams:
+            print(f"  ⏹️ Stopping stream: {key}")
+            self._close_stream(key)
         
+        self.metrics.dump(self.metrics_file)
         print("✅ ALL AUDIO STOPPED")
 
     def get_position(self) -> float:
-        """Get current playback position in seconds."""
+        """
+        Get current playback position in seconds.
+
+        The position comes from the playback clock, so it follows the
+        frames actually delivered to the headphone DAC rather than the
+        time elapsed since play() was called. It holds while paused and
+        jumps with seek() and loop wraps.
+        """
         if not self.is_playing_flag:
             return 0.0
-        
-        elapsed = time.time() - self.start_time
-        return min(elapsed, self.duration)
+
+        return min(self.clock.get_position(), self.duration)
+
+    def _transport_keys(self) -> List[str]:
+        """Streams currently playing the song."""
+        return [key for key, source in self.stream_sources.items() if source is not None]
+
+    def _audible_keys(self) -> List[str]:
+        """Streams whose callbacks are still outputting the song."""
+        with self.stop_lock:
+            open_keys = [key for key, stream in self.active_streams.items() if stream is not None]
+        return [
+            key for key in open_keys
+            if self.stream_sources[key] is not None and not self.stream_sources[key].finished
+        ]
+
+    def _fade_out(self, stream_keys: List[str]) -> None:
+        """
+        Ramp streams to silence and wait until their callbacks are there.
+
+        Blocks for about fade_out seconds; a stream whose callback no
+        longer runs costs at most FADE_SLACK more.
+        """
+        gains = [self.gains[key] for key in stream_keys if self.gains[key] is not None]
+        for gain in gains:
+            gain.ramp_to(0.0, self.fade_out)
+        now = self.backend.now
+        deadline = now() + self.fade_out + self.FADE_SLACK
+        for gain in gains:
+            self.backend.wait(gain.faded, max(0.0, deadline - now()))
+
+    def set_volume(self, stream_key: str, volume: float) -> None:
+        """
+        Set a device's master volume, ramped over VOLUME_RAMP.
+
+        Args:
+            stream_key: Stream key ('headphone' or 'speaker')
+            volume: Gain from 0.0 (silent) to 1.0 (unity)
+        """
+        volume = max(0.0, min(float(volume), 1.0))
+        self.volumes[stream_key] = volume
+        gain = self.gains[stream_key]
+        if gain is not None and not self.paused.is_set():
+            gain.ramp_to(volume, self.VOLUME_RAMP)
+
+    def get_volume(self, stream_key: str) -> float:
+        """Get a device's master volume (0.0 - 1.0)."""
+        return self.volumes[stream_key]
+
+    def set_guide_volume(self, volume: float) -> None:
+        """
+        Set the guide vocal level in the headphone mix (stem mode).
+
+        Ramped over VOLUME_RAMP while playing; kept for later songs.
+
+        Args:
+            volume: Gain from 0.0 (instrumental only) to 1.0 (unity)
+        """
+        self.guide_volume = max(0.0, min(float(volume), 1.0))
+        source = self.sources['headphone']
+        if isinstance(source, MixSource):
+            source.set_vocal_gain(self.guide_volume, self.VOLUME_RAMP)
+
+    def get_guide_volume(self) -> float:
+        """Get the guide vocal level in the headphone mix (0.0 - 1.0)."""
+        return self.guide_volume
+
+    def has_stems(self) -> bool:
+        """True when the loaded song is mixed from stems (load_stems)."""
+        return isinstance(self.sources['headphone'], MixSource)
+
+    def _to_frame(self, seconds: float, stream_key: str = 'headphone') -> int:
+        """Convert a song time to a frame index of one stream's track."""
+        source = self.sources[stream_key]
+        return max(0, min(int(round(seconds * source.samplerate)), source.frames))
+
+    def seek(self, seconds: float) -> bool:
+        """
+        Move playback to a song time on every device.
+
+        Each stream jumps at its next block boundary and all of them are
+        heard from the new frame at the same instant, so headphones and
+        speakers stay sample-aligned. While paused, the new position is
+        shown at once and playback continues from it on resume().
+
+        Args:
+            seconds: Song time to continue from
+
+        Returns:
+            True if the seek was scheduled
+        """
+        if not self.is_playing_flag:
+            print("⚠️ Not playing - ignoring seek()")
+            return False
+
+        seconds = max(0.0, min(seconds, self.duration))
+        if self.paused.is_set():
+            self._resume_position = seconds
+            self.clock.jump(self.clock.master_key, self._to_frame(seconds))
+            return True
+
+        keys = self._transport_keys()
+        if not keys:
+            return False
+        # Fade out here; the cue fades the new position in
+        self._fade_out(self._audible_keys())
+        self._schedule_start(keys, seconds)
+        return True
+
+    def pause(self) -> bool:
+        """
+        Pause playback, keeping the streams open.
+
+        Every stream fades out, then outputs silence and holds its
+        cursor; get_position() stops at the last frame heard.
+
+        Returns:
+            True if playback was paused
+        """
+        if not self.is_playing_flag or self.paused.is_set():
+            return False
+        self._fade_out(self._audible_keys())
+        self._resume_position = None
+        self.paused.set()
+        return True
+
+    def resume(self) -> bool:
+        """
+        Resume after pause() from the paused (or sought) position.
+
+        Every stream is cued to the same frame and start time before the
+        pause flag is cleared, so they continue in sync.
+
+        Returns:
+            True if playback resumed
+        """
+        if not self.is_playing_flag or not self.paused.is_set():
+            return False
+
+        position = self._resume_position
+        if position is None:
+            cue = self.cues[self.clock.master_key]
+            if cue is not None and cue[0] is not None:
+                position = cue[0] / self.sample_rate  # Sought just before pausing
+            else:
+                position = self.clock.get_position()
+        self._resume_position = None
+
+        keys = self._transport_keys()
+        if keys:
+            self._schedule_start(keys, position)
+        self.paused.clear()
+        return True
+
+    def is_paused(self) -> bool:
+        """Check if playback is paused."""
+        return self.is_playing_flag and self.paused.is_set()
+
+    def set_loop(self, start: float, end: float) -> bool:
+        """
+        Loop a region of the song (e.g. a rehearsal section).
+
+        When a stream's cursor reaches `end` it wraps to `start` inside
+        the block, on every device at the same song frame. The region
+        does not move the cursor: call seek(start) to jump into it.
+
+        Args:
+            start: Loop start in seconds
+            end: Loop end in seconds
+
+        Returns:
+            True if the region was set
+        """
+        if not self.is_loaded:
+            print("⚠️ No audio loaded")
+            return False
+
+        if not 0 <= start < min(end, self.duration):
+            print(f"⚠️ Invalid loop region {start:.2f}s - {end:.2f}s")
+            return False
+        # Each stream loops on its own frames (the tracks' rates may differ)
+        for key in self.loops:
+            if self.sources[key] is not None:
+                self.loops[key] = (self._to_frame(start, key), self._to_frame(end, key))
+            else:
+                self.loops[key] = None
+        return True
+
+    def clear_loop(self) -> None:
+        """Stop looping; playback continues to the end of the song."""
+        for key in self.loops:
+            self.loops[key] = None
+
+    def get_loop(self) -> Optional[Tuple[float, float]]:
+        """Get the loop region as (start, end) in seconds, or None."""
+        region = self.loops['headphone']
+        if region is None or not self.sample_rate:
+            return None
+        return region[0] / self.sample_rate, region[1] / self.sample_rate
+
+    def get_drift(self) -> float:
+        """
+        Get the measured headphone/speaker drift in seconds.
+
+        Returns:
+            Positive when the headphones are ahead of the speakers,
+            0.0 outside performance playback
+        """
+        if not self.is_playing_flag:
+            return 0.0
+
+        return self.clock.get_drift('headphone', 'speaker')
+
+    def _start_capture(self) -> None:
+        """Give the duplex headphone stream a fresh capture buffer for this song."""
+        with self.stop_lock:
+            has_stream = self.active_streams.get('headphone') is not None
+        if self.duplex_active and has_stream:
+            self.captures['headphone'] = CaptureBuffer(self.sample_rate)
+        else:
+            self.captures['headphone'] = None
+
+    def get_capture(self) -> Optional[CaptureBuffer]:
+        """
+        Microphone capture of the current song (duplex mode).
+
+        Frames are sample-aligned with playback: the buffer's
+        origin_frame is the song frame the singer was hearing when the
+        first captured frame reached the microphone.
+
+        Returns:
+            The song's CaptureBuffer, or None when not capturing
+        """
+        return self.captures['headphone']
+
+    def get_metrics(self) -> Dict:
+        """
+        Snapshot of the audio engine health metrics.
+
+        Safe to call from the UI thread at any time. Per stream: callback
+        load against the block budget (mean, max, histogram in 10 %
+        bins, near misses above 80 %), xruns, underflows, overflows and
+        frames output; plus headphone/speaker drift in performance mode.
+
+        Returns:
+            JSON-serializable dict (see AudioMetrics.snapshot)
+        """
+        return self.metrics.snapshot()
 
     def get_duration(self) -> float:
         """Get total audio duration in seconds."""
@@ -410,10 +1564,9 @@ class AudioRouter:
         """Check if audio is currently playing."""
         if not self.is_playing_flag:
             return False
-        
-        # Check if we've exceeded duration
-        elapsed = time.time() - self.start_time
-        if elapsed >= self.duration:
+
+        # Finished when every stream has ended or the DAC reached the end
+        if self.clock.is_finished() or self.clock.get_position() >= self.duration:
             self.is_playing_flag = False
             return False
         
@@ -0,0 +1,552 @@
+"""
+Audio sources consumed by the AudioRouter stream callbacks.
+
+A source copies consecutive blocks of frames into a caller-provided
+buffer (the stream's output buffer) and tracks its own read cursor.
+read_into() never allocates sample buffers and cue() moves the cursor
+without blocking, so both are safe to call from the real-time callback.
+Three implementations are provided:
+
+- ArraySource: audio fully decoded in memory (numpy array)
+- StreamingSource: audio read from disk in fixed-size blocks by a
+  prefetch thread into a lock-free single-producer/single-consumer
+  ring buffer, so memory use is constant regardless of song length and
+  playback can start after the first block is decoded.
+- MixSource: an instrumental source plus a guide vocal stem, summed
+  block by block with an adjustable vocal gain (stem mode).
+"""
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules.gain_ramp import GainRamp
+from modules.pcm_assets import INT16_SCALE
+
+
+class ArraySource:
+    """
+    Source backed by a fully decoded numpy array.
+
+    int16 arrays take half the memory of float32 ones; read_into() then
+    converts each block into the float32 output buffer in place.
+
+    Attributes:
+        data: Audio samples (float32 or int16), shape (frames, channels)
+        samplerate: Sample rate in Hz
+        frames: Total number of frames
+        channels: Number of channels
+        position: Index of the next frame to be read
+    """
+
+    def __init__(self, data: np.ndarray, samplerate: int):
+        """
+        Initialize array source.
+
+        Args:
+            data: Decoded audio samples
+            samplerate: Sample rate in Hz
+        """
+        # Mono arrays become a (frames, 1) view so blocks match outdata
+        self.data = data if data.ndim > 1 else data.reshape(-1, 1)
+        self.samplerate = samplerate
+        self.frames = len(self.data)
+        self.channels = self.data.shape[1]
+        self.position = 0
+        # int16 samples are cast by copyto, then scaled to [-1.0, 1.0)
+        self._scale = np.float32(INT16_SCALE) if self.data.dtype == np.int16 else None
+
+    @property
+    def finished(self) -> bool:
+        """True once every frame has been read."""
+        return self.position >= self.frames
+
+    def rewind(self) -> None:
+        """Move the read cursor back to the first frame."""
+        self.position = 0
+
+    def cue(self, frame: int) -> None:
+        """Move the read cursor to `frame` (seek or loop wrap, callback-safe)."""
+        self.position = max(0, min(frame, self.frames))
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Copy the next block into `out`.
+
+        Args:
+            out: Destination buffer, shape (frames, channels)
+
+        Returns:
+            Number of frames written (fewer than len(out) at the end)
+        """
+        start = self.position
+        count = min(len(out), self.frames - start)
+        block = out[:count]
+        np.copyto(block, self.data[start:start + count])
+        if self._scale is not None:
+            np.multiply(block, self._scale, out=block)
+        self.position = start + count
+        return count
+
+    def skip(self, frames: int) -> None:
+        """Advance the read cursor without copying (late-start catch-up)."""
+        self.position = min(self.position + frames, self.frames)
+
+    def close(self) -> None:
+        """Release resources (nothing to do for in-memory audio)."""
+
+
+class RingBuffer:
+    """
+    Lock-free single-producer/single-consumer ring buffer of audio frames.
+
+    The producer only advances `_write` and the consumer only advances
+    `_read`; both counters grow monotonically and are published after
+    the samples are copied, so under the GIL neither side needs a lock.
+    """
+
+    def __init__(self, capacity: int, channels: int, dtype: str = 'float32'):
+        """
+        Initialize ring buffer.
+
+        Args:
+            capacity: Maximum number of frames held
+            channels: Number of channels per frame
+            dtype: Sample dtype
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=dtype)
+        self._write = 0  # Total frames written (producer only)
+        self._read = 0   # Total frames read (consumer only)
+
+    @property
+    def available(self) -> int:
+        """Frames ready to be read."""
+        return self._write - self._read
+
+    @property
+    def space(self) -> int:
+        """Frames that can be written without overwriting unread data."""
+        return self.capacity - (self._write - self._read)
+
+    def write(self, data: np.ndarray) -> int:
+        """
+        Copy frames into the ring (producer side).
+
+        Args:
+            data: Frames to write, shape (n, channels)
+
+        Returns:
+            Number of frames actually written
+        """
+        count = min(len(data), self.space)
+        if count <= 0:
+            return 0
+
+        start = self._write % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = data[:first]
+        if count > first:
+            self._buffer[:count - first] = data[first:count]
+
+        self._write += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Move up to len(out) frames out of the ring (consumer side).
+
+        Args:
+            out: Destination buffer, shape (frames, channels)
+
+        Returns:
+            Number of frames copied (fewer on underrun)
+        """
+        count = min(len(out), self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        np.copyto(out[:first], self._buffer[start:start + first])
+        if count > first:
+            np.copyto(out[first:count], self._buffer[:count - first])
+
+        self._read += count
+        return count
+
+    @property
+    def written(self) -> int:
+        """Total frames written since the last reset."""
+        return self._write
+
+    def discard(self, frames: int) -> int:
+        """
+        Drop up to `frames` unread frames (consumer side).
+
+        Returns:
+            Number of frames dropped
+        """
+        count = min(frames, self.available)
+        self._read += count
+        return count
+
+    def discard_until(self, index: int) -> int:
+        """
+        Drop unread frames written before the `index`-th frame (consumer side).
+
+        Args:
+            index: Value of `written` at the point to resume reading from
+
+        Returns:
+            Number of frames dropped
+        """
+        return self.discard(max(0, index - self._read))
+
+    def reset(self) -> None:
+        """Discard all frames. Only call while producer and consumer are idle."""
+        self._write = 0
+        self._read = 0
+
+
+class StreamingSource:
+    """
+    Source that streams a sound file from disk through a ring buffer.
+
+    A prefetch thread reads fixed-size blocks with SoundFile.blocks and
+    keeps the ring full; the stream callback only copies out of the
+    ring. Opening the source decodes a single block, so time to first
+    sample is a few milliseconds instead of a full decode.
+
+    cue() hands the jump to the prefetch thread, which seeks the file
+    and publishes where the new frames start in the ring. Until a whole
+    block is decoded there, read_into() outputs silence (a few
+    milliseconds, usually less than one block) but the cursor keeps
+    moving, and the frames it owes are then dropped, so the stream stays
+    in time with the other devices.
+    """
+
+    BLOCK_FRAMES = 4096  # Frames decoded per disk read
+    BUFFER_SECONDS = 1.0  # Ring buffer length
+
+    def __init__(self, filepath: str, block_frames: Optional[int] = None,
+                 buffer_seconds: Optional[float] = None):
+        """
+        Open a sound file for streaming.
+
+        Args:
+            filepath: Path to the audio file
+            block_frames: Frames per disk read (default BLOCK_FRAMES)
+            buffer_seconds: Ring buffer length in seconds
+                (default BUFFER_SECONDS)
+        """
+        self.path = Path(filepath)
+        self.block_frames = block_frames or self.BLOCK_FRAMES
+
+        self._file = sf.SoundFile(str(self.path))
+        self.samplerate = self._file.samplerate
+        self.frames = self._file.frames
+        self.channels = self._file.channels
+        self.position = 0
+
+        seconds = buffer_seconds or self.BUFFER_SECONDS
+        capacity = max(int(self.samplerate * seconds), 2 * self.block_frames)
+        self._ring = RingBuffer(capacity, self.channels)
+        self._block = np.zeros((self.block_frames, self.channels), dtype='float32')
+
+        # Pending cue from the callback, and the (cue, ring write count)
+        # the prefetch thread publishes once the file has been moved
+        self._cue_request: Optional[Tuple[int]] = None
+        self._cue_applied: Optional[Tuple[int]] = None
+        self._cue_ready: Optional[Tuple[Tuple[int], int]] = None
+        self._cue_lag = 0  # Silent frames output while the cue was pending
+        self._rejoining = False  # Keeping time in silence after a cue
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # Set by cue() and close()
+        self._thread: Optional[threading.Thread] = None
+        self._start_prefetch(0)
+
+    @property
+    def finished(self) -> bool:
+        """True once every frame has been read."""
+        return self.position >= self.frames
+
+    def _start_prefetch(self, frame: int) -> None:
+        """Seek the file, prime the first block and start the prefetch thread."""
+        self._file.seek(frame)
+        self._ring.reset()
+        self.position = frame
+        self._cue_request = self._cue_applied = self._cue_ready = None
+        self._cue_lag = 0
+        self._rejoining = False
+
+        # Prime synchronously so the first callback has audio to play
+        first_block = self._file.read(dtype='float32', always_2d=True, out=self._block)
+        self._ring.write(first_block)
+
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(
+            target=self._prefetch_loop,
+            daemon=True,
+            name=f"AudioPrefetch-{self.path.name}"
+        )
+        self._thread.start()
+
+    def _stop_prefetch(self) -> None:
+        """Stop the prefetch thread and wait for it to exit."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _prefetch_loop(self) -> None:
+        """Keep the ring buffer full until close, following cues."""
+        wait = self.block_frames / self.samplerate / 4
+        handled = None
+        try:
+            while not self._stop.is_set():
+                request = self._cue_request
+                if request is not handled:
+                    # Jump the file; frames written from here on belong
+                    # to the cue, everything before it is stale
+                    handled = request
+                    self._file.seek(request[0])
+                    self._cue_ready = (request, self._ring.written)
+
+                block = self._file.read(dtype='float32', always_2d=True, out=self._block)
+                if not len(block):
+                    # End of file - sleep until a cue or close
+                    self._wake.clear()
+                    if self._cue_request is handled and not self._stop.is_set():
+                        self._wake.wait()
+                    continue
+
+                written = 0
+                while written < len(block) and self._cue_request is handled:
+                    if self._stop.is_set():
+                        return
+                    written += self._ring.write(block[written:])
+                    if written < len(block):
+                        # Ring full - wait for the callback to drain it
+                        self._wake.wait(wait)
+                        self._wake.clear()
+        except Exception as e:
+            print(f"❌ Prefetch error in '{self.path.name}': {e}")
+
+    def rewind(self) -> None:
+        """Restart streaming from the first frame."""
+        self.seek(0)
+
+    def seek(self, frame: int) -> None:
+        """
+        Restart streaming from an arbitrary frame.
+
+        Must not be called while a stream is consuming this source.
+
+        Args:
+            frame: Frame index to continue from
+        """
+        frame = max(0, min(int(frame), self.frames))
+        if (frame == self.position and self._ring.available > 0
+                and self._cue_request is self._cue_applied):
+            return  # Already primed at this frame
+        self._stop_prefetch()
+        self._start_prefetch(frame)
+
+    def cue(self, frame: int) -> None:
+        """
+        Move the read cursor while a stream is consuming this source.
+
+        Never blocks: the prefetch thread performs the file seek, and
+        reads output silence until it has primed the new position.
+
+        Args:
+            frame: Frame index to continue from
+        """
+        self.position = max(0, min(frame, self.frames))
+        self._cue_lag = 0
+        self._rejoining = True
+        self._cue_request = (self.position,)
+        self._wake.set()
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Copy the next block from the ring buffer into `out`.
+
+        On a prefetch underrun fewer frames are copied; the caller pads
+        with silence and the cursor only advances by what was read.
+        While a cue is pending the block is filled with silence and
+        counted as read.
+
+        Args:
+            out: Destination buffer, shape (frames, channels)
+
+        Returns:
+            Number of frames written
+        """
+        request = self._cue_request
+        if request is not self._cue_applied:
+            ready = self._cue_ready
+            if ready is None or ready[0] is not request:
+                return self._keep_time(out)  # Prefetch thread is still seeking
+            self._ring.discard_until(ready[1])
+            self._cue_applied = request
+            self._wake.set()  # The prefetch thread may be waiting for space
+        if self._rejoining:
+            # Drop the frames owed for the silence, and only rejoin once a
+            # whole block is decoded (a partial read would fall behind)
+            self._cue_lag -= self._ring.discard(self._cue_lag)
+            if self._cue_lag or self._ring.available < min(len(out), self.frames - self.position):
+                return self._keep_time(out)
+            self._rejoining = False
+
+        remaining = self.frames - self.position
+        count = self._ring.read_into(out if len(out) <= remaining else out[:remaining])
+        self.position += count
+        return count
+
+    def _keep_time(self, out: np.ndarray) -> int:
+        """Output silence after a cue, owing the frames it stands in for."""
+        count = min(len(out), self.frames - self.position)
+        out[:count] = 0
+        self.position += count
+        self._cue_lag += count
+        return count
+
+    def skip(self, frames: int) -> None:
+        """Drop buffered frames without copying (late-start catch-up)."""
+        self.position += self._ring.discard(min(frames, self.frames - self.position))
+
+    def close(self) -> None:
+        """Stop prefetching and close the file."""
+        self._stop_prefetch()
+        self._file.close()
+
+
+class MixSource:
+    """
+    Source mixing an instrumental and a guide vocal stem on the fly.
+
+    Both stems are read at the same cursor; the vocal block is scaled by
+    a GainRamp (so guide volume changes are click-free) and added to the
+    instrumental in the output buffer. The instrumental drives length,
+    position and completion; a shorter vocal stem is padded with silence.
+    A mono stem is added to every channel and a multi-channel stem over
+    a mono instrumental is mixed down.
+
+    Attributes:
+        instrumental: Source of the instrumental stem
+        vocal: Source of the vocal-only stem (same sample rate)
+        samplerate: Sample rate in Hz
+        frames: Total number of frames (instrumental length)
+        channels: Number of channels (instrumental channels)
+    """
+
+    def __init__(self, instrumental, vocal, vocal_gain: float = 1.0,
+                 blocksize: int = 2048):
+        """
+        Initialize mix source.
+
+        Args:
+            instrumental: Source of the instrumental stem
+            vocal: Source of the vocal stem
+            vocal_gain: Initial guide vocal gain (0.0 = karaoke only)
+            blocksize: Expected frames per read (the vocal scratch buffer
+                grows once if a larger block arrives)
+
+        Raises:
+            ValueError: Stems have different sample rates
+        """
+        if vocal.samplerate != instrumental.samplerate:
+            raise ValueError(
+                f"Stem rates differ: instrumental {instrumental.samplerate} Hz, "
+                f"vocal {vocal.samplerate} Hz"
+            )
+        self.instrumental = instrumental
+        self.vocal = vocal
+        self.samplerate = instrumental.samplerate
+        self.frames = instrumental.frames
+        self.channels = instrumental.channels
+        self.vocal_ramp = GainRamp(self.samplerate, blocksize, vocal_gain)
+        self._scratch = np.zeros((blocksize, vocal.channels), dtype='float32')
+
+    @property
+    def position(self) -> int:
+        """Index of the next frame to be read."""
+        return self.instrumental.position
+
+    @property
+    def finished(self) -> bool:
+        """True once every instrumental frame has been read."""
+        return self.instrumental.finished
+
+    @property
+    def vocal_gain(self) -> float:
+        """Current guide vocal gain."""
+        return self.vocal_ramp.gain
+
+    def set_vocal_gain(self, gain: float, seconds: float = 0.0) -> None:
+        """Ramp the guide vocal to `gain` from the next block (any thread)."""
+        self.vocal_ramp.ramp_to(gain, seconds)
+
+    def rewind(self) -> None:
+        """Move both cursors back to the first frame."""
+        self.instrumental.rewind()
+        self.vocal.rewind()
+
+    def cue(self, frame: int) -> None:
+        """Move both cursors to `frame` (seek or loop wrap, callback-safe)."""
+        self.instrumental.cue(frame)
+        self.vocal.cue(frame)
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Mix the next block into `out`.
+
+        Args:
+            out: Destination buffer, shape (frames, channels)
+
+        Returns:
+            Number of frames written (fewer than len(out) at the end)
+        """
+        count = self.instrumental.read_into(out)
+        if len(self._scratch) < count:
+            # Unusual block size; grow once
+            self._scratch = np.zeros((count, self._scratch.shape[1]), dtype='float32')
+        block = self._scratch[:count]
+        heard = self.vocal.read_into(block)
+        block[heard:] = 0
+        self.vocal_ramp.apply(block)
+
+        mixed = out[:count]
+        channels, stem_channels = mixed.shape[1], block.shape[1]
+        if channels == 1 and stem_channels > 1:
+            # Multi-channel stem over a mono instrumental - mix down
+            np.multiply(block, 1.0 / stem_channels, out=block)
+            column = mixed[:, 0]
+            for stem_channel in range(stem_channels):
+                np.add(column, block[:, stem_channel], out=column)
+            return count
+
+        # One channel at a time, so a mono stem adds to every channel
+        # without numpy buffering a broadcast temporary; stem channels
+        # beyond a multi-channel instrumental's are dropped, as the
+        # router does for devices
+        last = stem_channels - 1
+        for channel in range(channels):
+            column = mixed[:, channel]
+            np.add(column, block[:, min(channel, last)], out=column)
+        return count
+
+    def skip(self, frames: int) -> None:
+        """Advance both cursors without copying (late-start catch-up)."""
+        self.instrumental.skip(frames)
+        self.vocal.skip(frames)
+
+    def close(self) -> None:
+        """Close both stems."""
+        self.instrumental.close()
+        self.vocal.close()
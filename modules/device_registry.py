@@ -0,0 +1,232 @@
+"""
+Audio device registry for IBP-KaraokeLive.
+
+Windows re-numbers audio devices whenever USB audio is re-enumerated,
+so the router no longer uses fixed indices. Each device key is
+described in AUDIO_DEVICES by a name substring, a host API substring, a
+minimum channel count and its kind (output by default, or input); the
+registry resolves it against a cached sd.query_devices() enumeration.
+
+When a stream dies (typically the USB headset was unplugged) the router
+asks for a background refresh. A refresh with rescan re-initializes
+PortAudio, which is the only way to see devices plugged in after
+start-up. Because that invalidates every open stream, the registry
+first asks its listeners to close their streams and then to reopen
+them on the re-resolved devices.
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.app_config import AUDIO_DEVICES
+from modules.audio_backends import SoundDeviceBackend
+
+
+Listener = Tuple[Callable[[], None], Callable[[], None]]
+
+
+class DeviceRegistry:
+    """
+    Resolves device keys to device indices.
+
+    The enumeration is queried once and cached; resolutions are cached
+    per key until the next refresh(). All methods are thread-safe.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, Dict]] = None, backend=None):
+        """
+        Initialize registry.
+
+        Args:
+            specs: Device description per key ('name', 'hostapi',
+                'channels', 'kind'); defaults to AUDIO_DEVICES
+            backend: Audio backend that enumerates the devices (see
+                modules.audio_backends); defaults to sounddevice
+        """
+        self.specs: Dict[str, Dict] = specs if specs is not None else AUDIO_DEVICES
+        self.backend = backend
+        self._devices: Optional[List[Dict]] = None
+        self._hostapis: Optional[List[Dict]] = None
+        self._resolved: Dict[str, Optional[int]] = {}
+        self._lock = threading.RLock()
+        self._listeners: List[Listener] = []
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _enumerate(self) -> None:
+        """Query PortAudio's device and host API lists. Lock held."""
+        try:
+            source = self.backend if self.backend is not None else SoundDeviceBackend()
+            self._devices = [dict(d) for d in source.query_devices()]
+            self._hostapis = [dict(h) for h in source.query_hostapis()]
+        except Exception as e:
+            print(f"❌ Could not enumerate audio devices: {e}")
+            self._devices, self._hostapis = [], []
+
+    def devices(self) -> List[Dict]:
+        """All devices from the cached enumeration."""
+        with self._lock:
+            if self._devices is None:
+                self._enumerate()
+            return self._devices
+
+    def device_info(self, index: int) -> Dict:
+        """
+        Cached sd.query_devices() entry for one device.
+
+        Raises:
+            ValueError: If no device has this index
+        """
+        devices = self.devices()
+        if not 0 <= index < len(devices):
+            raise ValueError(f"No audio device with index {index}")
+        return devices[index]
+
+    def hostapi_name(self, device: Dict) -> str:
+        """Name of a device's host API (e.g. 'MME', 'Windows WASAPI')."""
+        self.devices()
+        hostapis = self._hostapis or []
+        index = device.get('hostapi', -1)
+        return hostapis[index]['name'] if 0 <= index < len(hostapis) else ''
+
+    def output_devices(self) -> List[Dict]:
+        """Devices with at least one output channel."""
+        return [d for d in self.devices() if d['max_output_channels'] > 0]
+
+    def find(self, name: Optional[str] = None, hostapi: Optional[str] = None,
+             channels: int = 1, kind: str = 'output') -> Optional[int]:
+        """
+        Find the first device matching a description.
+
+        Args:
+            name: Case-insensitive substring of the device name
+            hostapi: Case-insensitive substring of the host API name
+            channels: Minimum number of channels of `kind`
+            kind: 'output' or 'input'
+
+        Returns:
+            Device index, or None if nothing matches
+        """
+        for index, device in enumerate(self.devices()):
+            if device[f'max_{kind}_channels'] < channels:
+                continue
+            if name and name.lower() not in device['name'].lower():
+                continue
+            if hostapi and hostapi.lower() not in self.hostapi_name(device).lower():
+                continue
+            return device.get('index', index)
+        return None
+
+    def resolve(self, stream_key: str) -> Optional[int]:
+        """
+        Device index for a device key.
+
+        Args:
+            stream_key: Key of AUDIO_DEVICES ('headphone', 'speaker', 'mic')
+
+        Returns:
+            Device index, or None if the device is not connected
+        """
+        with self._lock:
+            if stream_key in self._resolved:
+                return self._resolved[stream_key]
+
+            spec = self.specs.get(stream_key, {})
+            kind = spec.get('kind', 'output')
+            device = self.find(
+                spec.get('name'), spec.get('hostapi'), spec.get('channels', 1), kind
+            )
+            if device is None:
+                names = [d['name'] for d in self.devices() if d[f'max_{kind}_channels'] > 0]
+                print(f"⚠️ No {kind} device for '{stream_key}' matches {spec}. Devices: {names}")
+            else:
+                print(f"🔎 '{stream_key}' → device {device} ({self.device_info(device)['name']})")
+            self._resolved[stream_key] = device
+            return device
+
+    def add_listener(self, on_suspend: Callable[[], None],
+                     on_resume: Callable[[], None]) -> None:
+        """
+        Subscribe to device refreshes.
+
+        Args:
+            on_suspend: Called before PortAudio is re-initialized; must
+                close every stream the listener has open
+            on_resume: Called after every refresh; reopens streams on
+                the newly resolved devices
+        """
+        with self._lock:
+            self._listeners.append((on_suspend, on_resume))
+
+    def remove_listener(self, on_suspend: Callable[[], None]) -> None:
+        """Unsubscribe a listener added with add_listener."""
+        with self._lock:
+            self._listeners = [l for l in self._listeners if l[0] != on_suspend]
+
+    def refresh(self, rescan: bool = False) -> Dict[str, Optional[int]]:
+        """
+        Re-enumerate devices and re-resolve every stream key.
+
+        Args:
+            rescan: Re-initialize PortAudio so hot-plugged devices show
+                up. Listeners close their streams first and reopen them
+                afterwards.
+
+        Returns:
+            The new device index per stream key
+        """
+        with self._lock:
+            listeners = list(self._listeners)
+            if rescan:
+                for on_suspend, _ in listeners:
+                    self._call(on_suspend)
+                try:
+                    backend = self.backend if self.backend is not None else SoundDeviceBackend()
+                    backend.reinitialize()
+                except Exception as e:
+                    print(f"⚠️ Could not re-initialize PortAudio: {e}")
+
+            self._enumerate()
+            self._resolved.clear()
+            resolved = {key: self.resolve(key) for key in self.specs}
+
+        for _, on_resume in listeners:
+            self._call(on_resume)
+        return resolved
+
+    def refresh_async(self, rescan: bool = True) -> threading.Thread:
+        """
+        Refresh on a background thread (coalesces concurrent requests).
+
+        Returns:
+            The refresh thread (already running)
+        """
+        with self._lock:
+            thread = self._refresh_thread
+            if thread is not None and thread.is_alive():
+                return thread
+            thread = threading.Thread(
+                target=self.refresh, args=(rescan,), daemon=True, name="AudioDeviceRefresh"
+            )
+            self._refresh_thread = thread
+            thread.start()
+            return thread
+
+    @staticmethod
+    def _call(listener: Callable[[], None]) -> None:
+        """Run a listener, reporting its errors."""
+        try:
+            listener()
+        except Exception as e:
+            print(f"⚠️ Audio device listener error: {e}")
+
+
+_registry: Optional[DeviceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_device_registry() -> DeviceRegistry:
+    """Return the process-wide device registry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+        return _registry
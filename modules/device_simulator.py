@@ -0,0 +1,976 @@
+"""
+Simulated audio devices for reproducing kiosk hardware behaviour anywhere.
+
+Routing to devices 8/9, stop races and late callbacks only show up with
+real PortAudio threads. DeviceSimulator fakes the sounddevice and
+pyaudio surfaces that AudioRouter, AudioAnalyzer and the latency
+calibration use: every started stream calls back on its own thread,
+like PortAudio, paced by a SimulatedClock. Each simulated device has
+its own block timing, reported latency, callback jitter and injected
+underflows, and records what it played (see modules.offline_backend for
+the synchronous OfflineBackend, which needs no threads).
+
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))   # Manual clock
+    sim.configure('Speakers (USB Audio Device)', jitter=0.004, underflow_rate=0.01)
+    router = AudioRouter(backend=sim.backend())
+    ...
+    router.play()
+    sim.clock.advance(2.0)                  # Callbacks for 2 s, instantly
+
+    with sim.install():                     # import sounddevice / pyaudio
+        analyzer = AudioAnalyzer()          # get the fakes
+"""
+import contextlib
+import sys
+import threading
+import time
+import types
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from modules import offline_backend
+from modules.offline_backend import (
+    INPUT_OVERFLOW, INPUT_UNDERFLOW, OUTPUT_OVERFLOW, OUTPUT_UNDERFLOW,
+    BlockLog, CallbackFlags, DeviceSink
+)
+
+try:
+    # Share the real exception types, so code that imported sounddevice
+    # before the simulator was installed still stops its streams
+    import sounddevice as _sd
+    CallbackStop, CallbackAbort, PortAudioError = _sd.CallbackStop, _sd.CallbackAbort, _sd.PortAudioError
+except (ImportError, OSError):  # PortAudio not installed
+    CallbackStop = offline_backend.CallbackStop
+    CallbackAbort = offline_backend.CallbackAbort
+    PortAudioError = offline_backend.PortAudioError
+
+# The kiosk's MME enumeration: Realtek speakers on 8, USB headset on 9
+KIOSK_DEVICES = [
+    ('Microsoft Sound Mapper - Input', 2, 0),
+    ('Microphone (USB Audio Device)', 1, 0),
+    ('Microphone Array (Realtek(R) Audio)', 2, 0),
+    ('Stereo Mix (Realtek(R) Audio)', 2, 0),
+    ('Line In (Realtek(R) Audio)', 2, 0),
+    ('Microsoft Sound Mapper - Output', 0, 2),
+    ('Digital Audio (S/PDIF) (High Definition Audio)', 0, 2),
+    ('LG HDR 4K (NVIDIA High Definition Audio)', 0, 2),
+    ('Speakers (Realtek(R) Audio)', 0, 2),
+    ('Speakers (USB Audio Device)', 0, 2),
+]
+
+
+class SimulatedClock:
+    """
+    Host clock of the simulated devices.
+
+    With a speed the clock runs with real time (speed 1.0 reads exactly
+    like time.perf_counter()). Without one (speed=None) it is manual:
+    time only moves in advance(), which runs every stream callback due
+    on the way, in order, and returns once they are done.
+    """
+
+    SETTLE_TIMEOUT = 5.0  # Real seconds a callback may take in manual mode
+
+    def __init__(self, speed: Optional[float] = 1.0):
+        """
+        Args:
+            speed: Simulated seconds per real second, or None for a
+                manual clock starting at 0.0
+        """
+        self.speed = speed
+        self._origin = time.perf_counter()
+        self._time = self._origin if speed is not None else 0.0
+        self.epoch = self._time  # Host time of frame 0 of signals and recordings
+        self._cond = threading.Condition()
+        self._sleepers: Dict[object, float] = {}  # Manual: sleeping thread -> deadline
+        self._busy = 0  # Manual: attached threads not sleeping
+
+    @property
+    def manual(self) -> bool:
+        """True if time only moves with advance()."""
+        return self.speed is None
+
+    def now(self) -> float:
+        """Current simulated host time in seconds."""
+        if self.speed is None:
+            return self._time
+        return self._time + (time.perf_counter() - self._origin) * self.speed
+
+    def attach(self) -> None:
+        """Register a thread advance() must wait for (manual mode)."""
+        with self._cond:
+            self._busy += 1
+
+    def detach(self) -> None:
+        """Unregister a thread added with attach()."""
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify_all()
+
+    def wake(self) -> None:
+        """Wake sleepers so they can check their interrupt event."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def sleep_until(self, deadline: float,
+                    interrupt: Optional[threading.Event] = None) -> bool:
+        """
+        Block until simulated time reaches `deadline`.
+
+        In manual mode only attached threads may sleep.
+
+        Returns:
+            False if `interrupt` was set first
+        """
+        if self.speed is not None:
+            delay = max(0.0, (deadline - self.now()) / self.speed)
+            if interrupt is None:
+                time.sleep(delay)
+                return True
+            return not interrupt.wait(delay)
+
+        token = object()
+        with self._cond:
+            if deadline <= self._time:
+                return interrupt is None or not interrupt.is_set()
+            self._sleepers[token] = deadline
+            self._busy -= 1
+            self._cond.notify_all()
+            while token in self._sleepers:  # advance() removes it once due
+                if interrupt is not None and interrupt.is_set():
+                    del self._sleepers[token]
+                    self._busy += 1
+                    return False
+                self._cond.wait()
+            return True
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep for simulated seconds (any thread)."""
+        self.attach()
+        try:
+            self.sleep_until(self.now() + seconds)
+        finally:
+            self.detach()
+
+    def advance(self, seconds: float,
+                until: Optional[Callable[[], bool]] = None) -> float:
+        """
+        Move a manual clock forward, running every callback due meanwhile.
+
+        Args:
+            seconds: Simulated time to advance
+            until: Stop early once this returns True (checked after each
+                batch of callbacks)
+
+        Returns:
+            The new simulated time
+
+        Raises:
+            RuntimeError: On a real-time clock, or if a callback runs for
+                more than SETTLE_TIMEOUT real seconds
+        """
+        if self.speed is not None:
+            raise RuntimeError("Only a manual clock (speed=None) can be advanced")
+        with self._cond:
+            target = self._time + seconds
+            while True:
+                if not self._cond.wait_for(lambda: self._busy <= 0, self.SETTLE_TIMEOUT):
+                    raise RuntimeError("Simulated stream callback did not return")
+                if until is not None and until():
+                    return self._time
+                due = [deadline for deadline in self._sleepers.values() if deadline <= target]
+                if not due:
+                    break
+                self._time = max(self._time, min(due))
+                for token, deadline in list(self._sleepers.items()):
+                    if deadline <= self._time:
+                        del self._sleepers[token]
+                        self._busy += 1
+                self._cond.notify_all()
+            self._time = target
+            return self._time
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Wait for an event set by callbacks, for at most `timeout` simulated seconds."""
+        if self.speed is None:
+            self.advance(timeout, until=event.is_set)
+            return event.is_set()
+        return event.wait(timeout / self.speed)
+
+
+class SimulatedTimeInfo:
+    """time_info passed to stream callbacks."""
+
+    __slots__ = ('currentTime', 'outputBufferDacTime', 'inputBufferAdcTime')
+
+    def __init__(self, current: float, dac: float, adc: float):
+        self.currentTime = current
+        self.outputBufferDacTime = dac
+        self.inputBufferAdcTime = adc
+
+
+class SimulatedDevice:
+    """One simulated device: its enumeration entry, behaviour and recordings."""
+
+    def __init__(self, name: str, input_channels: int = 0, output_channels: int = 2,
+                 hostapi: int = 0, samplerate: int = 48000, blocksize: int = 512,
+                 latency: float = 0.020, input_latency: Optional[float] = None,
+                 jitter: float = 0.0, underflow_rate: float = 0.0,
+                 underflows: Iterable[int] = (), signal: Optional[np.ndarray] = None,
+                 seed: int = 0):
+        """
+        Args:
+            name: Device name as enumerated
+            input_channels: Maximum input channels
+            output_channels: Maximum output channels
+            hostapi: Index of the device's host API
+            samplerate: Native (default) sample rate
+            blocksize: Frames per callback for streams opened with 0/None
+            latency: Output latency the streams report and honour
+            input_latency: Input latency (default: same as latency)
+            jitter: Maximum extra lateness of a callback, in seconds
+                (uniform); a block that misses its DAC time underflows
+            underflow_rate: Probability that a block underflows anyway
+            underflows: Block indices (per stream) that always underflow
+            signal: Mono samples the device hears from the clock's epoch
+                on, at the rate of the stream reading them (None = silence)
+            seed: Seed of the jitter and underflow random generator
+        """
+        self.name = name
+        self.input_channels = input_channels
+        self.output_channels = output_channels
+        self.hostapi = hostapi
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = latency
+        self.input_latency = latency if input_latency is None else input_latency
+        self.jitter = jitter
+        self.underflow_rate = underflow_rate
+        self.underflows = set(underflows)
+        self.signal = signal
+        self.rng = np.random.default_rng(seed)
+        self.connected = True
+        self.sink: Optional[DeviceSink] = None
+        self.underflow_count = 0
+
+    def info(self, index: int) -> Dict:
+        """sd.query_devices() entry."""
+        return {
+            'name': self.name,
+            'index': index,
+            'hostapi': self.hostapi,
+            'max_input_channels': self.input_channels,
+            'max_output_channels': self.output_channels,
+            'default_samplerate': float(self.samplerate),
+            'default_low_input_latency': self.input_latency,
+            'default_low_output_latency': self.latency,
+            'default_high_input_latency': self.input_latency,
+            'default_high_output_latency': self.latency,
+        }
+
+    def lateness(self) -> float:
+        """Draw how late the next callback runs."""
+        return float(self.rng.uniform(0.0, self.jitter)) if self.jitter > 0 else 0.0
+
+    def forced_underflow(self, block: int) -> bool:
+        """True if an underflow is injected at this block."""
+        if block in self.underflows:
+            return True
+        return self.underflow_rate > 0 and self.rng.random() < self.underflow_rate
+
+    def record(self, frame: int, block: np.ndarray, samplerate: int, entry: BlockLog) -> None:
+        """Record an output block on the DAC timeline."""
+        if self.sink is None or self.sink.samplerate != samplerate:
+            self.sink = DeviceSink(samplerate, self.output_channels)
+        self.sink.write(frame, block.astype('float32', copy=False))
+        self.sink.log.append(entry)
+
+    def read_signal(self, indata: np.ndarray, frame: int) -> None:
+        """Fill an input block with the signal heard from `frame` on."""
+        indata.fill(0)
+        signal = self.signal
+        if signal is None or frame >= len(signal) or frame + len(indata) <= 0:
+            return
+        start = max(frame, 0)
+        chunk = signal[start:frame + len(indata)]
+        target = indata[start - frame:start - frame + len(chunk)]
+        if target.dtype.kind == 'f':
+            target[:] = chunk.reshape(-1, 1)
+        else:
+            bits = 8 * target.dtype.itemsize - 1
+            target[:] = np.clip(chunk * 2 ** bits, -2 ** bits, 2 ** bits - 1).reshape(-1, 1)
+
+
+class SimulatedStream:
+    """
+    A simulated PortAudio stream (sd.OutputStream / InputStream / Stream).
+
+    After start() the callback runs on its own thread once per block:
+    block n is due at start + n * blocksize / samplerate plus the
+    device's jitter, and its output reaches the DAC `latency` after its
+    nominal time. A block whose callback returns after that (jitter plus
+    real CPU time on a real-time clock) or that is injected as an
+    underflow plays silence, and the next callback sees
+    output_underflow.
+    """
+
+    def __init__(self, simulator: 'DeviceSimulator', kind: str,
+                 samplerate: Optional[float] = None, blocksize: Optional[int] = None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, callback=None,
+                 finished_callback: Optional[Callable[[], None]] = None, **_):
+        self.simulator = simulator
+        self.kind = kind
+        pair = kind == 'duplex'
+        devices = device if isinstance(device, (list, tuple)) else (device, device)
+        counts = channels if isinstance(channels, (list, tuple)) else (channels, channels)
+        dtypes = dtype if isinstance(dtype, (list, tuple)) else (dtype, dtype)
+
+        self._input = simulator._open_device(devices[0], 'input') if kind != 'output' else None
+        self._output = simulator._open_device(devices[1], 'output') if kind != 'input' else None
+        primary = self._output or self._input
+        in_channels = (counts[0] or 1) if self._input else 0
+        out_channels = (counts[1] or self._output.output_channels) if self._output else 0
+        if self._input and in_channels > self._input.input_channels:
+            raise PortAudioError("Invalid number of input channels")
+        if self._output and out_channels > self._output.output_channels:
+            raise PortAudioError("Invalid number of output channels")
+
+        self.samplerate = float(samplerate or primary.samplerate)
+        self.blocksize = blocksize or primary.blocksize
+        self.device = tuple(simulator.index_of(d) for d in (self._input, self._output)) if pair \
+            else simulator.index_of(primary)
+        self.channels = (in_channels, out_channels) if pair else (out_channels or in_channels)
+        self.dtype = (dtypes[0] or 'float32', dtypes[1] or 'float32') if pair else (dtypes[1] or 'float32')
+        if pair:
+            self.latency = (self._input.input_latency, self._output.latency)
+        else:
+            self.latency = self._output.latency if self._output else self._input.input_latency
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.active = False
+        self.closed = False
+        self.callback_count = 0
+
+        in_dtype, out_dtype = (self.dtype if pair else (self.dtype, self.dtype))
+        self._indata = np.zeros((self.blocksize, in_channels), dtype=in_dtype)
+        self._outdata = np.zeros((self.blocksize, out_channels), dtype=out_dtype)
+        self._rate = int(self.samplerate)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def stopped(self) -> bool:
+        return not self.active
+
+    @property
+    def time(self) -> float:
+        """Current simulated host time."""
+        return self.simulator.clock.now()
+
+    @property
+    def cpu_load(self) -> float:
+        return 0.0
+
+    def start(self) -> None:
+        """Start calling back from the current simulated time."""
+        if self.closed:
+            raise PortAudioError("Stream is closed")
+        if self.active:
+            return
+        self._stop.clear()
+        self.active = True
+        clock = self.simulator.clock
+        clock.attach()  # Before the thread exists, so advance() waits for it
+        start_frame = int(np.ceil((clock.now() - clock.epoch) * self._rate))
+        self._thread = threading.Thread(
+            target=self._run, args=(start_frame,), daemon=True, name="SimulatedStream"
+        )
+        self._thread.start()
+
+    def _run(self, start_frame: int) -> None:
+        """Stream thread: one callback per block until stopped."""
+        clock = self.simulator.clock
+        rate, frames = self._rate, self.blocksize
+        device_in, device_out = self._input, self._output
+        flags = 0
+        block = 0
+        try:
+            while True:
+                nominal_frame = start_frame + block * frames
+                nominal = clock.epoch + nominal_frame / rate
+                lateness = (device_out or device_in).lateness()
+                if not clock.sleep_until(nominal + lateness, self._stop):
+                    break
+                if not all(d.connected for d in (device_in, device_out) if d is not None):
+                    print("⚠️ Simulated device unplugged - stream aborted")
+                    break
+
+                now = clock.now()
+                dac = nominal + (device_out.latency if device_out else 0.0)
+                adc = nominal - (device_in.input_latency if device_in else 0.0)
+                time_info = SimulatedTimeInfo(now, dac, adc)
+                status = CallbackFlags(flags)
+                flags = 0
+                if device_in is not None:
+                    device_in.read_signal(self._indata, int(round((adc - clock.epoch) * rate)))
+                self._outdata.fill(0)
+
+                stop_after = False
+                started = time.perf_counter()
+                try:
+                    self._call(self._indata, self._outdata, frames, time_info, status)
+                except CallbackStop:
+                    stop_after = True  # This block is still played
+                except CallbackAbort:
+                    break
+                except Exception as e:
+                    print(f"❌ Exception in simulated stream callback: {e!r}")
+                    break
+                duration = time.perf_counter() - started
+                self.callback_count += 1
+
+                if device_out is not None:
+                    late = clock.now() - nominal > device_out.latency
+                    if late or device_out.forced_underflow(block):
+                        # Missed the DAC: the device plays silence
+                        flags |= OUTPUT_UNDERFLOW
+                        device_out.underflow_count += 1
+                        self._outdata.fill(0)
+                    device_out.record(
+                        int(round((dac - clock.epoch) * rate)), self._outdata, rate,
+                        (now, dac, frames, duration)
+                    )
+                block += 1
+                if stop_after:
+                    break
+        finally:
+            self.active = False
+            clock.detach()
+            if self.finished_callback is not None:
+                try:
+                    self.finished_callback()
+                except Exception as e:
+                    print(f"❌ Exception in simulated finished_callback: {e!r}")
+
+    raw = False  # Raw*Stream: the callback gets buffers instead of arrays
+
+    def _call(self, indata, outdata, frames, time_info, status) -> None:
+        """Invoke the callback with the signature of this kind of stream."""
+        if self.raw:
+            indata, outdata = indata.data, outdata.data
+        if self.kind == 'output':
+            self.callback(outdata, frames, time_info, status)
+        elif self.kind == 'input':
+            self.callback(indata, frames, time_info, status)
+        else:
+            self.callback(indata, outdata, frames, time_info, status)
+
+    def stop(self) -> None:
+        """Stop the stream; returns after finished_callback has run."""
+        self._stop.set()
+        self.simulator.clock.wake()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.active = False
+
+    def abort(self) -> None:
+        """Stop the stream without waiting for pending buffers."""
+        self.stop()
+
+    def close(self, ignore_errors: bool = True) -> None:
+        """Stop and release the stream."""
+        self.stop()
+        self.closed = True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PyAudioStream:
+    """
+    A simulated pyaudio.Stream, in callback or blocking mode.
+
+    Blocking reads and writes go through a ring the underlying simulated
+    stream fills (input) or drains (output) once per block.
+    """
+
+    def __init__(self, simulator: 'DeviceSimulator', rate: int, channels: int, format: int,
+                 input: bool = False, output: bool = False,
+                 input_device_index: Optional[int] = None,
+                 output_device_index: Optional[int] = None,
+                 frames_per_buffer: int = 1024, start: bool = True,
+                 stream_callback=None, **_):
+        if not (input or output):
+            raise ValueError("Must specify an input or output stream.")
+        self._dtype = np.dtype(PYAUDIO_FORMATS[format])
+        self._channels = channels
+        self._callback = stream_callback
+        self._lock = threading.Condition()
+        self._ring = bytearray()
+        self._ring_limit = 8 * frames_per_buffer * channels * self._dtype.itemsize
+        self._overflowed = False
+        self.is_input, self.is_output = input, output
+
+        kind = 'duplex' if input and output else ('input' if input else 'output')
+        self._stream = SimulatedStream(
+            simulator, kind, samplerate=rate, blocksize=frames_per_buffer,
+            device=(input_device_index, output_device_index), channels=channels,
+            dtype=self._dtype.name, callback=self._process,
+        )
+        if start:
+            self.start_stream()
+
+    def _process(self, *args) -> None:
+        """Callback of the underlying stream."""
+        if self._stream.kind == 'duplex':
+            indata, outdata, frames, time_info, status = args
+        elif self._stream.kind == 'input':
+            (indata, frames, time_info, status), outdata = args, None
+        else:
+            (outdata, frames, time_info, status), indata = args, None
+
+        if self._callback is not None:
+            info = {
+                'input_buffer_adc_time': time_info.inputBufferAdcTime,
+                'current_time': time_info.currentTime,
+                'output_buffer_dac_time': time_info.outputBufferDacTime,
+            }
+            in_bytes = indata.tobytes() if indata is not None else None
+            out_bytes, flag = self._callback(in_bytes, frames, info, int(status))
+            if outdata is not None and out_bytes:
+                samples = np.frombuffer(out_bytes, dtype=self._dtype)
+                samples = samples[:outdata.size].reshape(-1, outdata.shape[1])
+                outdata[:len(samples)] = samples
+            if flag == paComplete:
+                raise CallbackStop()
+            if flag == paAbort:
+                raise CallbackAbort()
+            return
+
+        with self._lock:
+            if indata is not None:
+                self._ring += indata.tobytes()
+                if len(self._ring) > self._ring_limit:
+                    del self._ring[:len(self._ring) - self._ring_limit]
+                    self._overflowed = True
+            if outdata is not None:
+                wanted = outdata.nbytes
+                chunk = bytes(self._ring[:wanted])
+                del self._ring[:wanted]
+                samples = np.frombuffer(chunk, dtype=self._dtype).reshape(-1, outdata.shape[1])
+                outdata[:len(samples)] = samples
+            self._lock.notify_all()
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        """Read frames (blocks until the device has captured them)."""
+        wanted = num_frames * self._channels * self._dtype.itemsize
+        with self._lock:
+            if not self._lock.wait_for(lambda: len(self._ring) >= wanted or not self._stream.active,
+                                       timeout=SimulatedClock.SETTLE_TIMEOUT):
+                raise OSError("Simulated stream read timed out")
+            if self._overflowed and exception_on_overflow:
+                self._overflowed = False
+                raise IOError(-9981, 'Input overflowed')
+            self._overflowed = False
+            data = bytes(self._ring[:wanted])
+            del self._ring[:wanted]
+        return data
+
+    def write(self, frames: bytes, num_frames: Optional[int] = None,
+              exception_on_underflow: bool = False) -> None:
+        """Queue frames for output (blocks while the ring is full)."""
+        with self._lock:
+            self._lock.wait_for(lambda: len(self._ring) < self._ring_limit or not self._stream.active,
+                                timeout=SimulatedClock.SETTLE_TIMEOUT)
+            self._ring += frames
+
+    def get_read_available(self) -> int:
+        return len(self._ring) // (self._channels * self._dtype.itemsize)
+
+    def get_write_available(self) -> int:
+        return max(0, self._ring_limit - len(self._ring)) // (self._channels * self._dtype.itemsize)
+
+    def start_stream(self) -> None:
+        self._stream.start()
+
+    def stop_stream(self) -> None:
+        self._stream.stop()
+        with self._lock:
+            self._lock.notify_all()
+
+    def close(self) -> None:
+        self.stop_stream()
+        self._stream.closed = True
+
+    def is_active(self) -> bool:
+        return self._stream.active
+
+    def is_stopped(self) -> bool:
+        return not self._stream.active
+
+    def get_input_latency(self) -> float:
+        latency = self._stream.latency
+        return latency[0] if isinstance(latency, tuple) else latency
+
+    def get_output_latency(self) -> float:
+        latency = self._stream.latency
+        return latency[1] if isinstance(latency, tuple) else latency
+
+    def get_time(self) -> float:
+        return self._stream.time
+
+    def get_cpu_load(self) -> float:
+        return 0.0
+
+
+# pyaudio constants
+paFloat32, paInt32, paInt24, paInt16, paInt8, paUInt8 = 1, 2, 4, 8, 16, 32
+paContinue, paComplete, paAbort = 0, 1, 2
+PYAUDIO_FORMATS = {paFloat32: 'float32', paInt32: 'int32', paInt16: 'int16', paInt8: 'int8', paUInt8: 'uint8'}
+
+
+class DeviceSimulator:
+    """
+    A set of simulated devices behind fake sounddevice and pyaudio modules.
+
+    Devices are enumerated like PortAudio does: an unplugged device keeps
+    its index until the next re-initialization (sd._terminate() and
+    sd._initialize(), as DeviceRegistry.refresh(rescan=True) does), which
+    renumbers the devices that are left.
+    """
+
+    def __init__(self, devices: Optional[List[SimulatedDevice]] = None,
+                 clock: Optional[SimulatedClock] = None,
+                 hostapis: Iterable[str] = ('MME',)):
+        """
+        Args:
+            devices: Simulated devices (default: the kiosk's, see
+                KIOSK_DEVICES)
+            clock: Clock that paces every stream (default: real time)
+            hostapis: Host API names, indexed by SimulatedDevice.hostapi
+        """
+        if devices is None:
+            devices = [SimulatedDevice(name, inputs, outputs) for name, inputs, outputs in KIOSK_DEVICES]
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.hostapi_names = list(hostapis)
+        self._all = list(devices)
+        self._lock = threading.Lock()
+        self._enumerated: List[SimulatedDevice] = []
+        self._enumerate()
+        self.sounddevice = self._sounddevice_module()
+        self.pyaudio = self._pyaudio_module()
+
+    # Devices
+
+    def _enumerate(self) -> None:
+        """Snapshot the connected devices (PortAudio initialization)."""
+        with self._lock:
+            self._enumerated = [d for d in self._all if d.connected]
+
+    def index_of(self, device: Optional[SimulatedDevice]) -> Optional[int]:
+        """Index of a device in the current enumeration."""
+        return None if device is None else self._enumerated.index(device)
+
+    def device(self, key) -> SimulatedDevice:
+        """A device by enumeration index, exact name or first name substring match."""
+        if isinstance(key, int):
+            return self._enumerated[key]
+        for device in self._all:
+            if device.name == key:
+                return device
+        for device in self._all:
+            if key.lower() in device.name.lower():
+                return device
+        raise ValueError(f"No simulated device matches {key!r}")
+
+    def configure(self, key, **settings) -> SimulatedDevice:
+        """Change a device's behaviour (SimulatedDevice arguments)."""
+        device = self.device(key)
+        for name, value in settings.items():
+            if name == 'seed':
+                device.rng = np.random.default_rng(value)
+                continue
+            if not hasattr(device, name):
+                raise AttributeError(f"SimulatedDevice has no setting {name!r}")
+            setattr(device, name, set(value) if name == 'underflows' else value)
+        return device
+
+    def unplug(self, key) -> None:
+        """Disconnect a device: its streams abort at their next block."""
+        self.device(key).connected = False
+
+    def plug(self, key) -> None:
+        """Reconnect a device (enumerated at the next re-initialization)."""
+        self.device(key).connected = True
+
+    def _default_index(self, kind: str) -> int:
+        for index, device in enumerate(self._enumerated):
+            if getattr(device, f'{kind}_channels') > 0:
+                return index
+        return -1
+
+    def _open_device(self, index: Optional[int], kind: str) -> SimulatedDevice:
+        """Device a stream opens (None = default device of that kind)."""
+        if index is None:
+            index = self._default_index(kind)
+        if not 0 <= index < len(self._enumerated):
+            raise PortAudioError(f"Invalid device index {index}")
+        device = self._enumerated[index]
+        if not device.connected:
+            raise PortAudioError(f"Device unavailable: {device.name}")
+        if getattr(device, f'{kind}_channels') <= 0:
+            raise PortAudioError(f"{device.name} has no {kind} channels")
+        return device
+
+    def output(self, key) -> np.ndarray:
+        """
+        Everything a device played, on its DAC timeline.
+
+        Returns:
+            float32 array (frames, channels); frame n was heard at host
+            time clock.epoch + n / samplerate, underflows are silence
+        """
+        device = self.device(key)
+        if device.sink is None:
+            return np.zeros((0, device.output_channels), dtype='float32')
+        return device.sink.render()
+
+    def log(self, key) -> List[BlockLog]:
+        """Timing log of every block a device played."""
+        device = self.device(key)
+        return list(device.sink.log) if device.sink is not None else []
+
+    def backend(self) -> 'SimulatedBackend':
+        """AudioRouter backend on these devices and this clock."""
+        return SimulatedBackend(self)
+
+    # Module surfaces
+
+    def _query_devices(self, device=None, kind=None):
+        infos = [d.info(i) for i, d in enumerate(self._enumerated)]
+        if device is None and kind is not None:
+            device = self._default_index(kind)
+        if device is None:
+            return infos
+        if isinstance(device, str):
+            device = self.index_of(self.device(device))
+        if not 0 <= device < len(infos):
+            raise PortAudioError(f"Error querying device {device}")
+        return infos[device]
+
+    def _query_hostapis(self, index=None):
+        hostapis = []
+        for i, name in enumerate(self.hostapi_names):
+            members = [n for n, d in enumerate(self._enumerated) if d.hostapi == i]
+            hostapis.append({
+                'name': name,
+                'devices': members,
+                'default_input_device': next(
+                    (n for n in members if self._enumerated[n].input_channels), -1),
+                'default_output_device': next(
+                    (n for n in members if self._enumerated[n].output_channels), -1),
+            })
+        return hostapis if index is None else hostapis[index]
+
+    def _sounddevice_module(self) -> types.ModuleType:
+        """The fake `sounddevice` module."""
+        simulator = self
+        module = types.ModuleType('sounddevice', "Simulated sounddevice (modules.device_simulator)")
+
+        def stream_class(kind: str, name: str, raw: bool = False):
+            def __init__(self, *args, **kwargs):
+                SimulatedStream.__init__(self, simulator, kind, *args, **kwargs)
+            return type(name, (SimulatedStream,), {'__init__': __init__, 'raw': raw})
+
+        module.OutputStream = stream_class('output', 'OutputStream')
+        module.InputStream = stream_class('input', 'InputStream')
+        module.Stream = stream_class('duplex', 'Stream')
+        module.RawOutputStream = stream_class('output', 'RawOutputStream', raw=True)
+        module.RawInputStream = stream_class('input', 'RawInputStream', raw=True)
+        module.RawStream = stream_class('duplex', 'RawStream', raw=True)
+        module.CallbackStop = CallbackStop
+        module.CallbackAbort = CallbackAbort
+        module.PortAudioError = PortAudioError
+        module.CallbackFlags = CallbackFlags
+        module.query_devices = self._query_devices
+        module.query_hostapis = self._query_hostapis
+        module.default = types.SimpleNamespace(device=[None, None], samplerate=None,
+                                               blocksize=0, latency='low')
+        module.sleep = lambda msec: self.clock.sleep(msec / 1000.0)
+        module.stop = lambda ignore_errors=True: None
+        module.check_output_settings = lambda device=None, **_: self._open_device(device, 'output')
+        module.check_input_settings = lambda device=None, **_: self._open_device(device, 'input')
+        module._initialize = self._enumerate
+        module._terminate = lambda: None
+        return module
+
+    def _pyaudio_module(self) -> types.ModuleType:
+        """The fake `pyaudio` module."""
+        simulator = self
+        module = types.ModuleType('pyaudio', "Simulated pyaudio (modules.device_simulator)")
+
+        class PyAudio:
+            """Simulated pyaudio.PyAudio."""
+
+            def get_device_count(self) -> int:
+                return len(simulator._enumerated)
+
+            def get_device_info_by_index(self, index: int) -> Dict:
+                info = simulator._query_devices(index)
+                return {
+                    'index': index, 'structVersion': 2, 'name': info['name'],
+                    'hostApi': info['hostapi'],
+                    'maxInputChannels': info['max_input_channels'],
+                    'maxOutputChannels': info['max_output_channels'],
+                    'defaultLowInputLatency': info['default_low_input_latency'],
+                    'defaultLowOutputLatency': info['default_low_output_latency'],
+                    'defaultHighInputLatency': info['default_high_input_latency'],
+                    'defaultHighOutputLatency': info['default_high_output_latency'],
+                    'defaultSampleRate': info['default_samplerate'],
+                }
+
+            def get_host_api_count(self) -> int:
+                return len(simulator.hostapi_names)
+
+            def get_host_api_info_by_index(self, index: int) -> Dict:
+                info = simulator._query_hostapis(index)
+                return {
+                    'index': index, 'structVersion': 1, 'type': index, 'name': info['name'],
+                    'deviceCount': len(info['devices']),
+                    'defaultInputDevice': info['default_input_device'],
+                    'defaultOutputDevice': info['default_output_device'],
+                }
+
+            def get_default_host_api_info(self) -> Dict:
+                return self.get_host_api_info_by_index(0)
+
+            def get_default_input_device_info(self) -> Dict:
+                index = simulator._default_index('input')
+                if index < 0:
+                    raise IOError("No Default Input Device Available")
+                return self.get_device_info_by_index(index)
+
+            def get_default_output_device_info(self) -> Dict:
+                index = simulator._default_index('output')
+                if index < 0:
+                    raise IOError("No Default Output Device Available")
+                return self.get_device_info_by_index(index)
+
+            def get_sample_size(self, format: int) -> int:
+                return np.dtype(PYAUDIO_FORMATS[format]).itemsize
+
+            def get_format_from_width(self, width: int, unsigned: bool = True) -> int:
+                return {1: paUInt8 if unsigned else paInt8, 2: paInt16, 4: paFloat32}[width]
+
+            def open(self, *args, **kwargs) -> PyAudioStream:
+                return PyAudioStream(simulator, *args, **kwargs)
+
+            def terminate(self) -> None:
+                pass
+
+        module.PyAudio = PyAudio
+        module.Stream = PyAudioStream
+        module.get_sample_size = lambda format: np.dtype(PYAUDIO_FORMATS[format]).itemsize
+        for name, value in dict(
+            paFloat32=paFloat32, paInt32=paInt32, paInt24=paInt24, paInt16=paInt16,
+            paInt8=paInt8, paUInt8=paUInt8, paContinue=paContinue, paComplete=paComplete,
+            paAbort=paAbort, paInputUnderflow=INPUT_UNDERFLOW, paInputOverflow=INPUT_OVERFLOW,
+            paOutputUnderflow=OUTPUT_UNDERFLOW, paOutputOverflow=OUTPUT_OVERFLOW,
+        ).items():
+            setattr(module, name, value)
+        return module
+
+    @contextlib.contextmanager
+    def install(self):
+        """
+        Make `import sounddevice` / `import pyaudio` return the fakes.
+
+        Application modules (the `modules` package) that already
+        imported the real ones are re-pointed too, and the process-wide
+        device registry starts over on the simulated devices. Everything
+        is restored on exit.
+        """
+        fakes = {'sounddevice': self.sounddevice, 'pyaudio': self.pyaudio}
+        saved = {name: sys.modules.get(name) for name in fakes}
+        swaps = [(saved[name], fake) for name, fake in fakes.items() if saved[name] is not None]
+        _repoint_imports(swaps)
+        sys.modules.update(fakes)
+
+        from modules import device_registry
+        saved_registry = device_registry._registry
+        device_registry._registry = None
+        try:
+            yield self
+        finally:
+            device_registry._registry = saved_registry
+            # Also reverts modules first imported while installed, where
+            # the real module exists
+            _repoint_imports([(fake, real) for real, fake in swaps])
+            for name, module in saved.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+
+
+def _repoint_imports(swaps: List[Tuple[types.ModuleType, types.ModuleType]]) -> None:
+    """
+    Rebind module globals bound to `old` to `new`, for each (old, new).
+
+    Only the application's own modules (the `modules` package) are
+    touched; third-party code that imported sounddevice keeps it.
+    """
+    if not swaps:
+        return
+    for name, module in list(sys.modules.items()):
+        if name != 'modules' and not name.startswith('modules.'):
+            continue
+        namespace = getattr(module, '__dict__', None)
+        if namespace is None:
+            continue
+        for attr, value in list(namespace.items()):
+            for old, new in swaps:
+                if value is old:
+                    setattr(module, attr, new)
+
+
+class SimulatedBackend:
+    """AudioRouter backend (see modules.audio_backends) on a DeviceSimulator."""
+
+    name = 'simulated'
+    persist_state = False  # Never tune or log the real kiosk's devices
+    CallbackStop = CallbackStop
+    CallbackAbort = CallbackAbort
+
+    def __init__(self, simulator: DeviceSimulator):
+        self.simulator = simulator
+        self.sd = simulator.sounddevice
+
+    def now(self) -> float:
+        return self.simulator.clock.now()
+
+    def query_devices(self) -> List[Dict]:
+        return self.sd.query_devices()
+
+    def query_hostapis(self) -> List[Dict]:
+        return self.sd.query_hostapis()
+
+    def reinitialize(self) -> None:
+        self.sd._terminate()
+        self.sd._initialize()
+
+    def output_stream(self, **options) -> SimulatedStream:
+        return self.sd.OutputStream(**options)
+
+    def duplex_stream(self, **options) -> SimulatedStream:
+        return self.sd.Stream(**options)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        return self.simulator.clock.wait(event, timeout)
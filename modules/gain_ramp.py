@@ -0,0 +1,131 @@
+"""
+Click-free gain automation for the AudioRouter stream callbacks.
+
+Cutting or starting a waveform mid-cycle is heard as a click. Each
+output stream owns a GainRamp that the callback applies to every block:
+gain changes (fades, master volume) are linear ramps computed with
+numpy into preallocated buffers, never steps. The UI thread only posts
+targets; a target is an immutable tuple replaced with a single
+assignment, so no lock is shared with the audio thread.
+"""
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# (target gain, ramp length in frames)
+GainTarget = Tuple[float, int]
+
+
+class GainRamp:
+    """
+    Per-stream gain with linear ramps, applied in place by the callback.
+
+    ramp_to() is called from the UI thread; apply() and restart() from
+    the stream callback only. `faded` is set by the callback when a ramp
+    reaches silence, so stop() can wait for a fade-out without polling.
+    """
+
+    def __init__(self, samplerate: int, blocksize: int, gain: float = 1.0):
+        """
+        Initialize a ramp at a constant gain.
+
+        Args:
+            samplerate: Stream sample rate (ramp lengths are in frames)
+            blocksize: Expected frames per callback (buffers grow once if
+                a larger block arrives)
+            gain: Initial gain
+        """
+        self.samplerate = samplerate
+        self.gain = gain  # Current gain, written by the callback only
+        self._target: Optional[GainTarget] = None
+        self._applied: Optional[GainTarget] = None
+        self._step = 0.0
+        self._remaining = 0
+        self._end_gain = gain
+        self._steps = np.arange(1, blocksize + 1, dtype='float32')
+        self._ramp = np.zeros(blocksize, dtype='float32')
+        self.faded = threading.Event()
+        if gain == 0.0:
+            self.faded.set()
+
+    def ramp_to(self, gain: float, seconds: float) -> None:
+        """
+        Ramp to a new gain, starting at the stream's next block (UI thread).
+
+        Args:
+            gain: Target gain (0.0 = silence)
+            seconds: Ramp length (0 = jump at the next block)
+        """
+        self.faded.clear()  # Before posting, so a finished ramp can't be missed
+        self._target = (float(gain), max(0, int(round(seconds * self.samplerate))))
+
+    def restart(self, gain: float, frames: int) -> None:
+        """
+        Fade in from silence to `gain` over `frames` (callback only).
+
+        Called when a cue starts the song at a new frame (play, seek,
+        resume); the previous gain belonged to other audio.
+        """
+        self.gain = 0.0
+        self.faded.clear()
+        self._start(gain, frames)
+
+    def _start(self, gain: float, frames: int) -> None:
+        """Begin a ramp from the current gain (callback only)."""
+        if frames <= 0:
+            self.gain = gain
+            self._remaining = 0
+        else:
+            self._step = (gain - self.gain) / frames
+            self._remaining = frames
+        self._end_gain = gain
+
+    def apply(self, block: np.ndarray) -> None:
+        """
+        Multiply a block by the current gain ramp, in place (callback only).
+
+        Args:
+            block: Rendered frames, shape (frames, channels)
+        """
+        target = self._target
+        if target is not self._applied:
+            self._applied = target
+            self._start(*target)
+
+        frames = len(block)
+        if self._remaining:
+            if frames > len(self._steps):
+                # Unusual block size; grow once
+                self._steps = np.arange(1, frames + 1, dtype='float32')
+                self._ramp = np.zeros(frames, dtype='float32')
+            count = min(self._remaining, frames)
+            ramp = self._ramp[:count]
+            np.multiply(self._steps[:count], self._step, out=ramp)
+            np.add(ramp, self.gain, out=ramp)
+            # One channel at a time: broadcasting the ramp over the
+            # channels would make numpy buffer a block-sized temporary
+            head = block[:count]
+            for channel in range(head.shape[1]):
+                column = head[:, channel]
+                np.multiply(column, ramp, out=column)
+            self._remaining -= count
+            if self._remaining:
+                self.gain += self._step * count
+            else:
+                self.gain = self._end_gain
+            if count < frames:
+                self._scale(block[count:])
+        else:
+            self._scale(block)
+
+        if self.gain == 0.0 and not self._remaining and not self.faded.is_set():
+            self.faded.set()
+
+    def _scale(self, block: np.ndarray) -> None:
+        """Apply the constant current gain."""
+        if self.gain == 0.0:
+            block.fill(0)
+        elif self.gain != 1.0:
+            np.multiply(block, self.gain, out=block)
@@ -0,0 +1,322 @@
+"""
+Output latency calibration for IBP-KaraokeLive.
+
+In performance mode the vocal plays on the USB headset and the
+instrumental on the Realtek speakers, each with its own latency. This
+module measures every output device and stores a per-device profile on
+disk that AudioRouter uses to start both streams sample-aligned:
+
+- Reported latency: what PortAudio says the stream's output latency is.
+- Loopback offset (optional): a click is played on the device and
+  captured through the microphone (AudioAnalyzer). The difference
+  between the click's expected DAC time and its arrival at the mic is
+  the latency PortAudio does not report. It also contains the mic's
+  input latency, which is the same for every device, so only the
+  difference between devices is used for alignment.
+
+The profile also remembers which stream profile (AUDIO_STREAM_PROFILES)
+each device runs with, as chosen by the xrun tuner.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.app_config import (
+    AUDIO_STREAM_PROFILE,
+    AUDIO_STREAM_PROFILE_ORDER,
+    AUDIO_STREAM_PROFILES,
+    LATENCY_PROFILE_FILE,
+)
+from modules.audio_backends import sounddevice
+
+
+class LatencyProfile:
+    """
+    Per-device latency measurements persisted as JSON.
+
+    Devices are keyed by name, since Windows re-numbers device indices
+    whenever USB audio is re-enumerated.
+    """
+
+    def __init__(self, path: Optional[str] = LATENCY_PROFILE_FILE,
+                 devices: Optional[Dict[str, Dict]] = None):
+        """
+        Initialize profile.
+
+        Args:
+            path: JSON file the profile is saved to (None keeps it in
+                memory only)
+            devices: Measurements keyed by device name
+        """
+        self.path = path
+        self.devices: Dict[str, Dict] = devices or {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = LATENCY_PROFILE_FILE) -> 'LatencyProfile':
+        """
+        Load a profile from disk.
+
+        Returns:
+            The stored profile, or an empty one if the file is missing
+            or unreadable
+        """
+        if not path or not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(path, data.get('devices', {}))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read latency profile {path}: {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        """Write the profile to disk (no-op for an in-memory profile)."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'devices': self.devices}, f, indent=4)
+
+    def set_device(self, device_name: str, reported_latency: float,
+                   loopback_offset: Optional[float] = None) -> None:
+        """
+        Store the measurements for one device.
+
+        Args:
+            device_name: Device name as reported by sd.query_devices
+            reported_latency: PortAudio output latency in seconds
+            loopback_offset: Measured latency beyond what PortAudio
+                reports, in seconds (None if not measured)
+        """
+        self.devices.setdefault(device_name, {}).update({
+            'reported_latency': reported_latency,
+            'loopback_offset': loopback_offset,
+            'calibrated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        })
+
+    def get_stream_profile(self, device_name: str) -> str:
+        """
+        Stream profile a device should open with.
+
+        Returns:
+            Name of an AUDIO_STREAM_PROFILES entry (AUDIO_STREAM_PROFILE
+            if the device has no valid stored profile)
+        """
+        entry = self.devices.get(device_name) or {}
+        name = entry.get('stream_profile')
+        return name if name in AUDIO_STREAM_PROFILES else AUDIO_STREAM_PROFILE
+
+    def set_stream_profile(self, device_name: str, profile_name: str) -> None:
+        """
+        Remember the stream profile for a device.
+
+        Args:
+            device_name: Device name as reported by sd.query_devices
+            profile_name: Name of an AUDIO_STREAM_PROFILES entry
+        """
+        self.devices.setdefault(device_name, {})['stream_profile'] = profile_name
+
+    def get_stream_floor(self, device_name: str) -> str:
+        """
+        Lowest-latency stream profile a device has not failed.
+
+        Returns:
+            Name of an AUDIO_STREAM_PROFILE_ORDER entry (the first one if
+            the device never escalated)
+        """
+        entry = self.devices.get(device_name) or {}
+        name = entry.get('stream_floor')
+        return name if name in AUDIO_STREAM_PROFILE_ORDER else AUDIO_STREAM_PROFILE_ORDER[0]
+
+    def set_stream_floor(self, device_name: str, profile_name: str) -> None:
+        """
+        Remember that a device cannot sustain profiles below `profile_name`.
+
+        Args:
+            device_name: Device name as reported by sd.query_devices
+            profile_name: Name of an AUDIO_STREAM_PROFILES entry
+        """
+        self.devices.setdefault(device_name, {})['stream_floor'] = profile_name
+
+    def get_offset(self, device_name: str) -> float:
+        """
+        Latency of a device beyond what PortAudio reports.
+
+        Returns:
+            Loopback offset in seconds (0.0 if never measured)
+        """
+        entry = self.devices.get(device_name) or {}
+        return entry.get('loopback_offset') or 0.0
+
+    def get_relative_offsets(self, device_names: Dict[str, str]) -> Dict[str, float]:
+        """
+        Offsets of several streams relative to the fastest one.
+
+        Subtracting the minimum cancels the microphone's own input
+        latency, which is included in every loopback measurement.
+
+        Args:
+            device_names: Device name per stream key
+
+        Returns:
+            Seconds each stream must start early to line up (>= 0)
+        """
+        offsets = {key: self.get_offset(name) for key, name in device_names.items()}
+        if not offsets:
+            return {}
+        fastest = min(offsets.values())
+        return {key: offset - fastest for key, offset in offsets.items()}
+
+
+def measure_reported_latency(device: int, samplerate: int,
+                             blocksize: int = 2048, latency='high') -> float:
+    """
+    Open a silent stream on a device and read its reported latency.
+
+    Args:
+        device: Output device ID
+        samplerate: Stream sample rate
+        blocksize: Frames per callback (as used for playback)
+        latency: PortAudio latency setting (as used for playback)
+
+    Returns:
+        Output latency in seconds
+    """
+    def _silence(outdata, frames, time_info, status):
+        outdata.fill(0)
+
+    with sounddevice().OutputStream(device=device, samplerate=samplerate, channels=1,
+                                    blocksize=blocksize, latency=latency, dtype='float32',
+                                    callback=_silence) as stream:
+        return float(stream.latency)
+
+
+def _detect_onset(samples: np.ndarray, threshold_ratio: float = 0.5) -> Optional[int]:
+    """Index of the first sample above half the peak, if it stands out from noise."""
+    magnitude = np.abs(samples)
+    peak = magnitude.max() if len(magnitude) else 0.0
+    noise = np.median(magnitude) if len(magnitude) else 0.0
+    if peak <= 0 or peak < 8 * noise:
+        return None
+    return int(np.argmax(magnitude >= peak * threshold_ratio))
+
+
+def measure_loopback_offset(device: int, samplerate: int, analyzer,
+                            clicks: int = 3, blocksize: int = 2048,
+                            latency='high') -> Optional[float]:
+    """
+    Play clicks on a device and time their arrival at the microphone.
+
+    Args:
+        device: Output device ID
+        samplerate: Stream sample rate
+        analyzer: AudioAnalyzer used to capture the microphone
+        clicks: Number of clicks (the median is returned)
+        blocksize: Frames per callback (as used for playback)
+        latency: PortAudio latency setting (as used for playback)
+
+    Returns:
+        Median arrival time minus expected DAC time in seconds, or None
+        if no click was detected
+    """
+    click = np.zeros(int(samplerate * 0.002), dtype='float32')
+    click[:len(click) // 2] = 0.8
+    results: List[float] = []
+
+    for _ in range(clicks):
+        expected: List[float] = []
+        state = {'sent': False, 'blocks': 0, 'latency': 0.0}
+
+        def _callback(outdata, frames, time_info, status):
+            outdata.fill(0)
+            state['blocks'] += 1
+            # Wait a few blocks so the stream is running steadily
+            if not state['sent'] and state['blocks'] == 4:
+                dac = getattr(time_info, 'outputBufferDacTime', 0.0)
+                now = getattr(time_info, 'currentTime', 0.0)
+                delay = dac - now if dac > 0 and now > 0 else state['latency']
+                outdata[:len(click), 0] = click
+                expected.append(time.perf_counter() + delay)
+                state['sent'] = True
+
+        captured = {}
+
+        def _record():
+            captured['samples'], captured['start'] = analyzer.capture(0.8)
+
+        recorder = threading.Thread(target=_record, daemon=True)
+        recorder.start()
+        time.sleep(0.1)  # Let the microphone settle
+        stream = sounddevice().OutputStream(device=device, samplerate=samplerate, channels=1,
+                                            blocksize=blocksize, latency=latency, dtype='float32',
+                                            callback=_callback)
+        # Same fallback as the playback clock when DAC times are not reported
+        state['latency'] = stream.latency
+        with stream:
+            time.sleep(0.5)
+        recorder.join()
+
+        if not expected or 'samples' not in captured:
+            continue
+        onset = _detect_onset(captured['samples'])
+        if onset is None:
+            continue
+        arrival = captured['start'] + onset / analyzer.RATE
+        results.append(arrival - expected[0])
+
+    if not results:
+        return None
+    return float(np.median(results))
+
+
+def calibrate_devices(devices: Dict[str, int], samplerate: Optional[int] = None,
+                      analyzer=None, profile: Optional[LatencyProfile] = None) -> LatencyProfile:
+    """
+    Measure every device and save the profile.
+
+    Each device is measured with the stream profile and at the rate it
+    plays with, since the reported latency depends on the blocksize and
+    the buffer geometry on the rate.
+
+    Args:
+        devices: Output device ID per stream key
+        samplerate: Playback sample rate (None = each device's native
+            rate, as the router opens its streams)
+        analyzer: Optional AudioAnalyzer for the loopback click test
+        profile: Profile to update (loaded from disk if None)
+
+    Returns:
+        The updated, saved profile
+    """
+    profile = profile or LatencyProfile.load()
+    for key, device in devices.items():
+        info = sounddevice().query_devices(device)
+        name = info['name']
+        rate = samplerate or int(info['default_samplerate'])
+        settings = AUDIO_STREAM_PROFILES[profile.get_stream_profile(name)]
+        reported = measure_reported_latency(
+            device, rate, settings['blocksize'], settings['latency']
+        )
+        offset = None
+        if analyzer is not None:
+            offset = measure_loopback_offset(
+                device, rate, analyzer,
+                blocksize=settings['blocksize'], latency=settings['latency']
+            )
+        profile.set_device(name, reported, offset)
+
+        measured = f"{offset * 1000:.2f} ms" if offset is not None else "not measured"
+        print(f"🎚️ {key} ({name}, {rate} Hz): reported {reported * 1000:.2f} ms, "
+              f"loopback {measured}")
+
+    profile.save()
+    print(f"💾 Latency profile saved: {profile.path}")
+    return profile
@@ -0,0 +1,411 @@
+"""
+Offline AudioRouter backend: no PortAudio, no threads, no devices.
+
+OfflineBackend runs the router's callback pipeline against in-memory
+sinks on a virtual clock, as fast as the CPU allows, so routing,
+lead-in padding, fades and inter-device sync can be verified on a
+headless box in milliseconds:
+
+    backend = OfflineBackend()
+    router = AudioRouter(backend=backend)
+    router.load_audio(vocal, instrumental)
+    router.set_performance_mode()
+    router.play()
+    backend.run()                       # Until every stream has finished
+    heard = backend.output(router._device_for('speaker'))
+
+Offline, nothing happens between calls: blocks are rendered only by
+run() and by wait(), which the router uses while it waits for a
+fade-out. Each device records what it would have played on a timeline
+of DAC time (frame 0 = virtual time 0), so buffers of different devices
+line up sample by sample.
+
+This module never imports sounddevice, so it (and AudioRouter on it)
+works where libportaudio is not installed. It also holds the stand-ins
+for the sounddevice callback types (CallbackFlags, CallbackStop,
+CallbackAbort, PortAudioError) used by the offline and simulated
+devices.
+"""
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.app_config import AUDIO_DEVICES
+
+
+# (virtual time of the callback, DAC time of its first frame, frames,
+#  seconds of real CPU time spent in the callback)
+BlockLog = Tuple[float, float, int, float]
+
+# PortAudio status flags
+INPUT_UNDERFLOW = 0x1
+INPUT_OVERFLOW = 0x2
+OUTPUT_UNDERFLOW = 0x4
+OUTPUT_OVERFLOW = 0x8
+
+
+class CallbackStop(Exception):
+    """Raise in a stream callback to stop the stream."""
+
+
+class CallbackAbort(Exception):
+    """Raise in a stream callback to abort the stream."""
+
+
+class PortAudioError(Exception):
+    """Error reported by (simulated) PortAudio."""
+
+
+class CallbackFlags:
+    """Status flags passed to stream callbacks (sd.CallbackFlags surface)."""
+
+    def __init__(self, flags: int = 0):
+        self._flags = flags
+
+    def __bool__(self) -> bool:
+        return bool(self._flags)
+
+    def __int__(self) -> int:
+        return self._flags
+
+    @property
+    def input_underflow(self) -> bool:
+        return bool(self._flags & INPUT_UNDERFLOW)
+
+    @property
+    def input_overflow(self) -> bool:
+        return bool(self._flags & INPUT_OVERFLOW)
+
+    @property
+    def output_underflow(self) -> bool:
+        return bool(self._flags & OUTPUT_UNDERFLOW)
+
+    @property
+    def output_overflow(self) -> bool:
+        return bool(self._flags & OUTPUT_OVERFLOW)
+
+    def __repr__(self) -> str:
+        names = [name for name in ('input_underflow', 'input_overflow',
+                                   'output_underflow', 'output_overflow') if getattr(self, name)]
+        return f"<CallbackFlags: {', '.join(names) or 'none'}>"
+
+
+class OfflineTimeInfo:
+    """time_info passed to offline callbacks (virtual host times)."""
+
+    __slots__ = ('currentTime', 'outputBufferDacTime', 'inputBufferAdcTime')
+
+    def __init__(self, current: float, dac: float, adc: float):
+        self.currentTime = current
+        self.outputBufferDacTime = dac
+        self.inputBufferAdcTime = adc
+
+
+class DeviceSink:
+    """What one virtual device played: blocks placed on its DAC timeline."""
+
+    def __init__(self, samplerate: int, channels: int):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocks: List[Tuple[int, np.ndarray]] = []  # (DAC frame, samples)
+        self.log: List[BlockLog] = []
+
+    def write(self, frame: int, block: np.ndarray) -> None:
+        """Record a block heard from DAC frame `frame` on."""
+        self.blocks.append((frame, block.copy()))
+
+    def render(self) -> np.ndarray:
+        """
+        Assemble the timeline.
+
+        Returns:
+            float32 array (frames, channels) from virtual time 0 to the
+            end of the last block; silence where nothing was playing
+        """
+        end = max((frame + len(block) for frame, block in self.blocks), default=0)
+        out = np.zeros((end, self.channels), dtype='float32')
+        for frame, block in self.blocks:
+            out[frame:frame + len(block), :block.shape[1]] = block
+        return out
+
+
+class OfflineStream:
+    """
+    A stream of the offline backend (sd.OutputStream / sd.Stream surface).
+
+    Callbacks run on the thread that calls OfflineBackend.run() or
+    wait(); a block is due every blocksize frames of virtual time once
+    the stream is started.
+    """
+
+    def __init__(self, backend: 'OfflineBackend', device, channels, callback,
+                 samplerate: Optional[float] = None, blocksize: int = 0,
+                 latency=None, dtype: str = 'float32',
+                 finished_callback: Optional[Callable[[], None]] = None,
+                 duplex: bool = False, **_):
+        self.backend = backend
+        self.duplex = duplex
+        if duplex:
+            self.input_device, self.device = device
+            self.input_channels, self.channels = channels
+            self.latency = (backend.latency, backend.latency)
+        else:
+            self.device, self.input_device = device, None
+            self.channels, self.input_channels = channels, 0
+            self.latency = backend.latency
+        self.samplerate = samplerate or backend.device_info(self.device)['default_samplerate']
+        self.blocksize = blocksize or backend.blocksize
+        self.dtype = dtype
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.active = False
+        self.closed = False
+
+        self._rate = int(self.samplerate)
+        self._latency_frames = int(round(backend.latency * self._rate))
+        self._start_frame = 0  # Virtual time of the first block, in frames
+        self._frames_done = 0
+        self._outdata = np.zeros((self.blocksize, self.channels), dtype='float32')
+        self._indata = np.zeros((self.blocksize, self.input_channels), dtype='float32')
+        self._sink = backend._sink(self.device, self._rate, self.channels)
+
+    @property
+    def next_time(self) -> float:
+        """Virtual time the next callback is due."""
+        return (self._start_frame + self._frames_done) / self._rate
+
+    def start(self) -> None:
+        """Start calling back from the current virtual time."""
+        if self.closed:
+            raise RuntimeError("Stream is closed")
+        if self.active:
+            return
+        self._start_frame = int(np.ceil(self.backend.time * self._rate))
+        self._frames_done = 0
+        self.active = True
+
+    def stop(self) -> None:
+        """Stop after the current block; runs finished_callback."""
+        self._finish()
+
+    def abort(self) -> None:
+        """Stop immediately; runs finished_callback."""
+        self._finish()
+
+    def close(self) -> None:
+        """Stop and release the stream."""
+        self._finish()
+        self.closed = True
+
+    def _finish(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        if self.finished_callback is not None:
+            self.finished_callback()
+
+    def process(self) -> None:
+        """Run the callback for one block and record what it produced."""
+        backend = self.backend
+        frames = self.blocksize
+        block_frame = self._start_frame + self._frames_done
+        now = block_frame / self._rate
+        dac_frame = block_frame + self._latency_frames
+        time_info = OfflineTimeInfo(now, dac_frame / self._rate, now - backend.latency)
+        outdata = self._outdata
+        outdata.fill(0)
+
+        started = time.perf_counter()
+        try:
+            if self.duplex:
+                backend._read_input(self._indata, block_frame, self._rate)
+                self.callback(self._indata, outdata, frames, time_info, CallbackFlags(0))
+            else:
+                self.callback(outdata, frames, time_info, CallbackFlags(0))
+        except (CallbackStop, CallbackAbort):
+            self._finish()
+            return
+        finally:
+            self._sink.log.append(
+                (now, dac_frame / self._rate, frames, time.perf_counter() - started)
+            )
+        self._sink.write(dac_frame, outdata)
+        self._frames_done += frames
+
+
+class OfflineBackend:
+    """
+    Renders router streams into per-device numpy buffers on a virtual clock.
+
+    Virtual devices are described like AUDIO_DEVICES, so the router's
+    registry resolves them exactly as it would the real ones.
+    """
+
+    name = 'offline'
+    persist_state = False
+    CallbackStop = CallbackStop
+    CallbackAbort = CallbackAbort
+
+    def __init__(self, specs: Optional[Dict[str, Dict]] = None,
+                 samplerate: int = 48000, latency: float = 0.010,
+                 blocksize: int = 512, input_signal: Optional[np.ndarray] = None):
+        """
+        Initialize a backend with one virtual device per spec.
+
+        Args:
+            specs: Device description per key, as AUDIO_DEVICES (an
+                output device per output key, an input device per 'input'
+                key, named after the spec's name substring)
+            samplerate: Native rate of every virtual device
+            latency: Output (and input) latency every stream reports
+            blocksize: Frames per callback for streams opened with 0
+            input_signal: Mono samples the microphone hears from virtual
+                time 0 (None = silence)
+        """
+        specs = specs if specs is not None else AUDIO_DEVICES
+        self.samplerate = samplerate
+        self.latency = latency
+        self.blocksize = blocksize
+        self.input_signal = input_signal
+        self.time = 0.0  # Virtual host time, advanced by run() and wait()
+        self.streams: List[OfflineStream] = []
+        self.sinks: Dict[int, DeviceSink] = {}
+
+        hostapi_names = list(dict.fromkeys(spec.get('hostapi') or 'Offline' for spec in specs.values()))
+        self.hostapis = [
+            {'name': name, 'devices': [], 'default_input_device': -1, 'default_output_device': -1}
+            for name in hostapi_names
+        ]
+        self.devices: List[Dict] = []
+        for key, spec in specs.items():
+            kind = spec.get('kind', 'output')
+            channels = spec.get('channels', 1)
+            hostapi = hostapi_names.index(spec.get('hostapi') or 'Offline')
+            index = len(self.devices)
+            self.devices.append({
+                'name': f"{spec.get('name') or key} ({key}, offline)",
+                'index': index,
+                'hostapi': hostapi,
+                'max_input_channels': channels if kind == 'input' else 0,
+                'max_output_channels': channels if kind != 'input' else 0,
+                'default_samplerate': float(samplerate),
+                'default_low_output_latency': latency,
+                'default_high_output_latency': latency,
+                'default_low_input_latency': latency,
+                'default_high_input_latency': latency,
+            })
+            entry = self.hostapis[hostapi]
+            entry['devices'].append(index)
+            default = 'default_input_device' if kind == 'input' else 'default_output_device'
+            if entry[default] < 0:
+                entry[default] = index
+
+    # Device enumeration (DeviceRegistry backend surface)
+
+    def query_devices(self) -> List[Dict]:
+        """Virtual device list."""
+        return self.devices
+
+    def query_hostapis(self) -> List[Dict]:
+        """Virtual host API list."""
+        return self.hostapis
+
+    def reinitialize(self) -> None:
+        """Nothing to re-initialize offline."""
+
+    def device_info(self, index: int) -> Dict:
+        """One virtual device."""
+        return self.devices[index]
+
+    # Streams
+
+    def output_stream(self, **options) -> OfflineStream:
+        """Create an offline output stream (sd.OutputStream arguments)."""
+        stream = OfflineStream(self, **options)
+        self.streams.append(stream)
+        return stream
+
+    def duplex_stream(self, **options) -> OfflineStream:
+        """Create an offline full-duplex stream (sd.Stream arguments)."""
+        stream = OfflineStream(self, duplex=True, **options)
+        self.streams.append(stream)
+        return stream
+
+    def _sink(self, device: int, samplerate: int, channels: int) -> DeviceSink:
+        """Sink of a device; reopening it at another rate starts a new recording."""
+        sink = self.sinks.get(device)
+        if sink is None or sink.samplerate != samplerate:
+            sink = DeviceSink(samplerate, channels)
+            self.sinks[device] = sink
+        elif channels > sink.channels:
+            sink.channels = channels
+        return sink
+
+    def _read_input(self, indata: np.ndarray, frame: int, samplerate: int) -> None:
+        """Fill a duplex input block with the microphone signal at `frame`."""
+        indata.fill(0)
+        signal = self.input_signal
+        if signal is None or frame >= len(signal):
+            return
+        chunk = signal[frame:frame + len(indata)]
+        indata[:len(chunk)] = chunk.reshape(len(chunk), -1)[:, :1]
+
+    # Virtual clock
+
+    def now(self) -> float:
+        """Virtual host time."""
+        return self.time
+
+    def run(self, seconds: Optional[float] = None,
+            until: Optional[Callable[[], bool]] = None) -> float:
+        """
+        Render blocks in due order, as fast as the CPU allows.
+
+        Args:
+            seconds: Virtual time to advance (None = until no stream is
+                active, so warm persistent streams need a limit)
+            until: Stop as soon as this returns True (checked between
+                blocks)
+
+        Returns:
+            Virtual time reached
+        """
+        end = None if seconds is None else self.time + seconds
+        while until is None or not until():
+            active = [stream for stream in self.streams if stream.active]
+            stream = min(active, key=lambda s: s.next_time) if active else None
+            if stream is None or (end is not None and stream.next_time >= end):
+                # Idle until the limit
+                if end is not None:
+                    self.time = max(self.time, end)
+                break
+            self.time = max(self.time, stream.next_time)
+            stream.process()
+        return self.time
+
+    def wait(self, event, timeout: float) -> bool:
+        """Render until the callbacks set `event`, for at most `timeout` virtual seconds."""
+        self.run(timeout, until=event.is_set)
+        return event.is_set()
+
+    # Results
+
+    def output(self, device: int) -> np.ndarray:
+        """
+        Everything a device played, on its DAC timeline.
+
+        Returns:
+            float32 array (frames, channels); frame n was heard at
+            virtual time n / samplerate. Empty if the device never played.
+        """
+        sink = self.sinks.get(device)
+        if sink is None:
+            channels = self.devices[device]['max_output_channels']
+            return np.zeros((0, channels), dtype='float32')
+        return sink.render()
+
+    def log(self, device: int) -> List[BlockLog]:
+        """Timing log of every callback that rendered for a device."""
+        sink = self.sinks.get(device)
+        return list(sink.log) if sink is not None else []
@@ -0,0 +1,197 @@
+"""
+Memory-mapped raw PCM song assets for IBP-KaraokeLive.
+
+Decoding a WAV through libsndfile copies the whole track onto the heap
+and takes hundreds of milliseconds per screen transition. A packed asset
+(`<song>.pcm`, written offline by tools/pack_audio.py) stores the same
+samples as raw little-endian float32 or int16 behind a small JSON
+header, so loading it is an np.memmap: no decode, no copy, and every
+router in the process (and the OS page cache across restarts) shares
+the same physical pages.
+
+File layout:
+    8 bytes   MAGIC
+    4 bytes   little-endian uint32 offset of the sample data
+    JSON      header (samplerate, channels, frames, dtype, source),
+              space-padded up to the data offset
+    data      interleaved frames, starting on a DATA_ALIGNMENT boundary
+"""
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules.resampler import resample
+
+
+PCM_SUFFIX = '.pcm'
+MAGIC = b'IBPPCM\x00\x01'
+DATA_ALIGNMENT = 4096  # Sample data starts on a page boundary
+DTYPES = {'float32': '<f4', 'int16': '<i2'}
+INT16_SCALE = 1.0 / 32768.0  # int16 sample -> float in [-1.0, 1.0)
+
+_PREFIX = struct.Struct('<8sI')
+
+
+def is_packed(filepath) -> bool:
+    """True if the path names a packed asset."""
+    return Path(filepath).suffix.lower() == PCM_SUFFIX
+
+
+def packed_path(filepath) -> Path:
+    """Location of the packed asset for a source audio file (next to it)."""
+    return Path(filepath).with_suffix(PCM_SUFFIX)
+
+
+def packed_asset(filepath) -> Optional[Path]:
+    """
+    Find the packed asset to play instead of a source audio file.
+
+    Args:
+        filepath: A .pcm asset, or a source file (WAV, FLAC...)
+
+    Returns:
+        The path itself for a .pcm asset, the packed sibling of a source
+        file if it is at least as recent as the source, otherwise None
+    """
+    path = Path(filepath)
+    if is_packed(path):
+        return path
+    packed = packed_path(path)
+    try:
+        if packed.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return packed
+    except OSError:
+        pass
+    return None
+
+
+def read_header(filepath) -> Dict:
+    """
+    Read the JSON header of a packed asset.
+
+    Returns:
+        Header dict, with the data offset under 'data_offset'
+
+    Raises:
+        ValueError: If the file is not a packed asset
+    """
+    with open(filepath, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{Path(filepath).name} is truncated")
+        magic, data_offset = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{Path(filepath).name} is not a packed PCM asset")
+        header = json.loads(f.read(data_offset - _PREFIX.size).decode('utf-8'))
+    if header.get('dtype') not in DTYPES:
+        raise ValueError(f"Unsupported sample type in {Path(filepath).name}: {header.get('dtype')}")
+    header['data_offset'] = data_offset
+    return header
+
+
+def open_pcm(filepath) -> Tuple[np.memmap, int]:
+    """
+    Memory-map a packed asset.
+
+    Returns:
+        Tuple of (read-only memmap in the stored sample type, sample
+        rate); shape is (frames,) for mono like sf.read, otherwise
+        (frames, channels)
+    """
+    header = read_header(filepath)
+    frames, channels = header['frames'], header['channels']
+    shape = (frames,) if channels == 1 else (frames, channels)
+    data = np.memmap(str(filepath), dtype=DTYPES[header['dtype']], mode='r',
+                     offset=header['data_offset'], shape=shape)
+    return data, header['samplerate']
+
+
+def to_float32(data: np.ndarray) -> np.ndarray:
+    """Convert packed samples to float32 (float32 assets are returned as is)."""
+    if data.dtype.kind == 'f':
+        return data
+    return np.multiply(data, INT16_SCALE, dtype='float32')
+
+
+def to_int16(data: np.ndarray) -> np.ndarray:
+    """Convert float samples to int16 (int16 arrays are returned as is)."""
+    if data.dtype == np.int16:
+        return data
+    return np.clip(np.round(data * 32768.0), -32768, 32767).astype('int16')
+
+
+def convert_samples(data: np.ndarray, dtype: str) -> np.ndarray:
+    """Convert samples to 'float32' or 'int16', without copying if they already are."""
+    return to_int16(data) if dtype == 'int16' else to_float32(data)
+
+
+def write_pcm(filepath, data: np.ndarray, samplerate: int,
+              dtype: str = 'float32', source: Optional[str] = None) -> Path:
+    """
+    Write samples as a packed asset, atomically.
+
+    Args:
+        filepath: Destination .pcm path
+        data: float samples in [-1.0, 1.0], shape (frames,) or
+            (frames, channels)
+        samplerate: Sample rate in Hz
+        dtype: Stored sample type, 'float32' or 'int16'
+        source: Name of the file the samples came from (informational)
+
+    Returns:
+        The written path
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported sample type: {dtype}")
+    frames = data if data.ndim > 1 else data.reshape(-1, 1)
+    samples = np.ascontiguousarray(convert_samples(frames, dtype), dtype=DTYPES[dtype])
+
+    header = json.dumps({
+        'samplerate': int(samplerate),
+        'channels': samples.shape[1],
+        'frames': samples.shape[0],
+        'dtype': dtype,
+        'source': source,
+    }).encode('utf-8')
+    data_offset = -(-(_PREFIX.size + len(header)) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+    path = Path(filepath)
+    temp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, data_offset))
+            f.write(header.ljust(data_offset - _PREFIX.size, b' '))
+            f.write(samples.tobytes())
+        os.replace(temp, path)
+    finally:
+        if temp.exists():
+            temp.unlink()
+    return path
+
+
+def pack_file(source_path, target_path=None, dtype: str = 'float32',
+              samplerate: Optional[int] = None) -> Path:
+    """
+    Decode an audio file and write it as a packed asset.
+
+    Args:
+        source_path: Audio file to pack (anything libsndfile reads)
+        target_path: Destination (default: packed_path(source_path))
+        dtype: Stored sample type, 'float32' or 'int16'
+        samplerate: Resample to this rate first (None keeps the file's)
+
+    Returns:
+        The written path
+    """
+    source_path = Path(source_path)
+    data, sr = sf.read(str(source_path), dtype='float32')
+    if samplerate and samplerate != sr:
+        data, sr = resample(data, sr, samplerate), samplerate
+    return write_pcm(target_path or packed_path(source_path), data, sr,
+                     dtype=dtype, source=source_path.name)
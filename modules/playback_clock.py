@@ -0,0 +1,215 @@
+"""
+Sample-accurate playback clock for IBP-KaraokeLive.
+
+This module provides the shared clock that AudioRouter uses to report
+playback position. Instead of measuring wall-clock time since play(),
+the clock is advanced by the output stream callbacks with the frame
+index of each block and the moment PortAudio says that block reaches
+the DAC (time_info.outputBufferDacTime). Between callbacks the position
+is interpolated on a monotonic host clock, so UI polling at 60 FPS gets
+smooth, monotonic, sub-millisecond positions that follow what the
+listener actually hears.
+"""
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+# (first frame of block, frames in block, host time the block hits the DAC)
+Anchor = Tuple[int, int, float]
+
+
+class PlaybackClock:
+    """
+    Frame-driven playback clock shared by all output streams of a router.
+
+    Each stream registers under a key ('headphone', 'speaker'). Callbacks
+    call advance() once per block; the UI thread calls get_position()
+    and get_drift(). Anchors are stored as immutable tuples and replaced
+    with a single assignment, so no lock is needed between the audio
+    threads and the UI thread.
+
+    The first registered stream is the master: its anchor drives
+    get_position(). The other streams are only used to measure drift;
+    they may run at their own device's rate, since anchors are compared
+    in seconds.
+    """
+
+    def __init__(self, now: Callable[[], float] = time.perf_counter):
+        """
+        Initialize an idle clock.
+
+        Args:
+            now: Host clock the DAC times refer to (the offline backend
+                passes its virtual clock)
+        """
+        self.now = now
+        self.sample_rate: Optional[int] = None
+        self.master_key: Optional[str] = None
+        self._anchors: Dict[str, Optional[Anchor]] = {}
+        self._rates: Dict[str, int] = {}
+        self._finished: Dict[str, bool] = {}
+        self._last_position = 0.0
+
+    def reset(self, sample_rate: int, stream_keys: Iterable[str],
+              stream_rates: Optional[Dict[str, int]] = None) -> None:
+        """
+        Prepare the clock for a new playback.
+
+        Args:
+            sample_rate: Sample rate of the master stream
+            stream_keys: Keys of the streams that will advance the clock;
+                the first one becomes the master
+            stream_rates: Rate per stream key where it differs from
+                `sample_rate`
+        """
+        keys = list(stream_keys)
+        self.sample_rate = sample_rate
+        self.master_key = keys[0] if keys else None
+        self._rates = {key: (stream_rates or {}).get(key, sample_rate) for key in keys}
+        # Pre-populate so callbacks never resize the dicts
+        self._anchors = {key: None for key in keys}
+        self._finished = {key: False for key in keys}
+        self._last_position = 0.0
+
+    def dac_host_time(self, time_info=None, latency: float = 0.0,
+                      offset: float = 0.0) -> float:
+        """
+        Convert a callback's DAC time to the host clock (now()).
+
+        Args:
+            time_info: PortAudio time_info passed to the stream callback
+            latency: Fallback output latency in seconds, used when the
+                host API does not report outputBufferDacTime
+            offset: Extra device latency PortAudio does not report
+                (from the latency calibration profile)
+
+        Returns:
+            now() time at which the block's first frame is heard
+        """
+        now = self.now()
+        delay = latency
+        if time_info is not None:
+            dac_time = getattr(time_info, 'outputBufferDacTime', 0.0)
+            current_time = getattr(time_info, 'currentTime', 0.0)
+            # Some host APIs (e.g. MME) report zeros here
+            if dac_time > 0 and current_time > 0 and dac_time >= current_time:
+                delay = dac_time - current_time
+        return now + delay + offset
+
+    def advance(self, stream_key: str, frame: int, frames: int,
+                time_info=None, latency: float = 0.0,
+                host_time: Optional[float] = None) -> None:
+        """
+        Record that a block is about to be played. Called from callbacks.
+
+        Args:
+            stream_key: Key of the stream that rendered the block
+            frame: Index (in the source audio) of the block's first frame;
+                negative while a scheduled start is still outputting
+                lead-in silence
+            frames: Number of frames in the block
+            time_info: PortAudio time_info passed to the stream callback
+            latency: Fallback output latency in seconds, used when the
+                host API does not report outputBufferDacTime
+            host_time: DAC time already computed with dac_host_time()
+                (takes precedence over time_info/latency)
+        """
+        if host_time is None:
+            host_time = self.dac_host_time(time_info, latency)
+        self._anchors[stream_key] = (frame, frames, host_time)
+
+    def get_anchor(self, stream_key: str) -> Optional[Anchor]:
+        """
+        Latest anchor of a stream.
+
+        Returns:
+            (first frame, frames, DAC host time) of the last block, or
+            None before the stream's first block
+        """
+        return self._anchors.get(stream_key)
+
+    def jump(self, stream_key: str, frame: int) -> None:
+        """
+        Record a cursor jump (seek, resume or loop wrap).
+
+        Drops the stream's anchor so no drift is measured across the
+        discontinuity. For the master stream the position may move
+        backwards: get_position() reports `frame` until the audio after
+        the jump is heard.
+
+        Args:
+            stream_key: Key of the stream that jumped
+            frame: Frame the stream continues from
+        """
+        self._anchors[stream_key] = None
+        if stream_key == self.master_key and self.sample_rate:
+            self._last_position = frame / self.sample_rate
+
+    def mark_finished(self, stream_key: str) -> None:
+        """Mark a stream as finished (completed, stopped or failed)."""
+        self._finished[stream_key] = True
+
+    def is_finished(self) -> bool:
+        """Return True once every registered stream has finished."""
+        return bool(self._finished) and all(self._finished.values())
+
+    def _frames_at(self, anchor: Anchor, now: float, rate: int) -> float:
+        """Extrapolate the DAC position of a stream at host time `now`."""
+        frame, _, host_time = anchor
+        return frame + (now - host_time) * rate
+
+    def get_position(self) -> float:
+        """
+        Get the position of the master stream at the DAC, in seconds.
+
+        The position is extrapolated from the latest block's DAC time,
+        capped at the end of that block (so a late callback freezes the
+        clock instead of running ahead of the audio) and never goes
+        backwards.
+
+        Returns:
+            Position in seconds (0.0 before the first block is played)
+        """
+        if not self.sample_rate or self.master_key is None:
+            return 0.0
+
+        anchor = self._anchors.get(self.master_key)
+        if anchor is None:
+            return self._last_position
+
+        frame, frames, _ = anchor
+        position = self._frames_at(anchor, self.now(), self.sample_rate)
+        position = min(position, frame + frames)
+        seconds = position / self.sample_rate
+
+        if seconds > self._last_position:
+            self._last_position = seconds
+        return self._last_position
+
+    def get_drift(self, stream_a: str = 'headphone',
+                  stream_b: str = 'speaker') -> float:
+        """
+        Measure the playback offset between two streams.
+
+        Both streams are extrapolated to the same host instant, so the
+        result is the difference between what each device is outputting
+        right now.
+
+        Args:
+            stream_a: Reference stream key
+            stream_b: Compared stream key
+
+        Returns:
+            Drift in seconds (positive when stream_a is ahead of
+            stream_b), or 0.0 if either stream has not played yet
+        """
+        anchor_a = self._anchors.get(stream_a)
+        anchor_b = self._anchors.get(stream_b)
+        if anchor_a is None or anchor_b is None or not self.sample_rate:
+            return 0.0
+
+        now = self.now()
+        rate_a = self._rates[stream_a]
+        rate_b = self._rates[stream_b]
+        return (self._frames_at(anchor_a, now, rate_a) / rate_a
+                - self._frames_at(anchor_b, now, rate_b) / rate_b)
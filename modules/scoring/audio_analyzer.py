@@ -1,41 +1,160 @@
-"""Minimal audio analyzer for 4-hour MVP - CORRECTED."""
-import pyaudio
+"""
+Microphone capture and scoring for the performance screen.
+
+The microphone is read in callback mode: either by the analyzer's own
+int16 RawInputStream, whose callback views each buffer with
+np.frombuffer (no copy) and measures it in place, or, in duplex mode,
+by the router's headphone stream, whose capture buffer a thread drains
+block by block. Per-block RMS, peak and clipping go into a LevelMeter
+array allocated when recording starts, sized from the song's duration
+(AudioRouter.get_duration()) so the whole song is kept and each row maps
+to a song timestamp, and each block's RMS updates a LiveScore, so the
+score is known at every moment of the song.
+
+An analysis thread drains the captured samples every ANALYSIS_INTERVAL
+and feeds them to a PitchTracker, so the f0 and voicing-confidence
+contour (100 frames per second) grows while the guest sings and the
+performance screen can show live pitch. FFTs never run on the audio
+thread. The song's reference melody is extracted offline and only loaded
+here (modules/scoring/reference_pitch.py).
+
+The own input stream is registered with the device registry like the
+router's streams: a PortAudio rescan closes it first and reopens it on
+the re-resolved microphone, so recording survives a hot-plug refresh.
+"""
+import time
+
 import numpy as np
-from threading import Thread, Event
-from collections import deque
+from threading import Thread, Event, Lock
+
+from modules.audio_backends import sounddevice
+from modules.audio_capture import CaptureBuffer
+from modules.device_registry import get_device_registry
+from modules.scoring.level_meter import LevelMeter
+from modules.scoring.live_score import LiveScore
+from modules.scoring.pitch_tracker import PitchTracker
+from modules.scoring.reference_pitch import load_reference
 
 
 class AudioAnalyzer:
-    """Simplified real-time audio capture."""
+    """Real-time microphone levels and a loudness-based score."""
 
-    CHUNK = 1024
-    RATE = 44100
-    SILENCE_THRESHOLD = 500
+    CHUNK = 256  # Frames per block (5.3 ms at 48 kHz)
+    RATE = 48000
+    SILENCE_THRESHOLD = 500  # RMS in int16 units
+    HISTORY_SECONDS = 600  # Recording length measured when the song's is unknown
+    HISTORY_MARGIN = 5.0  # Seconds measured past the song's end (latency, fade-out)
+    ANALYSIS_INTERVAL = 0.02  # Seconds between analysis thread wake-ups
 
-    def __init__(self):
-        self.p = pyaudio.PyAudio()
+    def __init__(self, router=None):
+        """
+        Args:
+            router: AudioRouter whose duplex headphone stream captures the
+                mic in sync with playback; without one (or when it is not
+                capturing) the analyzer opens its own input stream
+        """
+        self.router = router
         self.stream = None
-        self.rms_values = deque(maxlen=5000)  # ~2 minutes
+        self.stream_lock = Lock()  # Guards self.stream against device refreshes
+        self.devices = None  # DeviceRegistry the own stream listens to
+        self.capture_buffer = None  # CaptureBuffer being recorded into
+        # Sized for the song when recording starts (see _allocate)
+        self.meter = LevelMeter(0, self.CHUNK, self.RATE)
+        self.live_score = LiveScore(self.SILENCE_THRESHOLD)
+        self.pitch = PitchTracker(self.RATE, 0)
+        self.reference = None  # ReferenceContour of the current song
+        self.overflows = 0  # Input blocks PortAudio dropped
         self.is_recording = False
         self.stop_event = Event()
         self.thread = None
 
+    @property
+    def rms_values(self) -> np.ndarray:
+        """RMS of every block recorded so far (int16 units)."""
+        return self.meter.rms()
+
+    def rms_times(self) -> np.ndarray:
+        """Song time in seconds at the start of every recorded block."""
+        return self.meter.times()
+
+    def _history_seconds(self) -> float:
+        """Recording length to allocate for: the song plus a margin."""
+        duration = self.router.get_duration() if self.router is not None else 0.0
+        return duration + self.HISTORY_MARGIN if duration > 0 else self.HISTORY_SECONDS
+
+    def _allocate(self, samplerate: int, origin: float) -> None:
+        """
+        Size the level and pitch arrays for a new recording.
+
+        Arrays already of the right size (same song length and rate) are
+        reused; otherwise they are replaced, so memory follows the song.
+        """
+        seconds = self._history_seconds()
+        blocks = int(np.ceil(seconds * samplerate / self.CHUNK))
+        if self.meter.capacity != blocks or self.meter.samplerate != samplerate:
+            self.meter = LevelMeter(blocks, self.CHUNK, samplerate)
+        frames = int(seconds * PitchTracker.FRAME_RATE) + 1
+        if len(self.pitch.f0) != frames or self.pitch.samplerate != samplerate:
+            self.pitch = PitchTracker(samplerate, seconds)
+        self.meter.reset(origin)
+        self.pitch.reset(origin)
+
+    def load_reference(self, filepath):
+        """
+        Load the stored reference melody of the song's vocal track.
+
+        Args:
+            filepath: Track the reference was extracted from
+
+        Returns:
+            True if a reference is loaded
+        """
+        started = time.perf_counter()
+        self.reference = load_reference(filepath)
+        if self.reference is None:
+            print(f"⚠️ No reference pitch for {filepath} "
+                  f"(run tools/extract_reference_pitch.py)")
+            return False
+        print(
+            f"🎼 Reference pitch loaded ({len(self.reference.f0)} frames, "
+            f"{len(self.reference.onsets)} notes, "
+            f"{1000 * (time.perf_counter() - started):.1f}ms)"
+        )
+        return True
+
     def start_recording(self):
         """Start mic capture."""
         if self.is_recording:
             return
 
-        self.stream = self.p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self.RATE,
-            input=True,
-            frames_per_buffer=self.CHUNK
-        )
+        # Duplex: the router's headphone callback already reads the mic;
+        # the analysis thread also measures its levels
+        self.capture_buffer = self.router.get_capture() if self.router is not None else None
+        duplex = self.capture_buffer is not None
+        if not duplex:
+            self.capture_buffer = CaptureBuffer(self.RATE, dtype='int16')
+
+        # Allocate before the stream starts, so no callback lands in the
+        # previous recording's meter
+        if self.meter.count == 0 and self.pitch.count == 0:
+            # New recording (not a resume): own stream blocks start about now
+            origin = self.router.get_position() if self.router is not None and not duplex else 0.0
+            self._allocate(self.capture_buffer.samplerate, origin)
 
         self.is_recording = True
         self.stop_event.clear()
-        self.thread = Thread(target=self._record_loop, daemon=True)
+        if not duplex:
+            self.devices = get_device_registry()
+            self.devices.add_listener(self._suspend_input, self._resume_input)
+            try:
+                self._open_input()
+            except Exception:
+                self.stop_recording()
+                raise
+
+        self.thread = Thread(
+            target=self._drain_loop, args=(duplex,), daemon=True, name="MicAnalysis"
+        )
         self.thread.start()
         print("🎤 Audio recording started")
 
@@ -44,82 +163,221 @@ class AudioAnalyzer:
         self.is_recording = False
         self.stop_event.set()
 
-        if self.thread:
-            self.thread.join(timeout=1.0)
+        try:
+            if self.devices is not None:
+                self.devices.remove_listener(self._suspend_input)
+                self.devices = None
+            self._close_input()
+        finally:
+            if self.thread:
+                self.thread.join(timeout=1.0)
+                self.thread = None
 
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        
-        print("🛑 Audio recording stopped")
+        print(
+            f"🛑 Audio recording stopped ({self.meter.count} blocks, "
+            f"{self.meter.clipped_blocks()} clipped, {self.overflows} overflows, "
+            f"{self.pitch.count} pitch frames)"
+        )
 
-    def _record_loop(self):
-        """Generate FAKE RMS values for demo - no microphone required."""
-        import random
-        import time
+    def _open_input(self):
+        """
+        Open and start the own int16 input stream on the resolved mic.
 
-        while self.is_recording:
-            try:
-                # Generate fake RMS values with realistic ranges and noise
-                base_level = random.uniform(100, 2000)  # Base singing level
-                noise = random.gauss(0, 200)  # Add some noise
-                trend = (time.time() % 10) / 10  # Slow trend over time
+        If the configured microphone is not connected no stream is
+        opened (never the system default input); the next device refresh
+        tries again.
+        """
+        with self.stream_lock:
+            if self.stream is not None or not self.is_recording:
+                return
+            device = self.devices.resolve('mic')
+            if device is None:
+                print("⚠️ Microphone not found - recording resumes when it is connected")
+                return
+            stream = sounddevice().RawInputStream(
+                device=device,
+                samplerate=self.RATE,
+                channels=1,
+                dtype='int16',
+                blocksize=self.CHUNK,
+                latency='low',
+                callback=self._on_input
+            )
+            stream.start()
+            self.stream = stream
+
+    def _close_input(self):
+        """Stop and close the own input stream (errors of a dead stream are reported)."""
+        with self.stream_lock:
+            stream, self.stream = self.stream, None
+        if stream is None:
+            return
+        try:
+            if stream.active:
+                stream.stop()
+            stream.close()
+        except Exception as e:
+            print(f"⚠️ Error closing microphone stream: {e}")
 
-                # Add occasional "singing bursts" (higher energy)
-                burst = random.random() < 0.3  # 30% chance of burst
-                if burst:
-                    base_level *= random.uniform(2, 5)
+    def _suspend_input(self):
+        """Device registry listener: close the input before PortAudio re-initializes."""
+        self._close_input()
 
-                # Calculate fake RMS with controlled randomness
-                rms = max(0, base_level + noise + (trend * 500))
+    def _resume_input(self):
+        """Device registry listener: reopen the input on the re-resolved mic."""
+        if self.is_recording:
+            self._open_input()
 
-                # Occasionally add silence periods
-                if random.random() < 0.1:  # 10% chance
-                    rms = random.uniform(0, 50)  # Near silence
+    def _on_input(self, indata, frames, time_info, status):
+        """
+        Raw input callback: measure the block and keep it for later analysis.
 
-                self.rms_values.append(rms)
+        `indata` is PortAudio's int16 buffer; np.frombuffer views it
+        without copying and the meter reduces it with whole-block numpy
+        operations.
+        """
+        if status and status.input_overflow:
+            self.overflows += 1
+        samples = np.frombuffer(indata, dtype=np.int16)
+        self._measure(samples)
+        self.capture_buffer.write(samples.reshape(-1, 1), 0)
 
-                # Simulate real-time capture timing (43Hz = ~23ms per frame)
-                time.sleep(0.023)
+    def _measure(self, samples):
+        """Levels of one block, added to the running score."""
+        rms = self.meter.process(samples)
+        if rms is not None:
+            self.live_score.add(rms)
 
-            except Exception as e:
-                print(f"⚠️ Fake audio generation error: {e}")
+    def _drain_loop(self, duplex):
+        """
+        Analysis thread: track pitch over everything captured so far.
 
-    def get_score(self):
-        """Calculate simple score from RMS values."""
-        if not self.rms_values:
-            return 0
+        Args:
+            duplex: Reading the router's capture buffer, whose levels are
+                measured here one CHUNK at a time (the own stream's
+                callback has already measured them)
+        """
+        capture = self.capture_buffer
+        # Whole CHUNKs covering a few wake-ups of capture
+        chunks = int(np.ceil(4 * self.ANALYSIS_INTERVAL * capture.samplerate / self.CHUNK))
+        block = np.zeros((chunks * self.CHUNK, capture.channels), dtype=capture.dtype)
+        started = not duplex or self.pitch.count > 0
+
+        while True:
+            stopping = self.stop_event.is_set()
+            while capture.available >= self.CHUNK or (stopping and capture.available):
+                ready = capture.available if stopping else \
+                    capture.available // self.CHUNK * self.CHUNK
+                count, first = capture.read_into(block[:min(ready, len(block))])
+                if not started:
+                    # Duplex capture knows the song frame of its first sample
+                    origin = first / capture.samplerate
+                    self.meter.origin = origin
+                    self.pitch.origin = origin
+                    started = True
+                samples = block[:count, 0]
+                if duplex:
+                    for start in range(0, count, self.CHUNK):
+                        self._measure(samples[start:start + self.CHUNK])
+                self.pitch.process(samples)
+            if stopping:
+                break
+            self.stop_event.wait(self.ANALYSIS_INTERVAL)
 
-        # Count chunks above silence threshold
-        active_chunks = sum(1 for rms in self.rms_values if rms > self.SILENCE_THRESHOLD)
-        total_chunks = len(self.rms_values)
+    def capture(self, seconds):
+        """
+        Record raw microphone samples (blocking), e.g. for calibration.
 
-        # Coverage percentage
-        coverage = (active_chunks / total_chunks * 100) if total_chunks > 0 else 0
+        Args:
+            seconds: Recording length
 
-        # Average RMS of active chunks
-        active_rms_values = [rms for rms in self.rms_values if rms > self.SILENCE_THRESHOLD]
-        avg_rms = np.mean(active_rms_values) if active_rms_values else 0
+        Returns:
+            Tuple of (float32 samples in [-1, 1], perf_counter time of
+            the first sample at the microphone)
 
-        # Simple scoring: 50% coverage + 50% energy
-        coverage_score = min(coverage / 80.0, 1.0) * 50  # 80% coverage = max
-        energy_score = min(avg_rms / 5000.0, 1.0) * 50   # 5000 RMS = max
+        Raises:
+            RuntimeError: The configured microphone is not connected
+        """
+        device = get_device_registry().resolve('mic')
+        if device is None:
+            raise RuntimeError("Microphone not found")
+        sd = sounddevice()
+        samples = np.zeros(int(seconds * self.RATE), dtype=np.float32)
+        state = {'filled': 0, 'start': None}
+        done = Event()
 
-        final_score = coverage_score + energy_score
+        def _callback(indata, frames, time_info, status):
+            if state['start'] is None:
+                # Host time the first frame reached the ADC
+                adc_time = getattr(time_info, 'inputBufferAdcTime', 0.0)
+                current_time = getattr(time_info, 'currentTime', 0.0)
+                if adc_time > 0 and current_time >= adc_time:
+                    state['start'] = time.perf_counter() - (current_time - adc_time)
+                else:
+                    state['start'] = time.perf_counter() - frames / self.RATE - stream.latency
+            filled = state['filled']
+            count = min(frames, len(samples) - filled)
+            samples[filled:filled + count] = indata[:count, 0]
+            state['filled'] = filled + count
+            if state['filled'] >= len(samples):
+                done.set()
+                raise sd.CallbackStop()
+
+        stream = sd.InputStream(
+            device=device,
+            samplerate=self.RATE,
+            channels=1,
+            dtype='float32',
+            blocksize=self.CHUNK,
+            callback=_callback
+        )
+        with stream:
+            done.wait(timeout=seconds + 2.0)
+
+        return samples[:state['filled']], state['start']
+
+    def get_live_pitch(self):
+        """
+        Latest pitch frame, for the live display.
+
+        Returns:
+            Tuple of (time in seconds, f0 in Hz or 0.0 if unvoiced,
+            voicing confidence 0.0 - 1.0), or None before the first frame
+        """
+        return self.pitch.latest()
+
+    def get_pitch_contour(self):
+        """
+        Pitch contour recorded so far.
+
+        Returns:
+            Tuple of (frame times in seconds, f0 in Hz, confidence) arrays
+        """
+        return self.pitch.contour()
+
+    def get_live_score(self):
+        """Score so far, 0 - 100 (O(1); safe to call every frame)."""
+        return self.live_score.score()
+
+    def get_score(self):
+        """Final score: the running score, with its components logged."""
+        result = self.live_score.breakdown()
         
         # Log score calculation
         print(f"📊 Score calculation:")
-        print(f"   Coverage: {coverage:.1f}% → {coverage_score:.1f} pts")
-        print(f"   Energy: {avg_rms:.0f} RMS → {energy_score:.1f} pts")
-        print(f"   Final: {final_score:.2f}/100")
+        print(f"   Coverage: {result['coverage']:.1f}% → {result['coverage_score']:.1f} pts")
+        print(f"   Energy: {result['avg_rms']:.0f} RMS → {result['energy_score']:.1f} pts")
+        print(f"   Final: {result['score']:.2f}/100")
         
-        return round(max(0.0, min(100.0, final_score)), 2)
+        return result['score']
 
     def clear(self):
         """Clear collected data."""
-        self.rms_values.clear()
+        self.meter.reset()
+        self.live_score.reset()
+        self.pitch.reset()
+        self.overflows = 0
 
     def cleanup(self):
         """Cleanup resources."""
-        self.stop_recording()
-        self.p.terminate()
\ No newline at end of file
+        self.stop_recording()
\ No newline at end of file
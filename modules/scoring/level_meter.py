@@ -0,0 +1,134 @@
+"""
+Per-block microphone levels for the AudioAnalyzer.
+
+The capture callback hands each block of samples to LevelMeter.process(),
+which computes its RMS, peak and clipped-sample count with whole-block
+numpy reductions and writes them into the next row of an array allocated
+up front. There is no per-sample Python loop and, for the usual block
+size, no allocation on the audio thread, so the meter keeps up with a
+48 kHz stream and 256-frame blocks.
+
+Levels are in int16 units (full scale 32768) whatever the input type,
+so the analyzer's thresholds do not depend on the stream format. Row i
+covers the block starting at origin + i * blocksize / samplerate, so
+with the origin set to the song time of the first block every row maps
+to a song timestamp.
+"""
+from typing import Optional
+
+import numpy as np
+
+
+# Columns of LevelMeter.levels
+RMS = 0
+PEAK = 1
+CLIPPED = 2
+
+FULL_SCALE = 32768.0
+CLIP_LEVEL = 32767.0  # |sample| at or above this counts as clipped
+
+
+class LevelMeter:
+    """
+    RMS, peak and clipping per block, written into a preallocated array.
+
+    Single producer (the capture callback); readers take `count` first
+    and then only look at rows below it, which are never rewritten.
+
+    Attributes:
+        levels: float32 array, shape (capacity, 3): RMS, PEAK, CLIPPED
+        count: Blocks measured so far
+        dropped: Blocks that arrived after the array was full
+        origin: Time of the first block's start in seconds
+    """
+
+    def __init__(self, capacity: int, blocksize: int = 256, samplerate: int = 48000):
+        """
+        Initialize meter.
+
+        Args:
+            capacity: Maximum number of blocks measured
+            blocksize: Expected frames per block (the scratch buffer grows
+                once if a larger block arrives)
+            samplerate: Rate of the measured stream (for block times)
+        """
+        self.levels = np.zeros((capacity, 3), dtype=np.float32)
+        self.count = 0
+        self.dropped = 0
+        self.blocksize = blocksize
+        self.samplerate = samplerate
+        self.origin = 0.0
+        self._scratch = np.zeros(blocksize, dtype=np.float32)
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of blocks measured."""
+        return len(self.levels)
+
+    def process(self, samples: np.ndarray) -> Optional[float]:
+        """
+        Measure one mono block (callback-safe).
+
+        Args:
+            samples: 1-D int16 samples (e.g. np.frombuffer over the raw
+                stream buffer) or float samples in [-1.0, 1.0]
+
+        Returns:
+            The block's RMS, or None if it was empty or dropped
+        """
+        index = self.count
+        if index >= len(self.levels):
+            self.dropped += 1
+            return None
+        frames = len(samples)
+        if frames == 0:
+            return None
+        if frames > len(self._scratch):
+            # Unusual block size; grow once
+            self._scratch = np.zeros(frames, dtype=np.float32)
+
+        block = self._scratch[:frames]
+        if samples.dtype == np.int16:
+            np.copyto(block, samples)
+        else:
+            np.multiply(samples, FULL_SCALE, out=block)
+
+        row = self.levels[index]
+        rms = float(np.sqrt(np.dot(block, block) / frames))
+        row[RMS] = rms
+        peak = max(block.max(), -block.min())
+        row[PEAK] = peak
+        if peak >= CLIP_LEVEL:
+            # Rare; the comparisons allocate one small bool block each
+            row[CLIPPED] = np.count_nonzero(block >= CLIP_LEVEL) + \
+                np.count_nonzero(block <= -CLIP_LEVEL)
+        else:
+            row[CLIPPED] = 0
+        self.count = index + 1
+        return rms
+
+    def block_time(self, index):
+        """Start time of a block in seconds (scalar or array of indices)."""
+        return self.origin + index * self.blocksize / self.samplerate
+
+    def block_at(self, seconds: float) -> int:
+        """Index of the block covering time `seconds` (may be out of range)."""
+        return int((seconds - self.origin) * self.samplerate // self.blocksize)
+
+    def times(self) -> np.ndarray:
+        """Start time of every measured block in seconds."""
+        return self.block_time(np.arange(self.count))
+
+    def rms(self) -> np.ndarray:
+        """RMS of every measured block (a view, no copy)."""
+        return self.levels[:self.count, RMS]
+
+    def clipped_blocks(self) -> int:
+        """Number of measured blocks with at least one clipped sample."""
+        return int(np.count_nonzero(self.levels[:self.count, CLIPPED]))
+
+    def reset(self, origin: float = 0.0) -> None:
+        """Forget every measured block (keeps the array)."""
+        self.count = 0
+        self.dropped = 0
+        self.origin = origin
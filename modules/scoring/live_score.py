@@ -0,0 +1,85 @@
+"""
+Running loudness score of a performance.
+
+LiveScore is updated with each block's RMS as the block is measured:
+block and active-block counts, RMS sums and a Welford mean and variance
+of the active blocks. The coverage and energy components of the score
+follow from those in O(1), so the performance screen can show the score
+every frame and the final score needs no pass over the recording.
+"""
+from typing import Dict
+
+
+class LiveScore:
+    """
+    Coverage + energy score, accumulated block by block.
+
+    Single producer (the capture callback or analysis thread calls add());
+    all totals are replaced by one tuple assignment, so a reader on any
+    thread always sees a consistent set.
+    """
+
+    COVERAGE_POINTS = 50.0
+    ENERGY_POINTS = 50.0
+    FULL_COVERAGE = 80.0  # Active blocks (%) worth all coverage points
+    FULL_ENERGY = 5000.0  # Mean active RMS (int16 units) worth all energy points
+
+    def __init__(self, silence_threshold: float):
+        """
+        Initialize score.
+
+        Args:
+            silence_threshold: Blocks with a higher RMS count as singing
+        """
+        self.silence_threshold = silence_threshold
+        # (blocks, active blocks, RMS sum, active RMS sum, active mean, active M2)
+        self._totals = (0, 0, 0.0, 0.0, 0.0, 0.0)
+
+    def add(self, rms: float) -> None:
+        """Account one block (callback-safe, O(1))."""
+        blocks, active, total, active_sum, mean, m2 = self._totals
+        if rms > self.silence_threshold:
+            active += 1
+            active_sum += rms
+            delta = rms - mean
+            mean += delta / active
+            m2 += delta * (rms - mean)
+        self._totals = (blocks + 1, active, total + rms, active_sum, mean, m2)
+
+    @property
+    def blocks(self) -> int:
+        """Blocks accounted so far."""
+        return self._totals[0]
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Score components so far (O(1)).
+
+        Returns:
+            Dict with coverage (%), coverage_score, avg_rms (mean RMS of
+            active blocks), energy_score, rms_std (spread of the active
+            RMS), mean_rms (all blocks) and score (0 - 100)
+        """
+        blocks, active, total, active_sum, mean, m2 = self._totals
+        coverage = active / blocks * 100 if blocks else 0.0
+        avg_rms = active_sum / active if active else 0.0
+        coverage_score = min(coverage / self.FULL_COVERAGE, 1.0) * self.COVERAGE_POINTS
+        energy_score = min(avg_rms / self.FULL_ENERGY, 1.0) * self.ENERGY_POINTS
+        score = coverage_score + energy_score
+        return {
+            'coverage': coverage,
+            'coverage_score': coverage_score,
+            'avg_rms': avg_rms,
+            'energy_score': energy_score,
+            'rms_std': (m2 / active) ** 0.5 if active else 0.0,
+            'mean_rms': total / blocks if blocks else 0.0,
+            'score': round(max(0.0, min(100.0, score)), 2),
+        }
+
+    def score(self) -> float:
+        """Score so far, 0 - 100 (O(1))."""
+        return self.breakdown()['score']
+
+    def reset(self) -> None:
+        """Start a new performance."""
+        self._totals = (0, 0, 0.0, 0.0, 0.0, 0.0)
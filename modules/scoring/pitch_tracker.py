@@ -0,0 +1,219 @@
+"""
+Incremental pitch tracking of the singer's microphone.
+
+PitchTracker implements YIN over analysis frames taken every 10 ms
+(100 Hz). Samples are fed as they are captured; every call analyses all
+frames that became complete, as one batch: the frames are strided views
+of the input (np.lib.stride_tricks.sliding_window_view), their
+autocorrelations come from one batched real FFT, and the cumulative mean
+normalized difference, threshold search and parabolic refinement are
+vectorized over frames. Results are appended to f0 and confidence
+arrays allocated up front, so the contour can be read while it grows.
+
+YIN: de Cheveigné & Kawahara, "YIN, a fundamental frequency estimator
+for speech and music", JASA 2002.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modules.pcm_assets import INT16_SCALE
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+
+def note_name(f0: float) -> str:
+    """Nearest equal-tempered note to `f0` (A4 = 440 Hz), e.g. 'A4'; '' if unvoiced."""
+    if f0 <= 0:
+        return ''
+    midi = int(round(69 + 12 * np.log2(f0 / 440.0)))
+    return f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+
+
+class PitchTracker:
+    """
+    YIN f0 and voicing-confidence contour at a fixed frame rate.
+
+    Single producer (the analyzer thread calls process()); readers take
+    `count` first and only look at frames below it.
+
+    Attributes:
+        samplerate: Input rate in Hz
+        hop: Frames between analysis frames (samplerate / frame rate)
+        f0: Fundamental per frame in Hz (0.0 = unvoiced)
+        confidence: 1 - YIN aperiodicity per frame (0.0 - 1.0)
+        count: Frames analysed so far
+        dropped: Frames that did not fit in the contour arrays
+        origin: Time of the first input sample in seconds (song time
+            when fed from a duplex capture)
+    """
+
+    FRAME_RATE = 100  # Contour frames per second
+    FMIN = 70.0  # Lowest f0 searched (Hz)
+    FMAX = 1000.0  # Highest f0 searched (Hz)
+    THRESHOLD = 0.15  # YIN absolute threshold on the normalized difference
+    SILENCE_RMS = 0.005  # Frames quieter than this are unvoiced (full scale = 1.0)
+
+    def __init__(self, samplerate: int, capacity_seconds: float = 600.0,
+                 origin: float = 0.0):
+        """
+        Initialize tracker.
+
+        Args:
+            samplerate: Input rate in Hz
+            capacity_seconds: Longest contour kept (preallocated)
+            origin: Time of the first input sample in seconds
+        """
+        self.samplerate = samplerate
+        self.hop = int(round(samplerate / self.FRAME_RATE))
+        self.max_lag = int(np.ceil(samplerate / self.FMIN))
+        self.min_lag = max(2, int(np.floor(samplerate / self.FMAX)))
+        self.window = self.max_lag  # Integration window of the difference function
+        self.frame_length = self.window + self.max_lag + 1
+        self._nfft = 1 << int(np.ceil(np.log2(self.frame_length + self.window)))
+        self._lags = np.arange(self.max_lag + 1, dtype=np.float32)
+
+        capacity = int(capacity_seconds * self.FRAME_RATE) + 1
+        self.f0 = np.zeros(capacity, dtype=np.float32)
+        self.confidence = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.dropped = 0
+        self.origin = origin
+
+        # Samples not yet covered by a complete frame (at most one frame
+        # plus one batch of input is ever held)
+        self._pending = np.zeros(self.frame_length + samplerate, dtype=np.float32)
+        self._filled = 0
+
+    def frame_time(self, index) -> float:
+        """Time of a frame's centre in seconds (scalar or array of indices)."""
+        return self.origin + (index * self.hop + self.frame_length / 2) / self.samplerate
+
+    def process(self, samples: np.ndarray) -> int:
+        """
+        Feed captured samples and analyse every frame they complete.
+
+        Args:
+            samples: 1-D mono block, int16 or float in [-1.0, 1.0]
+
+        Returns:
+            Number of new contour frames
+        """
+        added = 0
+        offset = 0
+        while offset < len(samples):
+            space = len(self._pending) - self._filled
+            chunk = samples[offset:offset + space]
+            target = self._pending[self._filled:self._filled + len(chunk)]
+            if chunk.dtype == np.int16:
+                np.multiply(chunk, INT16_SCALE, out=target)
+            else:
+                np.copyto(target, chunk)
+            self._filled += len(chunk)
+            offset += len(chunk)
+            added += self._analyse_pending()
+        return added
+
+    def _analyse_pending(self) -> int:
+        """Analyse the complete frames in the pending buffer and drop their hops."""
+        if self._filled < self.frame_length:
+            return 0
+        frames = sliding_window_view(
+            self._pending[:self._filled], self.frame_length
+        )[::self.hop]
+        f0, confidence = self._yin(frames)
+
+        start = self.count
+        stored = min(len(f0), len(self.f0) - start)
+        self.f0[start:start + stored] = f0[:stored]
+        self.confidence[start:start + stored] = confidence[:stored]
+        self.dropped += len(f0) - stored
+        self.count = start + stored
+
+        # Keep the samples the next frame starts with
+        consumed = len(frames) * self.hop
+        remaining = self._filled - consumed
+        self._pending[:remaining] = self._pending[consumed:self._filled]
+        self._filled = remaining
+        return stored
+
+    def _yin(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        YIN over a batch of frames.
+
+        Args:
+            frames: Shape (n, frame_length), float32
+
+        Returns:
+            Tuple of (f0 in Hz, 0.0 if unvoiced; confidence 0.0 - 1.0)
+        """
+        window, max_lag = self.window, self.max_lag
+
+        # Difference function d(tau) = E(0) + E(tau) - 2 r(tau), with r the
+        # cross-correlation of the first window with the whole frame
+        spectrum = np.fft.rfft(frames, self._nfft, axis=1)
+        head = np.fft.rfft(frames[:, :window], self._nfft, axis=1)
+        acf = np.fft.irfft(np.conj(head) * spectrum, self._nfft, axis=1)[:, :max_lag + 1]
+        energy = np.cumsum(np.square(frames, dtype=np.float64), axis=1)
+        energy = np.concatenate([np.zeros((len(frames), 1)), energy], axis=1)
+        shifted = energy[:, window:window + max_lag + 1] - energy[:, :max_lag + 1]
+        diff = energy[:, window:window + 1] + shifted - 2.0 * acf
+        diff[:, 0] = 0.0
+        np.maximum(diff, 0.0, out=diff)
+
+        # Cumulative mean normalized difference d'(tau)
+        running = np.cumsum(diff[:, 1:], axis=1)
+        cmnd = np.ones_like(diff)
+        np.divide(diff[:, 1:] * self._lags[1:], running, out=cmnd[:, 1:], where=running > 0)
+
+        # First local minimum under the threshold in the search range,
+        # else the global minimum (reported as unvoiced)
+        search = cmnd[:, self.min_lag:max_lag]
+        local_min = np.zeros_like(search, dtype=bool)
+        local_min[:, :-1] = search[:, :-1] <= search[:, 1:]
+        candidates = (search < self.THRESHOLD) & local_min
+        has_candidate = candidates.any(axis=1)
+        best = np.where(has_candidate, candidates.argmax(axis=1), search.argmin(axis=1))
+        rows = np.arange(len(frames))
+        lag = best + self.min_lag
+        aperiodicity = cmnd[rows, lag]
+
+        # Parabolic interpolation around the chosen lag
+        left = cmnd[rows, lag - 1]
+        right = cmnd[rows, np.minimum(lag + 1, max_lag)]
+        curvature = left + right - 2.0 * aperiodicity
+        shift = np.zeros(len(frames))
+        np.divide(left - right, 2.0 * curvature, out=shift, where=curvature > 0)
+        period = lag + np.clip(shift, -1.0, 1.0)
+
+        rms = np.sqrt(energy[:, window] / window)
+        voiced = has_candidate & (rms > self.SILENCE_RMS)
+        f0 = np.where(voiced, self.samplerate / period, 0.0).astype(np.float32)
+        confidence = np.clip(1.0 - aperiodicity, 0.0, 1.0).astype(np.float32)
+        confidence[rms <= self.SILENCE_RMS] = 0.0
+        return f0, confidence
+
+    def contour(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Contour so far.
+
+        Returns:
+            Tuple of (frame times in seconds, f0 view, confidence view)
+        """
+        count = self.count
+        return self.frame_time(np.arange(count)), self.f0[:count], self.confidence[:count]
+
+    def latest(self) -> Optional[Tuple[float, float, float]]:
+        """Most recent frame as (time, f0, confidence), None before the first."""
+        index = self.count - 1
+        if index < 0:
+            return None
+        return float(self.frame_time(index)), float(self.f0[index]), float(self.confidence[index])
+
+    def reset(self, origin: float = 0.0) -> None:
+        """Forget the contour and pending samples (keeps the arrays)."""
+        self.count = 0
+        self.dropped = 0
+        self._filled = 0
+        self.origin = origin
@@ -0,0 +1,220 @@
+"""
+Reference melody of a song for pitch-accuracy scoring.
+
+The vocal track is analysed once, offline (tools/extract_reference_pitch.py),
+with the same PitchTracker that follows the singer: f0 and voicing
+confidence at 100 Hz, the voiced regions and the note onsets. The result
+is saved with np.savez_compressed as <content hash>.npz in
+REFERENCE_PITCH_DIR, so a renamed copy of the same audio finds it and
+an edited track never picks up a stale contour. Loading it at
+performance start is a hash lookup and a small decompress.
+"""
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+from config.app_config import REFERENCE_PITCH_DIR
+from modules.audio_cache import source_hash
+from modules.scoring.pitch_tracker import PitchTracker
+
+FORMAT_VERSION = 1
+ONSET_SEMITONES = 1.0  # Pitch jump inside a voiced region that starts a new note
+MIN_REGION_SECONDS = 0.05  # Shorter voiced blips are dropped
+MAX_GAP_SECONDS = 0.05  # Shorter unvoiced gaps (consonants, note changes) are bridged
+
+
+class ReferenceContour:
+    """
+    Pitch contour of a song's vocal track.
+
+    Attributes:
+        f0: Fundamental per frame in Hz (0.0 = unvoiced), float32
+        confidence: Voicing confidence per frame (0.0 - 1.0), float32
+        frame_rate: Frames per second
+        origin: Song time of frame 0's centre in seconds
+        regions: Voiced regions as (start, end) song times, shape (n, 2)
+        onsets: Note onset song times in seconds
+        source: Content hash of the analysed audio
+    """
+
+    def __init__(self, f0: np.ndarray, confidence: np.ndarray, frame_rate: float,
+                 origin: float, regions: np.ndarray, onsets: np.ndarray, source: str = ''):
+        """Initialize a contour from its arrays."""
+        self.f0 = f0
+        self.confidence = confidence
+        self.frame_rate = frame_rate
+        self.origin = origin
+        self.regions = regions
+        self.onsets = onsets
+        self.source = source
+
+    @property
+    def duration(self) -> float:
+        """Song time covered by the contour in seconds."""
+        return len(self.f0) / self.frame_rate
+
+    def times(self) -> np.ndarray:
+        """Song time of every frame in seconds."""
+        return self.origin + np.arange(len(self.f0)) / self.frame_rate
+
+    def frame_at(self, song_time: float) -> int:
+        """Frame closest to `song_time`, clamped to the contour."""
+        index = int(round((song_time - self.origin) * self.frame_rate))
+        return min(max(index, 0), len(self.f0) - 1)
+
+    def save(self, path: Path) -> None:
+        """Write the contour as a compressed .npz (atomically)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + '.tmp.npz')
+        np.savez_compressed(
+            tmp, version=FORMAT_VERSION, source=self.source,
+            f0=self.f0, confidence=self.confidence,
+            frame_rate=self.frame_rate, origin=self.origin,
+            regions=self.regions, onsets=self.onsets,
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ReferenceContour':
+        """
+        Read a contour written by save().
+
+        Raises:
+            ValueError: File has an unknown format version
+        """
+        with np.load(path) as data:
+            if int(data['version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {int(data['version'])}")
+            return cls(
+                f0=data['f0'], confidence=data['confidence'],
+                frame_rate=float(data['frame_rate']), origin=float(data['origin']),
+                regions=data['regions'], onsets=data['onsets'], source=str(data['source']),
+            )
+
+
+def reference_path(filepath: str, directory: Optional[str] = None) -> Path:
+    """Where the contour of `filepath` is stored (by content hash)."""
+    return Path(directory or REFERENCE_PITCH_DIR) / f"{source_hash(filepath)}.npz"
+
+
+def voiced_regions(f0: np.ndarray, frame_rate: float, origin: float = 0.0) -> np.ndarray:
+    """
+    Runs of voiced frames as (start, end) times, bridging gaps shorter
+    than MAX_GAP_SECONDS.
+
+    Args:
+        f0: Contour (0.0 = unvoiced)
+        frame_rate: Frames per second
+        origin: Time of frame 0
+
+    Returns:
+        float32 array, shape (n, 2)
+    """
+    voiced = np.concatenate([[False], f0 > 0, [False]])
+    edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    if starts.size == 0:
+        # Silent or unvoiced track, or shorter than one frame
+        return np.zeros((0, 2), dtype=np.float32)
+    bridged = (starts[1:] - ends[:-1]) < MAX_GAP_SECONDS * frame_rate
+    starts = starts[np.concatenate([[True], ~bridged])]
+    ends = ends[np.concatenate([~bridged, [True]])]
+    keep = (ends - starts) >= MIN_REGION_SECONDS * frame_rate
+    regions = np.stack([starts[keep], ends[keep]], axis=1) / frame_rate + origin
+    return regions.astype(np.float32).reshape(-1, 2)
+
+
+def note_onsets(f0: np.ndarray, regions: np.ndarray, frame_rate: float,
+                origin: float = 0.0) -> np.ndarray:
+    """
+    Note onset times: the start of every voiced region, plus every jump of
+    at least ONSET_SEMITONES between voiced frames less than MAX_GAP_SECONDS
+    apart.
+
+    Returns:
+        Sorted float32 array of times in seconds
+    """
+    voiced = np.flatnonzero(f0 > 0)
+    semitones = 12 * np.log2(f0[voiced] / 440.0)
+    jumps = voiced[1:][
+        (np.abs(np.diff(semitones)) >= ONSET_SEMITONES)
+        & (np.diff(voiced) <= MAX_GAP_SECONDS * frame_rate)
+    ]
+    times = np.concatenate([regions[:, 0], jumps / frame_rate + origin])
+    return np.sort(times).astype(np.float32)
+
+
+def extract_reference(filepath: str) -> ReferenceContour:
+    """
+    Analyse a vocal track (slow; offline only).
+
+    Args:
+        filepath: Audio file, mixed down to mono
+
+    Returns:
+        ReferenceContour with times in song seconds
+    """
+    data, samplerate = sf.read(filepath, dtype='float32', always_2d=True)
+    tracker = PitchTracker(samplerate, capacity_seconds=len(data) / samplerate)
+    tracker.process(data.mean(axis=1))
+
+    times, f0, confidence = tracker.contour()
+    origin = float(times[0]) if len(times) else 0.0
+    frame_rate = float(tracker.FRAME_RATE)
+    regions = voiced_regions(f0, frame_rate, origin)
+    return ReferenceContour(
+        f0=f0.copy(), confidence=confidence.copy(), frame_rate=frame_rate,
+        origin=origin, regions=regions,
+        onsets=note_onsets(f0, regions, frame_rate, origin), source=source_hash(filepath),
+    )
+
+
+def load_reference(filepath: str, directory: Optional[str] = None) -> Optional[ReferenceContour]:
+    """
+    Stored contour of a track.
+
+    Args:
+        filepath: Audio file the contour was extracted from
+        directory: Store (default REFERENCE_PITCH_DIR)
+
+    Returns:
+        ReferenceContour, or None if the track was never extracted
+        (or the file is unreadable)
+    """
+    try:
+        path = reference_path(filepath, directory)
+    except OSError as e:
+        print(f"⚠️ Reference audio unavailable: {e}")
+        return None
+    if not path.exists():
+        return None
+    try:
+        return ReferenceContour.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Could not read reference pitch {path.name}: {e}")
+        return None
+
+
+def extract_and_store(filepath: str, directory: Optional[str] = None,
+                      force: bool = False) -> Path:
+    """
+    Extract a track's contour unless it is already stored.
+
+    Args:
+        filepath: Vocal track
+        directory: Store (default REFERENCE_PITCH_DIR)
+        force: Re-extract even if stored
+
+    Returns:
+        Path of the .npz
+    """
+    path = reference_path(filepath, directory)
+    if force or not path.exists():
+        started = time.perf_counter()
+        extract_reference(filepath).save(path)
+        print(f"🎼 Reference pitch of {Path(filepath).name} extracted "
+              f"in {time.perf_counter() - started:.1f}s")
+    return path
@@ -0,0 +1,348 @@
+"""
+Song catalog with background preloading.
+
+Every song is a folder under SONG_LIBRARY_DIR holding its stems, lyrics
+and video, described by a song.json manifest:
+
+    {
+        "title": "Energia da Revolução",
+        "artist": "IBP",
+        "audio": "mix.wav",
+        "instrumental": "instrumental.wav",
+        "vocals": "vocals.wav",
+        "lyrics": "lyrics.json",
+        "video": "video.mp4"
+    }
+
+Only "audio" (the headphone guide) is required; "lyrics" defaults to
+lyrics.json in the folder. The song configured by
+AUDIO_FILE / INSTRUMENTAL_FILE / LYRICS_FILE / VIDEO_FILE is always in
+the catalog as DEFAULT_SONG_ID.
+
+While the guest is still on the welcome or instructions screen, the
+library warms the audio cache for the song most likely to be played next
+(the guest's pick, otherwise the most played one) on a background
+thread, so the rehearsal starts without decoding anything. Warm songs
+are kept in least-recently-preloaded order and whole songs are evicted
+from the cache to keep the next one within the memory budget.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from config.app_config import (
+    AUDIO_CACHE_BUDGET_MB, AUDIO_FILE, AUDIO_SAMPLE_FORMAT, DEFAULT_SONG_ID,
+    INSTRUMENTAL_FILE, LYRICS_FILE, SONG_LIBRARY_DIR, VIDEO_FILE
+)
+from modules.audio_cache import AudioAssetCache, get_audio_cache
+from modules.pcm_assets import packed_asset, read_header
+
+
+MANIFEST_NAME = 'song.json'
+
+# Warms the cache for a song the way a screen will load it; returns the
+# threads doing the work (AudioRouter.preload)
+Preloader = Callable[['Song'], List[threading.Thread]]
+
+
+class Song:
+    """
+    One catalog entry.
+
+    Attributes:
+        song_id: Folder name (stable identifier)
+        title: Display title
+        artist: Display artist
+        audio: Headphone track (vocal guide mix)
+        instrumental: Speaker track, or None
+        vocals: Isolated vocal stem, or None
+        lyrics: Lyrics JSON (no lyrics are shown if it is missing)
+        video: Background video, or None
+    """
+
+    def __init__(self, song_id: str, title: str, audio: str,
+                 instrumental: Optional[str] = None, vocals: Optional[str] = None,
+                 lyrics: Optional[str] = None, video: Optional[str] = None,
+                 artist: str = ''):
+        """Initialize a song from file paths."""
+        self.song_id = song_id
+        self.title = title
+        self.artist = artist
+        self.audio = audio
+        self.instrumental = instrumental
+        self.vocals = vocals
+        self.lyrics = lyrics
+        self.video = video
+
+    @classmethod
+    def from_manifest(cls, manifest: Path) -> 'Song':
+        """
+        Load a song from its song.json manifest.
+
+        Raises:
+            ValueError: Manifest has no "audio" entry
+        """
+        with open(manifest, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        if not spec.get('audio'):
+            raise ValueError(f"{manifest} has no 'audio' entry")
+
+        folder = manifest.parent
+
+        def _path(name: str) -> Optional[str]:
+            return str(folder / spec[name]) if spec.get(name) else None
+
+        return cls(
+            song_id=folder.name,
+            title=spec.get('title', folder.name),
+            artist=spec.get('artist', ''),
+            audio=_path('audio'),
+            instrumental=_path('instrumental'),
+            vocals=_path('vocals'),
+            lyrics=str(folder / spec.get('lyrics', 'lyrics.json')),
+            video=_path('video'),
+        )
+
+    @property
+    def has_stems(self) -> bool:
+        """True if the song can be mixed from stems (instrumental + vocals)."""
+        return bool(self.instrumental and self.vocals)
+
+    @property
+    def reference(self) -> str:
+        """Track the reference melody is extracted from (the vocal stem if any)."""
+        return self.vocals or self.audio
+
+    @property
+    def tracks(self) -> List[str]:
+        """Audio files of the song that exist on disk."""
+        paths = [self.audio, self.instrumental, self.vocals]
+        return [p for p in paths if p and Path(p).exists()]
+
+    def __repr__(self) -> str:
+        return f"Song({self.song_id!r}, {self.title!r})"
+
+
+def default_song() -> Song:
+    """The song configured in app_config (always in the catalog)."""
+    return Song(
+        song_id=DEFAULT_SONG_ID,
+        title=Path(AUDIO_FILE).stem,
+        artist='IBP',
+        audio=AUDIO_FILE,
+        instrumental=INSTRUMENTAL_FILE,
+        lyrics=LYRICS_FILE,
+        video=VIDEO_FILE,
+    )
+
+
+def estimate_bytes(song: Song, sample_format: str = 'float32') -> int:
+    """
+    Memory a song's tracks will take in the cache at their native rate.
+
+    Read from the file headers only, so it is cheap enough to call
+    before deciding what to evict.
+    """
+    itemsize = np.dtype(sample_format).itemsize
+    total = 0
+    for path in song.tracks:
+        packed = packed_asset(path)
+        if packed is not None:
+            header = read_header(packed)
+            frames, channels = header['frames'], header['channels']
+        else:
+            info = sf.info(path)
+            frames, channels = info.frames, info.channels
+        total += frames * channels * itemsize
+    return total
+
+
+class SongLibrary:
+    """
+    Song catalog, the guest's selection and background preloading.
+
+    select() and preload() are called from the UI thread; the cache is
+    warmed on a "SongPreload" daemon thread, one song at a time.
+    """
+
+    def __init__(self, root: Optional[str] = SONG_LIBRARY_DIR,
+                 default: Optional[Song] = None,
+                 budget_bytes: int = AUDIO_CACHE_BUDGET_MB * 1024 * 1024,
+                 sample_format: str = AUDIO_SAMPLE_FORMAT,
+                 cache: Optional[AudioAssetCache] = None):
+        """
+        Initialize and index the catalog.
+
+        Args:
+            root: Folder with one subfolder per song (None = default only)
+            default: Song played when the guest picks none (also kept in
+                the catalog); None = first indexed song
+            budget_bytes: Memory the warm songs may take in the cache
+            sample_format: Sample type tracks are cached in ('float32' or
+                'int16'), for size estimates and the default preloader
+            cache: Audio cache to warm (default: the process-wide one)
+        """
+        self.root = Path(root) if root else None
+        self.budget_bytes = budget_bytes
+        self.sample_format = sample_format
+        self.cache = cache or get_audio_cache()
+        self.default = default
+        self.songs: Dict[str, Song] = {}
+        self.default_id: Optional[str] = None
+        self.play_counts: Dict[str, int] = {}
+        self._selected: Optional[str] = None
+        self._preloaders: List[Preloader] = []
+        self._warm: "OrderedDict[str, int]" = OrderedDict()  # song_id -> bytes
+        self._lock = threading.Lock()
+
+        self.scan()
+
+    def scan(self) -> None:
+        """(Re)index the catalog folder."""
+        songs: Dict[str, Song] = {}
+        if self.default is not None:
+            songs[self.default.song_id] = self.default
+
+        if self.root is not None and self.root.is_dir():
+            for manifest in sorted(self.root.glob(f'*/{MANIFEST_NAME}')):
+                try:
+                    song = Song.from_manifest(manifest)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Skipping song {manifest.parent.name}: {e}")
+                    continue
+                songs[song.song_id] = song
+
+        self.songs = songs
+        if self.default is not None:
+            self.default_id = self.default.song_id
+        else:
+            self.default_id = next(iter(songs), None)
+        print(f"🎵 Song library: {len(songs)} song(s)")
+
+    def get(self, song_id: str) -> Song:
+        """
+        Look up a song.
+
+        Raises:
+            KeyError: No song with that id
+        """
+        return self.songs[song_id]
+
+    def select(self, song_id: str) -> Song:
+        """
+        Pick the song for the current guest and start warming it.
+
+        Raises:
+            KeyError: No song with that id
+        """
+        song = self.get(song_id)
+        self._selected = song_id
+        self.preload(song)
+        return song
+
+    @property
+    def current(self) -> Optional[Song]:
+        """Song the screens will play: the guest's pick or the most likely one."""
+        if self._selected in self.songs:
+            return self.songs[self._selected]
+        return self.most_likely()
+
+    def most_likely(self) -> Optional[Song]:
+        """Most played song so far (the default song until one was played)."""
+        if not self.songs:
+            return None
+        best = self.default_id if self.default_id in self.songs else next(iter(self.songs))
+        for song_id, count in self.play_counts.items():
+            if song_id in self.songs and count > self.play_counts.get(best, 0):
+                best = song_id
+        return self.songs[best]
+
+    def record_play(self, song: Song) -> None:
+        """Count a performance and clear the guest's pick for the next guest."""
+        self.play_counts[song.song_id] = self.play_counts.get(song.song_id, 0) + 1
+        self._selected = None
+
+    def add_preloader(self, preloader: Preloader) -> None:
+        """
+        Register how a screen warms a song (e.g. at its devices' rates).
+
+        Without preloaders the tracks are cached at their native rate.
+        """
+        self._preloaders.append(preloader)
+
+    def preload(self, song: Optional[Song] = None) -> Optional[threading.Thread]:
+        """
+        Warm the cache for a song on a background thread.
+
+        Args:
+            song: Song to warm (default: current)
+
+        Returns:
+            The started daemon thread, or None without a song
+        """
+        song = song or self.current
+        if song is None:
+            return None
+        thread = threading.Thread(target=self._preload, args=(song,),
+                                  daemon=True, name="SongPreload")
+        thread.start()
+        return thread
+
+    def _preload(self, song: Song) -> None:
+        """Evict other songs to make room, then warm one (preload thread)."""
+        with self._lock:
+            try:
+                started = time.perf_counter()
+                self._make_room(song, estimate_bytes(song, self.sample_format))
+                threads = []
+                if self._preloaders:
+                    for preloader in self._preloaders:
+                        threads.extend(preloader(song) or [])
+                else:
+                    threads.append(self.cache.preload(song.tracks, None, self.sample_format))
+                for thread in threads:
+                    thread.join()
+                self._warm[song.song_id] = sum(self.cache.nbytes(p) for p in song.tracks)
+                self._warm.move_to_end(song.song_id)
+                print(
+                    f"🎵 Preloaded '{song.title}' "
+                    f"({self._warm[song.song_id] / 1024 / 1024:.0f} MB) "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
+            except Exception as e:
+                print(f"⚠️ Song preload failed for '{song.title}': {e}")
+
+    def _make_room(self, song: Song, needed: int) -> None:
+        """Evict least recently preloaded songs until `song` fits. Lock held."""
+        needed = max(needed, self._warm.pop(song.song_id, 0))
+        while self._warm and sum(self._warm.values()) + needed > self.budget_bytes:
+            song_id, _ = self._warm.popitem(last=False)
+            evicted = self.songs.get(song_id)
+            if evicted is None:
+                continue
+            freed = sum(self.cache.evict(p) for p in evicted.tracks)
+            print(f"🧹 Evicted '{evicted.title}' from the audio cache ({freed / 1024 / 1024:.0f} MB)")
+
+    @property
+    def warm_songs(self) -> List[str]:
+        """Ids of the songs currently preloaded, least recent first."""
+        return list(self._warm)
+
+
+_library: Optional[SongLibrary] = None
+_library_lock = threading.Lock()
+
+
+def get_song_library() -> SongLibrary:
+    """Return the process-wide song library, indexing it on first use."""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = SongLibrary(default=default_song())
+        return _library
@@ -0,0 +1,196 @@
+"""
+Xrun-driven stream profile tuning for IBP-KaraokeLive.
+
+Each output device starts with the stream profile remembered for it in
+the latency profile (AUDIO_STREAM_PROFILE for a new device). The stream
+callback reports every block to the device's XrunTuner; once
+XRUN_THRESHOLD_PER_MINUTE output underflows fall within a minute the
+tuner moves the device to the next safer profile, and the profile it
+failed becomes out of reach for good. After XRUN_STEP_DOWN_SECONDS of
+streaming without an underflow the device has proven itself and the
+tuner tries the next lower-latency profile it has not failed. Either
+change is saved, so the next stream (and the next boot) opens with it.
+"""
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from config.app_config import (
+    AUDIO_STREAM_PROFILE_ORDER,
+    AUDIO_STREAM_PROFILES,
+    XRUN_STEP_DOWN_SECONDS,
+    XRUN_THRESHOLD_PER_MINUTE,
+)
+from modules.latency_calibration import LatencyProfile
+
+
+class XrunTuner:
+    """
+    Underflow counter and profile selector for one output device.
+
+    record_underflow() and record_clean() run on the audio thread:
+    underflow times go into a preallocated ring of the last `threshold`
+    underflows compared with the oldest one, and clean streaming time is
+    a running sum, so both cost O(1) and allocate nothing. escalate() and
+    step_down() do the file I/O and must be called from another thread.
+    A new profile only takes effect when the stream is reopened, so no
+    further change is requested until mark_opened() is called for the
+    reopened stream.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, device_name: str, profile: LatencyProfile,
+                 threshold: int = XRUN_THRESHOLD_PER_MINUTE,
+                 step_down_seconds: float = XRUN_STEP_DOWN_SECONDS):
+        """
+        Initialize tuner.
+
+        Args:
+            device_name: Device name as reported by sd.query_devices
+            profile: Latency profile the chosen stream profile is saved in
+            threshold: Underflows per minute that trigger an escalation
+            step_down_seconds: Underflow-free streaming that triggers a
+                step down
+        """
+        self.device_name = device_name
+        self.profile = profile
+        self.profile_name = profile.get_stream_profile(device_name)
+        self.floor = profile.get_stream_floor(device_name)
+        self.threshold = max(1, threshold)
+        self.step_down_seconds = step_down_seconds
+        self.underflows = 0  # Total since the tuner was created
+        self.clean_seconds = 0.0  # Streamed since the last underflow or profile change
+        self.pending = False  # Profile changed or change requested, stream not reopened yet
+        self._times = np.full(self.threshold, -np.inf)
+        self._index = 0
+
+    @property
+    def settings(self) -> Dict:
+        """Stream settings ('blocksize', 'latency') of the current profile."""
+        return AUDIO_STREAM_PROFILES[self.profile_name]
+
+    @property
+    def next_profile(self) -> Optional[str]:
+        """The next safer profile, or None if already at the safest."""
+        index = AUDIO_STREAM_PROFILE_ORDER.index(self.profile_name)
+        if index + 1 < len(AUDIO_STREAM_PROFILE_ORDER):
+            return AUDIO_STREAM_PROFILE_ORDER[index + 1]
+        return None
+
+    @property
+    def previous_profile(self) -> Optional[str]:
+        """The next lower-latency profile not below the floor, or None."""
+        index = AUDIO_STREAM_PROFILE_ORDER.index(self.profile_name)
+        if index > AUDIO_STREAM_PROFILE_ORDER.index(self.floor):
+            return AUDIO_STREAM_PROFILE_ORDER[index - 1]
+        return None
+
+    def record_underflow(self, now: Optional[float] = None) -> bool:
+        """
+        Count one output underflow (audio-thread safe).
+
+        Args:
+            now: Host time of the underflow (default perf_counter)
+
+        Returns:
+            True once, when `threshold` underflows happened within a
+            minute, a safer profile exists and no change is pending
+        """
+        if now is None:
+            now = time.perf_counter()
+        self.underflows += 1
+        self.clean_seconds = 0.0
+        self._times[self._index] = now
+        self._index = (self._index + 1) % self.threshold
+        # The next slot holds the oldest of the last `threshold` underflows
+        oldest = self._times[self._index]
+        if (now - oldest > self.WINDOW_SECONDS or self.pending
+                or self.next_profile is None):
+            return False
+        self.pending = True
+        return True
+
+    def record_clean(self, seconds: float) -> bool:
+        """
+        Count streamed time without an underflow (audio-thread safe).
+
+        Args:
+            seconds: Duration of the block just delivered
+
+        Returns:
+            True once, when `step_down_seconds` have been streamed since
+            the last underflow and a lower-latency profile above the
+            floor exists
+        """
+        self.clean_seconds += seconds
+        if (self.clean_seconds < self.step_down_seconds or self.pending
+                or self.previous_profile is None):
+            return False
+        self.pending = True
+        return True
+
+    def mark_opened(self) -> None:
+        """Note that a stream was opened with the current profile."""
+        self._times.fill(-np.inf)
+        self.pending = False
+
+    def escalate(self) -> bool:
+        """
+        Switch to the next safer profile and save it for this device.
+
+        The profile left behind becomes the device's floor: it is never
+        stepped down to again.
+
+        Returns:
+            True if the profile changed
+        """
+        next_profile = self.next_profile
+        if next_profile is None:
+            return False
+
+        print(
+            f"🐢 {self.device_name}: {self.threshold} underflows within a minute, "
+            f"stream profile {self.profile_name} → {next_profile}"
+        )
+        self.floor = next_profile
+        self._switch(next_profile)
+        return True
+
+    def step_down(self) -> bool:
+        """
+        Switch to the next lower-latency profile and save it for this device.
+
+        Returns:
+            True if the profile changed
+        """
+        previous_profile = self.previous_profile
+        if previous_profile is None or self.clean_seconds < self.step_down_seconds:
+            # An underflow since the request: not proven after all
+            self.pending = False
+            return False
+
+        print(
+            f"🐇 {self.device_name}: {self.clean_seconds / 60:.0f} min without underflows, "
+            f"stream profile {self.profile_name} → {previous_profile}"
+        )
+        self._switch(previous_profile)
+        return True
+
+    def _switch(self, profile_name: str) -> None:
+        """Adopt a profile and save it (with the floor) for this device."""
+        self.profile_name = profile_name
+        self.clean_seconds = 0.0
+        self.pending = True
+        self.profile.set_stream_profile(self.device_name, profile_name)
+        self.profile.set_stream_floor(self.device_name, self.floor)
+        try:
+            # Merge into the file on disk: other routers keep their own
+            # LatencyProfile instance
+            stored = LatencyProfile.load(self.profile.path)
+            stored.set_stream_profile(self.device_name, profile_name)
+            stored.set_stream_floor(self.device_name, self.floor)
+            stored.save()
+        except OSError as e:
+            print(f"⚠️ Could not save stream profile for {self.device_name}: {e}")
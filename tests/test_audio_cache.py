@@ -0,0 +1,120 @@
+"""
+Tests for the process-wide decoded-audio cache.
+
+Verifies zero-copy hits, read-only sharing, mtime invalidation, LRU
+eviction under the memory budget, int16 storage and the on-disk
+resample cache.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.audio_cache import AudioAssetCache
+
+
+def _write_wav(path: Path, frames: int = 48000, sr: int = 48000) -> None:
+    """Write a short stereo 16-bit noise file."""
+    data = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, 2))
+    sf.write(str(path), data, sr, subtype='PCM_16')
+
+
+def test_hit_returns_same_read_only_array():
+    """A second get() shares the first decode without copying."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'song.wav'
+        _write_wav(path)
+        cache = AudioAssetCache(budget_bytes=64 * 1024 * 1024)
+
+        first, sr = cache.get(str(path))
+        second, _ = cache.get(str(path))
+
+        assert sr == 48000
+        assert first is second, "Cache hit should not copy"
+        assert not first.flags.writeable, "Cached audio must be read-only"
+        assert (cache.hits, cache.misses) == (1, 1)
+        print("✅ Cache hit shares the decoded array")
+
+
+def test_modified_file_is_reloaded():
+    """Changing the file's mtime invalidates the entry."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'song.wav'
+        _write_wav(path)
+        cache = AudioAssetCache(budget_bytes=64 * 1024 * 1024)
+
+        first, _ = cache.get(str(path))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second, _ = cache.get(str(path))
+
+        assert first is not second
+        assert cache.size_bytes == second.nbytes, "Stale entry should be dropped"
+        print("✅ Modified file decoded again")
+
+
+def test_lru_eviction_respects_budget():
+    """Least recently used entries are evicted beyond the budget."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(tmp) / f'song{i}.wav' for i in range(3)]
+        for path in paths:
+            _write_wav(path)
+
+        entry_bytes = 48000 * 2 * 4
+        cache = AudioAssetCache(budget_bytes=2 * entry_bytes)
+        cache.get(str(paths[0]))
+        cache.get(str(paths[1]))
+        cache.get(str(paths[0]))  # Touch song0 so song1 is LRU
+        cache.get(str(paths[2]))
+
+        assert cache.size_bytes <= cache.budget_bytes
+        cache.get(str(paths[0]))
+        assert cache.hits == 2, "song0 should still be cached"
+        cache.get(str(paths[1]))
+        assert cache.misses == 4, "song1 should have been evicted"
+        print("✅ LRU eviction keeps cache within budget")
+
+
+def test_int16_entry_is_half_size():
+    """int16 and float32 copies of a file are cached separately."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'song.wav'
+        _write_wav(path)
+        cache = AudioAssetCache(budget_bytes=64 * 1024 * 1024)
+
+        floats, _ = cache.get(str(path))
+        ints, _ = cache.get(str(path), dtype='int16')
+
+        assert ints.dtype == np.int16 and not ints.flags.writeable
+        assert ints.nbytes * 2 == floats.nbytes
+        assert np.array_equal(ints / 32768.0, floats)
+        assert cache.get(str(path), dtype='int16')[0] is ints
+        print(f"✅ int16 entry: {ints.nbytes} bytes vs {floats.nbytes}")
+
+
+def test_resampled_copy_is_memory_mapped_from_disk():
+    """A track at another rate is resampled once and memory-mapped afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'song.wav'
+        _write_wav(path, frames=44100, sr=44100)
+        disk_dir = Path(tmp) / 'resampled'
+
+        first, sr = AudioAssetCache(64 * 1024 * 1024, str(disk_dir)).get(str(path), 48000)
+        assert sr == 48000 and len(first) == 48000
+        cached = list(disk_dir.glob('*_48000.npy'))
+        assert len(cached) == 1, "Resampled copy should be written to disk"
+
+        # A fresh process (new cache) maps the file instead of resampling
+        second, _ = AudioAssetCache(64 * 1024 * 1024, str(disk_dir)).get(str(path), 48000)
+        assert isinstance(second, np.memmap), "Disk hit should be memory-mapped"
+        assert not second.flags.writeable
+        assert np.array_equal(first, second)
+        print(f"✅ Resampled copy cached as {cached[0].name}")
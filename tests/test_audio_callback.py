@@ -0,0 +1,304 @@
+"""
+Allocation test for the AudioRouter real-time callback.
+
+Runs the stream callback directly on the offline backend (no audio
+device is opened, PortAudio is not needed) under tracemalloc and checks
+that rendering a block never allocates sample buffers. Only small, short-lived Python objects (ints, the clock anchor
+tuple) are allowed, so GC pressure from Kivy cannot turn into xruns.
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.app_config import AUDIO_STREAM_PROFILES
+from modules.audio_capture import CaptureBuffer
+from modules.audio_router import AudioRouter
+from modules.audio_sources import ArraySource, MixSource
+from modules.offline_backend import OfflineBackend
+
+BLOCKSIZE = AUDIO_STREAM_PROFILES['safe']['blocksize']
+CALLBACKS = 200
+
+# Budget for small objects (array views, ufunc iterator state): far below
+# one block of float32 stereo (16 KiB)
+MAX_BYTES_PER_CALLBACK = 2048
+
+
+class FakeTimeInfo:
+    """Minimal stand-in for the PortAudio time_info struct."""
+    currentTime = 1.0
+    outputBufferDacTime = 1.02
+
+
+def _measure(source_channels: int, device_channels: int, dtype: str = 'float32',
+             ramping: bool = False, stems: bool = False):
+    """Render CALLBACKS blocks and return (peak bytes, net bytes, blocks)."""
+    frames = BLOCKSIZE * CALLBACKS + BLOCKSIZE // 2  # Last block is padded
+    data = np.random.default_rng(0).uniform(
+        -0.5, 0.5, (frames, source_channels)
+    )
+    data = (data * 32767).astype('int16') if dtype == 'int16' else data.astype('float32')
+
+    router = AudioRouter(backend=OfflineBackend())
+    router.sample_rate = 48000
+    router.clock.reset(48000, ['headphone'])
+    source = ArraySource(data, 48000)
+    if stems:
+        # Mono vocal stem mixed over the instrumental, guide gain ramping
+        source = MixSource(source, ArraySource(data[:, 0].copy(), 48000),
+                           vocal_gain=0.0, blocksize=BLOCKSIZE)
+        source.set_vocal_gain(1.0, 2 * frames / 48000)
+    router.stream_sources['headphone'] = source
+    callback = router._make_callback('headphone', device_channels, BLOCKSIZE, 48000)
+    outdata = np.zeros((BLOCKSIZE, device_channels), dtype='float32')
+    time_info = FakeTimeInfo()
+    if ramping:
+        # A fade long enough to ramp every measured block
+        router.gains['headphone'].ramp_to(0.0, 2 * frames / 48000)
+
+    # Warm up (first-call caches, int objects) before measuring
+    callback(outdata, BLOCKSIZE, time_info, 0)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks = 0
+        for _ in range(CALLBACKS):
+            callback(outdata, BLOCKSIZE, time_info, 0)
+            blocks += 1
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak - baseline, current - baseline, blocks
+
+
+def test_callback_does_not_allocate_buffers():
+    """Same channel count: samples are copied straight into outdata."""
+    peak, net, blocks = _measure(source_channels=2, device_channels=2)
+    print(f"   Peak transient: {peak} bytes, net: {net} bytes over {blocks} callbacks")
+    assert peak < MAX_BYTES_PER_CALLBACK, f"Callback allocated {peak} bytes"
+    assert net < MAX_BYTES_PER_CALLBACK, f"Callback leaked {net} bytes"
+    print("✅ Stereo callback is allocation-free")
+
+
+def test_mixdown_does_not_allocate_buffers():
+    """Stereo audio on a mono device mixes down in preallocated buffers."""
+    peak, net, blocks = _measure(source_channels=2, device_channels=1)
+    print(f"   Peak transient: {peak} bytes, net: {net} bytes over {blocks} callbacks")
+    assert peak < MAX_BYTES_PER_CALLBACK, f"Mixdown allocated {peak} bytes"
+    assert net < MAX_BYTES_PER_CALLBACK, f"Mixdown leaked {net} bytes"
+    print("✅ Mixdown callback is allocation-free")
+
+
+def test_int16_callback_does_not_allocate_buffers():
+    """int16 tracks are converted into outdata in place."""
+    for device_channels in (2, 1):
+        peak, net, blocks = _measure(2, device_channels, dtype='int16')
+        print(f"   {device_channels} ch: peak {peak} bytes, net {net} bytes over {blocks} callbacks")
+        assert peak < MAX_BYTES_PER_CALLBACK, f"int16 callback allocated {peak} bytes"
+        assert net < MAX_BYTES_PER_CALLBACK, f"int16 callback leaked {net} bytes"
+    print("✅ int16 callback is allocation-free")
+
+
+def test_gain_ramp_does_not_allocate_buffers():
+    """Fades are computed into the ramp's preallocated buffers."""
+    peak, net, blocks = _measure(source_channels=2, device_channels=2, ramping=True)
+    print(f"   Peak transient: {peak} bytes, net: {net} bytes over {blocks} callbacks")
+    assert peak < MAX_BYTES_PER_CALLBACK, f"Ramp allocated {peak} bytes"
+    assert net < MAX_BYTES_PER_CALLBACK, f"Ramp leaked {net} bytes"
+    print("✅ Gain ramp is allocation-free")
+
+
+def test_stem_mix_does_not_allocate_buffers():
+    """Stem mode mixes the guide vocal into outdata from preallocated scratch."""
+    peak, net, blocks = _measure(source_channels=2, device_channels=2, stems=True)
+    print(f"   Peak transient: {peak} bytes, net: {net} bytes over {blocks} callbacks")
+    assert peak < MAX_BYTES_PER_CALLBACK, f"Stem mix allocated {peak} bytes"
+    assert net < MAX_BYTES_PER_CALLBACK, f"Stem mix leaked {net} bytes"
+    print("✅ Stem mix is allocation-free")
+
+
+def test_cue_fades_in_to_master_volume():
+    """A cued start ramps from silence up to the device's volume."""
+    data = np.ones((8 * BLOCKSIZE, 1), dtype='float32')
+    router = AudioRouter(backend=OfflineBackend())
+    router.volumes['headphone'] = 0.5
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(data, 48000)
+    callback = router._make_callback('headphone', 1, BLOCKSIZE, 48000)
+    outdata = np.zeros((BLOCKSIZE, 1), dtype='float32')
+    fade = int(round(router.fade_in * 48000))
+
+    router.cues['headphone'] = (0, router.backend.now() + 0.030)
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+
+    lead = int(np.argmax(outdata[:, 0] > 0))
+    ramp = outdata[lead:lead + fade, 0]
+    assert 0.0 < ramp[0] < 0.001, "Fade starts from silence at the cued frame"
+    assert np.all(np.diff(ramp) > 0), "Fade-in rises monotonically"
+    assert np.allclose(outdata[lead + fade - 1:, 0], 0.5), "Fade ends at the master volume"
+    print(f"✅ Cue faded in over {fade} frames after {lead} frames of lead-in")
+
+
+def test_last_block_is_zero_padded():
+    """The final partial block is padded with silence in place."""
+    data = np.ones((BLOCKSIZE + 10, 2), dtype='float32')
+    router = AudioRouter(backend=OfflineBackend())
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(data, 48000)
+    callback = router._make_callback('headphone', 2, BLOCKSIZE, 48000)
+    outdata = np.full((BLOCKSIZE, 2), 7.0, dtype='float32')
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+
+    assert np.all(outdata[:10] == 1.0)
+    assert np.all(outdata[10:] == 0.0)
+    print("✅ Last block padded with zeros")
+
+
+def test_persistent_callback_swaps_sources():
+    """A warm stream plays silence until a source is assigned, then idles again."""
+    router = AudioRouter(persistent=True, backend=OfflineBackend())
+    router.clock.reset(48000, ['headphone'])
+    callback = router._make_callback('headphone', 2, BLOCKSIZE, 48000, persistent=True)
+    outdata = np.full((BLOCKSIZE, 2), 7.0, dtype='float32')
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    assert np.all(outdata == 0.0), "Idle stream should output silence"
+
+    router.stream_sources['headphone'] = ArraySource(
+        np.ones((BLOCKSIZE, 2), dtype='float32'), 48000
+    )
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    assert np.all(outdata == 1.0), "Source should start at the next block"
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    assert np.all(outdata == 0.0)
+    assert router.stream_sources['headphone'] is None, "Finished source is detached"
+    assert router.clock.is_finished()
+    print("✅ Warm stream swaps sources at block boundaries")
+
+
+def test_scheduled_start_pads_lead_in():
+    """A start scheduled after the block's DAC time begins with silence."""
+    data = np.ones((4 * BLOCKSIZE, 2), dtype='float32')
+    router = AudioRouter(backend=OfflineBackend())
+    router.fade_in = 0.0  # Compare raw samples
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(data, 48000)
+    callback = router._make_callback('headphone', 2, BLOCKSIZE, 48000)
+    outdata = np.full((BLOCKSIZE, 2), 7.0, dtype='float32')
+
+    # FakeTimeInfo puts the block 20 ms ahead; start 10 ms after that
+    router.cues['headphone'] = (None, router.backend.now() + 0.030)
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+
+    lead = int(np.argmax(outdata[:, 0] == 1.0))
+    assert 400 <= lead <= 480, f"Expected ~10 ms of lead-in, got {lead} frames"
+    assert np.all(outdata[:lead] == 0.0)
+    assert np.all(outdata[lead:] == 1.0)
+    assert router.stream_sources['headphone'].position == BLOCKSIZE - lead
+    print(f"✅ Scheduled start padded {lead} frames of silence")
+
+
+def test_seek_cue_jumps_at_block_boundary():
+    """A cued frame is heard at the scheduled time and the position follows."""
+    data = np.arange(8 * BLOCKSIZE, dtype='float32').reshape(-1, 1)
+    router = AudioRouter(backend=OfflineBackend())
+    router.fade_in = 0.0  # Compare raw samples
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(data, 48000)
+    callback = router._make_callback('headphone', 1, BLOCKSIZE, 48000)
+    outdata = np.zeros((BLOCKSIZE, 1), dtype='float32')
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    target = 5 * BLOCKSIZE
+    router.cues['headphone'] = (target, router.backend.now() + 0.030)
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+
+    lead = int(np.argmax(outdata[:, 0] == target))
+    assert 400 <= lead <= 480, f"Expected ~10 ms of lead-in, got {lead} frames"
+    assert np.all(outdata[:lead] == 0.0)
+    assert np.array_equal(outdata[lead:, 0], np.arange(target, target + BLOCKSIZE - lead))
+    assert router.clock.get_position() == target / 48000, "Position jumps with the cue"
+    print(f"✅ Seek cue heard after {lead} frames of lead-in")
+
+
+def test_loop_wraps_inside_block():
+    """The cursor wraps to the loop start mid-block, without a gap."""
+    data = np.arange(4 * BLOCKSIZE, dtype='float32').reshape(-1, 1)
+    router = AudioRouter(backend=OfflineBackend())
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(data, 48000)
+    router.loops['headphone'] = (100, BLOCKSIZE + 300)
+    callback = router._make_callback('headphone', 1, BLOCKSIZE, 48000)
+    outdata = np.zeros((BLOCKSIZE, 1), dtype='float32')
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+
+    expected = np.concatenate([
+        np.arange(BLOCKSIZE, BLOCKSIZE + 300),
+        np.arange(100, 100 + BLOCKSIZE - 300),
+    ])
+    assert np.array_equal(outdata[:, 0], expected)
+    assert router.stream_sources['headphone'].position == 100 + BLOCKSIZE - 300
+    print("✅ Loop wraps sample-accurately inside a block")
+
+
+def test_pause_holds_cursor():
+    """While paused the callback outputs silence and does not advance."""
+    data = np.ones((4 * BLOCKSIZE, 2), dtype='float32')
+    router = AudioRouter(backend=OfflineBackend())
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = source = ArraySource(data, 48000)
+    callback = router._make_callback('headphone', 2, BLOCKSIZE, 48000)
+    outdata = np.full((BLOCKSIZE, 2), 7.0, dtype='float32')
+
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    router.paused.set()
+    callback(outdata, BLOCKSIZE, FakeTimeInfo(), 0)
+    assert np.all(outdata == 0.0)
+    assert source.position == BLOCKSIZE, "Cursor must hold while paused"
+    print("✅ Pause holds the cursor")
+
+
+class FakeDuplexTimeInfo(FakeTimeInfo):
+    """time_info of a full-duplex stream: input captured 10 ms ago."""
+    inputBufferAdcTime = 0.99
+
+
+def test_duplex_capture_is_aligned_with_playback():
+    """Mic blocks are tagged with the song frame heard when they were captured."""
+    router = AudioRouter(duplex=True, backend=OfflineBackend())
+    router.clock.reset(48000, ['headphone'])
+    router.stream_sources['headphone'] = ArraySource(
+        np.ones((4 * BLOCKSIZE, 2), dtype='float32'), 48000
+    )
+    render = router._make_callback('headphone', 2, BLOCKSIZE, 48000)
+    callback = router._make_duplex_callback('headphone', render, 48000)
+    router.captures['headphone'] = capture = CaptureBuffer(48000)
+    outdata = np.zeros((BLOCKSIZE, 2), dtype='float32')
+    indata = np.arange(2 * BLOCKSIZE, dtype='float32').reshape(2, BLOCKSIZE, 1)
+
+    callback(indata[0], outdata, BLOCKSIZE, FakeDuplexTimeInfo(), 0)
+    callback(indata[1], outdata, BLOCKSIZE, FakeDuplexTimeInfo(), 0)
+
+    # Captured 10 ms before "now", played 20 ms after: 30 ms = 1440 frames
+    # (within 1 ms: "now" is read separately for playback and capture)
+    assert abs(capture.origin_frame - (-1440)) <= 48, capture.origin_frame
+    out = np.zeros((2 * BLOCKSIZE, 1), dtype='float32')
+    count, first = capture.read_into(out)
+    assert count == 2 * BLOCKSIZE and first == capture.origin_frame
+    assert np.array_equal(out[:, 0], np.arange(2 * BLOCKSIZE)), "Capture must be contiguous"
+    print(f"✅ Duplex capture origin at song frame {capture.origin_frame}")
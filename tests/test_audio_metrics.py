@@ -0,0 +1,87 @@
+"""
+Tests for the audio engine health metrics.
+
+Checks the callback load histogram against the block budget, xrun and
+drift counters, and the per-session JSON-lines dump.
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.audio_metrics import LOAD_BINS, AudioMetrics, StreamMetrics
+
+
+class FakeStatus:
+    """Minimal stand-in for sd.CallbackFlags."""
+    def __init__(self, underflow=False, overflow=False):
+        self.output_underflow = underflow
+        self.output_overflow = overflow
+        self.input_overflow = False
+
+
+def test_load_histogram_uses_block_budget():
+    """Callback durations are binned as a fraction of blocksize / rate."""
+    metrics = StreamMetrics()
+    metrics.configure(blocksize=480, samplerate=48000)  # 10 ms budget
+
+    for duration in (0.0005, 0.0015, 0.0085, 0.012):
+        metrics.record_callback(duration, 480)
+
+    snapshot = metrics.snapshot()
+    histogram = snapshot['load_histogram']
+    assert len(histogram) == LOAD_BINS
+    assert histogram[0] == 1 and histogram[1] == 1 and histogram[8] == 1
+    assert snapshot['over_budget'] == 1
+    assert snapshot['near_misses'] == 2
+    assert snapshot['frames'] == 4 * 480
+    assert abs(snapshot['max_load'] - 1.2) < 1e-9
+    print(f"✅ Load histogram: {histogram}")
+
+
+def test_status_and_drift_counters():
+    """Xrun flags and drift samples are counted per session."""
+    metrics = AudioMetrics()
+    metrics.start_session(mode='performance', track='song.wav')
+    headphone = metrics.streams['headphone']
+    headphone.record_status(FakeStatus(underflow=True))
+    headphone.record_status(FakeStatus(overflow=True))
+    for drift in (0.001, -0.003, 0.002):
+        metrics.drift.record(drift)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['track'] == 'song.wav'
+    assert snapshot['streams']['headphone']['xruns'] == 2
+    assert snapshot['streams']['headphone']['underflows'] == 1
+    assert snapshot['streams']['headphone']['overflows'] == 1
+    assert abs(snapshot['drift']['max_abs_ms'] - 3.0) < 1e-9
+    assert abs(snapshot['drift']['last_ms'] - 2.0) < 1e-9
+
+    metrics.start_session(mode='rehearsal')
+    assert metrics.snapshot()['streams']['headphone']['xruns'] == 0
+    print("✅ Counters reset per session")
+
+
+def test_dump_appends_one_line_per_session():
+    """Each session is appended once as a JSON line."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'metrics' / 'audio.jsonl')
+        metrics = AudioMetrics()
+
+        assert metrics.dump(path) is None, "No session yet"
+        metrics.start_session(track='a.wav')
+        metrics.dump(path)
+        metrics.dump(path)  # Already dumped - ignored
+        metrics.start_session(track='b.wav')
+        metrics.dump(path)
+
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [r['track'] for r in records] == ['a.wav', 'b.wav']
+        assert 'host' in records[0] and 'streams' in records[0]
+        print(f"✅ {len(records)} sessions dumped")
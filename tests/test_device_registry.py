@@ -0,0 +1,83 @@
+"""
+Tests for the audio output device registry.
+
+Uses a fake enumeration (the same device listed under several host
+APIs, as on Windows) instead of real hardware.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.device_registry import DeviceRegistry
+
+HOSTAPIS = [{'name': 'MME'}, {'name': 'Windows WASAPI'}]
+SPECS = {
+    'headphone': {'name': 'usb audio', 'hostapi': 'MME', 'channels': 2},
+    'speaker': {'name': 'Realtek', 'hostapi': 'WASAPI', 'channels': 2},
+}
+
+
+def _device(index, name, hostapi, outputs):
+    return {'index': index, 'name': name, 'hostapi': hostapi,
+            'max_output_channels': outputs, 'default_samplerate': 48000.0}
+
+
+def _registry(devices):
+    """Registry whose enumeration returns `devices` (no PortAudio calls)."""
+    registry = DeviceRegistry(SPECS)
+
+    def _enumerate():
+        registry._devices = list(devices)
+        registry._hostapis = HOSTAPIS
+
+    registry._enumerate = _enumerate
+    return registry
+
+
+def test_resolves_by_name_hostapi_and_channels():
+    """The first output matching all three criteria wins."""
+    registry = _registry([
+        _device(0, 'Microphone (USB Audio Device)', 0, 0),
+        _device(1, 'Speakers (Realtek(R) Audio)', 0, 2),
+        _device(2, 'Speakers (USB Audio Device)', 0, 2),
+        _device(3, 'Speakers (Realtek(R) Audio)', 1, 2),
+        _device(4, 'Speakers (USB Audio Device)', 1, 2),
+    ])
+    assert registry.resolve('headphone') == 2
+    assert registry.resolve('speaker') == 3
+    assert registry.find('Realtek', channels=8) is None
+    print("✅ Devices resolved by name, host API and channels")
+
+
+def test_refresh_follows_reenumeration():
+    """After a refresh the key resolves to the device's new index."""
+    devices = [
+        _device(0, 'Speakers (USB Audio Device)', 0, 2),
+        _device(1, 'Speakers (Realtek(R) Audio)', 1, 2),
+    ]
+    registry = _registry(devices)
+    events = []
+    registry.add_listener(lambda: events.append('suspend'), lambda: events.append('resume'))
+
+    assert registry.resolve('headphone') == 0
+    devices.reverse()
+    for index, device in enumerate(devices):
+        device['index'] = index
+    assert registry.resolve('headphone') == 0, "Resolution is cached until refresh"
+
+    resolved = registry.refresh()
+    assert resolved == {'headphone': 1, 'speaker': 0}
+    assert events == ['resume'], "Only a rescan suspends the streams"
+    print("✅ Refresh re-resolves re-enumerated devices")
+
+
+def test_missing_device_resolves_to_none():
+    """An unplugged device is reported as None, not a wrong index."""
+    registry = _registry([_device(0, 'Speakers (Realtek(R) Audio)', 1, 2)])
+    assert registry.resolve('headphone') is None
+    assert registry.resolve('speaker') == 0
+    print("✅ Missing device resolves to None")
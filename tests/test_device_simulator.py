@@ -0,0 +1,284 @@
+"""
+Tests for the simulated audio devices.
+
+Drives AudioRouter and AudioAnalyzer against DeviceSimulator: streams
+call back on their own threads like PortAudio, on a manual clock that
+runs seconds of playback instantly, so device 8/9 routing, sync, stop
+latency and xrun handling are checked without the kiosk hardware.
+"""
+import importlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.audio_router import AudioRouter
+from modules.device_simulator import DeviceSimulator, SimulatedClock
+from modules.scoring.pitch_tracker import PitchTracker
+from modules.xrun_tuner import XrunTuner
+
+SR = 48000
+HEADSET = 'Speakers (USB Audio Device)'
+SPEAKERS = 'Speakers (Realtek(R) Audio)'
+
+
+def _router(sim: DeviceSimulator, seconds: float = 2.0) -> AudioRouter:
+    """Router on the simulator with constant-level vocal (0.25) and instrumental (0.5)."""
+    router = AudioRouter(backend=sim.backend())
+    frames = int(seconds * SR)
+    with tempfile.TemporaryDirectory() as tmp:
+        vocal, instrumental = Path(tmp) / 'vocal.wav', Path(tmp) / 'instrumental.wav'
+        sf.write(str(vocal), np.full((frames, 2), 0.25), SR, subtype='FLOAT')
+        sf.write(str(instrumental), np.full((frames, 2), 0.5), SR, subtype='FLOAT')
+        assert router.load_audio(str(vocal), str(instrumental))
+    return router
+
+
+def test_imports_without_portaudio(monkeypatch):
+    """The simulator (and the offline pieces it uses) never need the real sounddevice."""
+    monkeypatch.setitem(sys.modules, 'sounddevice', None)  # import raises ImportError
+    for name in ('modules.device_simulator', 'modules.offline_backend'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    simulator = importlib.import_module('modules.device_simulator')
+
+    sim = simulator.DeviceSimulator(clock=simulator.SimulatedClock(speed=None))
+    assert sim.sounddevice.CallbackStop is simulator.CallbackStop
+    assert sim.backend().query_devices()[9]['name'] == HEADSET
+    print("✅ Simulator imports without PortAudio")
+
+
+def test_kiosk_routing_and_sync_on_devices_8_and_9():
+    """Vocal on the USB headset (9), instrumental on the Realtek speakers (8), in sync."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    router = _router(sim)
+    router.set_performance_mode()
+    assert (router._device_for('headphone'), router._device_for('speaker')) == (9, 8)
+
+    assert router.play()
+    sim.clock.advance(3.0)
+
+    headset, speakers = sim.output(HEADSET)[:, 0], sim.output(SPEAKERS)[:, 0]
+    onsets = [np.flatnonzero(heard)[0] for heard in (headset, speakers)]
+    fade = int(round(router.fade_in * SR))
+    assert onsets[0] == onsets[1], f"Devices start {onsets[1] - onsets[0]} frames apart"
+    assert np.allclose(headset[onsets[0] + fade:][:SR], 0.25)
+    assert np.allclose(speakers[onsets[1] + fade:][:SR], 0.5)
+    assert not np.any(sim.output('Microsoft Sound Mapper - Output'))
+    print(f"✅ Devices 8 and 9 start together at DAC frame {onsets[0]}")
+
+
+def test_late_callbacks_underflow_and_reach_the_router():
+    """Jitter beyond the device latency drops blocks and flags the next callback."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    sim.configure(HEADSET, jitter=0.030, latency=0.020, seed=1)
+    router = _router(sim)
+    assert router.play()
+    sim.clock.advance(3.0)
+
+    underflows = sim.device(HEADSET).underflow_count
+    reported = router.metrics.streams['headphone'].xruns
+    assert underflows > 0, "30 ms jitter on a 20 ms latency must underflow"
+    assert underflows - 1 <= reported <= underflows, (underflows, reported)
+    print(f"✅ {underflows} simulated underflows, {reported} reported to the callback")
+
+
+def test_underflows_escalate_the_tuner_the_stream_reported_to():
+    """The tuner thread escalates the stream's own tuner, not the key's current one."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    sim.configure(HEADSET, underflows=range(10, 30))
+    router = _router(sim)
+    assert router.play()
+    reported_to = router.tuners['headphone']
+    first = reported_to.profile_name
+    # As if the headphone key had since been resolved to another device
+    replacement = XrunTuner('Other device', router.latency_profile)
+    router.tuners['headphone'] = replacement
+    sim.clock.advance(1.0)
+
+    deadline = time.monotonic() + 2.0
+    while reported_to.profile_name == first and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert reported_to.profile_name == reported_to.floor != first
+    assert replacement.profile_name == first
+    print(f"✅ {HEADSET}: {first} → {reported_to.profile_name}, other device untouched")
+
+
+def test_stop_is_silent_within_the_fade_out():
+    """stop() is heard as a fade ending within fade_out plus one block and the latency."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    router = _router(sim)
+    assert router.play()
+    sim.clock.advance(0.5)
+
+    stop_at = sim.clock.now()
+    router.stop()
+    heard = sim.output(HEADSET)[:, 0]
+    silent_at = sim.clock.epoch + (np.flatnonzero(heard)[-1] + 1) / SR
+    device = sim.device(HEADSET)
+    budget = router.fade_out + device.latency + 2 * router.blocksizes['headphone'] / SR
+    assert silent_at - stop_at <= budget, f"Silent {silent_at - stop_at:.3f}s after stop()"
+    assert not router.is_playing()
+    print(f"✅ Silent {1000 * (silent_at - stop_at):.1f} ms after stop()")
+
+
+def test_installed_fakes_serve_analyzer_and_pyaudio():
+    """Code importing sounddevice or pyaudio gets the simulated devices."""
+    sim = DeviceSimulator()
+    sim.configure('Microphone (USB Audio Device)', signal=np.full(SR * 600, 0.1, dtype='float32'))
+    with sim.install():
+        import pyaudio
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        samples, _ = AudioAnalyzer().capture(0.1)
+        assert len(samples) == int(0.1 * AudioAnalyzer.RATE)
+        assert np.allclose(samples, 0.1)
+
+        pa = pyaudio.PyAudio()
+        assert pa.get_device_count() == 10
+        assert pa.get_device_info_by_index(9)['name'] == HEADSET
+        stream = pa.open(format=pyaudio.paInt16, channels=1, rate=44100, input=True,
+                         input_device_index=1, frames_per_buffer=1024)
+        data = np.frombuffer(stream.read(1024, exception_on_overflow=False), dtype=np.int16)
+        stream.stop_stream()
+        stream.close()
+        assert np.all(data == 3276)
+    print("✅ Analyzer and pyaudio read the simulated microphone")
+
+
+def test_analyzer_measures_the_simulated_microphone():
+    """Raw int16 callback capture: one level row per block, at the signal's RMS."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    t = np.arange(SR * 2) / SR
+    sim.configure('Microphone (USB Audio Device)',
+                  signal=(0.25 * np.sin(2 * np.pi * 750 * t)).astype('float32'))
+    with sim.install():
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        analyzer = AudioAnalyzer()
+        analyzer.start_recording()
+        sim.clock.advance(1.0)
+        analyzer.stop_recording()
+
+    blocks = analyzer.meter.count
+    assert blocks == pytest.approx(SR / AudioAnalyzer.CHUNK, abs=2)
+    rms = analyzer.rms_values[-100:]  # First blocks predate the signal (input latency)
+    assert np.allclose(rms, 0.25 * 32768 / np.sqrt(2), rtol=0.02)
+    assert analyzer.meter.clipped_blocks() == 0
+    assert analyzer.get_score() > 0
+    assert analyzer.get_live_score() == analyzer.get_score()
+
+    # The analysis thread tracked pitch over the same capture
+    _, f0, confidence = analyzer.get_pitch_contour()
+    assert len(f0) == pytest.approx(PitchTracker.FRAME_RATE, abs=3)
+    assert np.allclose(f0[-50:], 750, rtol=0.005)
+    assert np.all(confidence[-50:] > 0.9)
+    print(f"✅ {blocks} blocks measured at RMS {rms.mean():.0f}, {len(f0)} pitch frames")
+
+
+def test_analyzer_input_survives_a_device_rescan():
+    """A PortAudio rescan mid-recording closes the analyzer's input and reopens it."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    with sim.install():
+        from modules.device_registry import get_device_registry
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        analyzer = AudioAnalyzer()
+        analyzer.start_recording()
+        sim.clock.advance(0.5)
+        before = analyzer.stream
+        get_device_registry().refresh(rescan=True)
+        assert before.closed
+        assert analyzer.stream is not before and analyzer.stream.active
+        sim.clock.advance(0.5)
+        analyzer.stop_recording()
+        registry = get_device_registry()
+
+    assert analyzer.stream is None and not registry._listeners
+    assert analyzer.meter.count == pytest.approx(SR / AudioAnalyzer.CHUNK, abs=4)
+    print(f"✅ {analyzer.meter.count} blocks measured across a rescan")
+
+
+def test_analyzer_waits_for_a_missing_microphone():
+    """Without the configured mic no stream is opened; it opens once the mic is back."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    mic = 'Microphone (USB Audio Device)'
+    sim.unplug(mic)
+    with sim.install():
+        from modules.device_registry import get_device_registry
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        registry = get_device_registry()
+        registry.refresh(rescan=True)
+        assert registry.resolve('mic') is None
+        analyzer = AudioAnalyzer()
+        analyzer.start_recording()
+        assert analyzer.is_recording and analyzer.stream is None
+        with pytest.raises(RuntimeError):
+            analyzer.capture(0.1)
+
+        sim.plug(mic)
+        registry.refresh(rescan=True)
+        assert analyzer.stream is not None and analyzer.stream.active
+        sim.clock.advance(0.5)
+        analyzer.stop_recording()
+
+    assert analyzer.meter.count == pytest.approx(0.5 * SR / AudioAnalyzer.CHUNK, abs=3)
+    print(f"✅ Recording started when the mic came back ({analyzer.meter.count} blocks)")
+
+
+def test_analyzer_stops_on_a_dead_stream(monkeypatch):
+    """PortAudio errors closing the input still clear the stream and join the thread."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    with sim.install():
+        from modules.device_simulator import PortAudioError
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        analyzer = AudioAnalyzer()
+        analyzer.start_recording()
+        sim.clock.advance(0.1)
+
+        def dead():
+            raise PortAudioError("Stream is not available")
+
+        monkeypatch.setattr(analyzer.stream, 'stop', dead)
+        analyzer.stop_recording()
+
+    assert analyzer.stream is None and analyzer.thread is None
+    assert not analyzer.is_recording
+    print("✅ Dead input stream closed without raising")
+
+
+def test_analyzer_history_is_sized_from_the_song():
+    """Level and pitch arrays cover the song plus a margin, rows in song time."""
+    sim = DeviceSimulator(clock=SimulatedClock(speed=None))
+    with sim.install():
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+
+        router = _router(sim, seconds=2.0)
+        analyzer = AudioAnalyzer(router=router)
+        assert router.play()
+        sim.clock.advance(0.5)
+        analyzer.start_recording()
+        started_at = router.get_position()
+        sim.clock.advance(1.0)
+        analyzer.stop_recording()
+
+    seconds = 2.0 + AudioAnalyzer.HISTORY_MARGIN
+    assert analyzer.meter.capacity == int(np.ceil(seconds * SR / AudioAnalyzer.CHUNK))
+    assert len(analyzer.pitch.f0) == int(seconds * PitchTracker.FRAME_RATE) + 1
+    times = analyzer.rms_times()
+    assert len(times) == analyzer.meter.count > 0
+    assert times[0] == pytest.approx(started_at)
+    assert np.allclose(np.diff(times), AudioAnalyzer.CHUNK / SR)
+    print(f"✅ {analyzer.meter.capacity} rows for a {router.get_duration():.1f}s song, "
+          f"first at {times[0]:.3f}s")
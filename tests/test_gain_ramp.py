@@ -0,0 +1,72 @@
+"""
+Tests for the click-free gain automation.
+
+Checks ramp shape and continuity across blocks, the faded event used
+by stop(), and volume changes posted from another thread.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.gain_ramp import GainRamp
+
+
+def _blocks(ramp: GainRamp, count: int, frames: int = 256) -> np.ndarray:
+    """Apply the ramp to `count` blocks of ones and return the gains."""
+    out = []
+    for _ in range(count):
+        block = np.ones((frames, 2), dtype='float32')
+        ramp.apply(block)
+        assert np.array_equal(block[:, 0], block[:, 1]), "Same gain on every channel"
+        out.append(block[:, 0])
+    return np.concatenate(out)
+
+
+def test_fade_out_is_continuous_across_blocks():
+    """A 50 ms fade is linear over several blocks and ends in silence."""
+    ramp = GainRamp(48000, 256)
+    ramp.ramp_to(0.0, 0.050)  # 2400 frames
+    assert not ramp.faded.is_set()
+
+    gains = _blocks(ramp, 12)
+
+    assert np.allclose(np.diff(gains[:2400]), -1 / 2400, atol=1e-6), "Linear, no steps"
+    assert gains[2399] == 0.0 and np.all(gains[2400:] == 0.0)
+    assert ramp.faded.is_set()
+    print("✅ Fade-out spans blocks without steps")
+
+
+def test_restart_fades_in_after_fade_out():
+    """restart() ramps up from silence even after a completed fade-out."""
+    ramp = GainRamp(48000, 256)
+    ramp.ramp_to(0.0, 0.0)
+    _blocks(ramp, 1)
+    assert ramp.faded.is_set()
+
+    ramp.restart(0.8, 480)
+    assert not ramp.faded.is_set(), "A fade-in is not silent"
+    gains = _blocks(ramp, 4)
+    assert gains[0] < 0.01 and np.all(np.diff(gains[:480]) > 0)
+    assert np.allclose(gains[479:], 0.8)
+    print("✅ Fade-in after fade-out")
+
+
+def test_volume_change_ramps_from_current_gain():
+    """A new target mid-ramp continues from the current gain."""
+    ramp = GainRamp(48000, 256, gain=1.0)
+    ramp.ramp_to(0.0, 0.1)  # Slow fade
+    first = _blocks(ramp, 1)
+    ramp.ramp_to(0.5, 256 / 48000)  # Then to 0.5 within one block
+    second = _blocks(ramp, 2)
+
+    step = abs(second[0] - first[-1])
+    assert step < 0.01, f"Target change must not jump ({step})"
+    assert np.allclose(second[255:], 0.5)
+    assert not ramp.faded.is_set()
+    print("✅ Volume change ramps from the current gain")
@@ -0,0 +1,117 @@
+"""
+Tests for the microphone level meter used by AudioAnalyzer.
+
+Checks RMS, peak and clipping against direct numpy computations, that
+int16 and float blocks give the same levels, that a full array drops
+blocks instead of growing, and that measuring a block does not
+allocate on the audio thread.
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.scoring.level_meter import CLIPPED, PEAK, RMS, LevelMeter
+
+BLOCKSIZE = 256
+
+# Budget for small objects (the frombuffer view, numpy scalars): far
+# below one measured block in float32 (8 KiB at ALLOC_BLOCKSIZE)
+ALLOC_BLOCKSIZE = 2048
+MAX_BYTES_PER_BLOCK = 2048
+
+
+def _tone(amplitude: float, frames: int = BLOCKSIZE) -> np.ndarray:
+    """int16 sine block at `amplitude` of full scale."""
+    t = np.arange(frames) / 48000
+    return np.round(amplitude * 32767 * np.sin(2 * np.pi * 750 * t)).astype(np.int16)
+
+
+def test_levels_match_reference():
+    """RMS and peak of int16 blocks, one row per block."""
+    meter = LevelMeter(capacity=8, blocksize=BLOCKSIZE)
+    blocks = [_tone(0.1), _tone(0.5), np.zeros(BLOCKSIZE, dtype=np.int16)]
+    for block in blocks:
+        meter.process(np.frombuffer(block.tobytes(), dtype=np.int16))
+
+    assert meter.count == 3
+    for row, block in zip(meter.levels, blocks):
+        expected = block.astype(np.float64)
+        assert np.isclose(row[RMS], np.sqrt(np.mean(expected ** 2)), rtol=1e-4)
+        assert row[PEAK] == np.abs(expected).max()
+        assert row[CLIPPED] == 0
+    assert np.array_equal(meter.rms(), meter.levels[:3, RMS])
+    print(f"✅ RMS {meter.rms().round(1).tolist()}")
+
+
+def test_float_blocks_use_int16_units():
+    """A float block at the same level measures like its int16 version."""
+    meter = LevelMeter(capacity=2, blocksize=BLOCKSIZE)
+    block = _tone(0.25)
+    meter.process(block)
+    meter.process(block.astype(np.float32) / 32768.0)
+    assert np.allclose(meter.levels[0], meter.levels[1], rtol=1e-4)
+    print("✅ float32 and int16 blocks agree")
+
+
+def test_clipping_and_full_array():
+    """Clipped samples are counted; blocks past capacity are dropped."""
+    meter = LevelMeter(capacity=2, blocksize=BLOCKSIZE)
+    clipped = np.clip(_tone(0.9).astype(np.int32) * 2, -32768, 32767).astype(np.int16)
+    meter.process(clipped)
+    meter.process(_tone(0.1))
+    meter.process(_tone(0.1))
+
+    expected = np.count_nonzero(np.abs(clipped.astype(np.int32)) >= 32767)
+    assert expected > 0
+    assert meter.levels[0, CLIPPED] == expected
+    assert meter.clipped_blocks() == 1
+    assert meter.count == 2 and meter.dropped == 1
+
+    meter.reset()
+    assert meter.count == 0 and len(meter.rms()) == 0
+    print(f"✅ {expected} clipped samples counted, overflow dropped")
+
+
+def test_process_does_not_allocate_buffers():
+    """Measuring a block only creates small scalar objects."""
+    blocks = 2000
+    meter = LevelMeter(capacity=blocks + 1, blocksize=ALLOC_BLOCKSIZE)
+    raw = _tone(0.3, frames=ALLOC_BLOCKSIZE).tobytes()
+    meter.process(np.frombuffer(raw, dtype=np.int16))  # Warm up
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(blocks):
+            meter.process(np.frombuffer(raw, dtype=np.int16))
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(f"   Peak transient: {peak - baseline} bytes, net: {current - baseline} bytes")
+    assert peak - baseline < MAX_BYTES_PER_BLOCK, f"Meter allocated {peak - baseline} bytes"
+    assert current - baseline < MAX_BYTES_PER_BLOCK, f"Meter leaked {current - baseline} bytes"
+    print("✅ Level meter is allocation-free")
+
+
+def test_rows_map_to_song_time():
+    """Row i starts at origin + i blocks; a song time finds its row."""
+    meter = LevelMeter(capacity=10, blocksize=BLOCKSIZE, samplerate=48000)
+    meter.reset(origin=12.5)
+    for _ in range(4):
+        meter.process(_tone(0.1))
+
+    block_seconds = BLOCKSIZE / 48000
+    assert np.allclose(meter.times(), 12.5 + np.arange(4) * block_seconds)
+    assert meter.block_at(12.5) == 0
+    assert meter.block_at(12.5 + 2.5 * block_seconds) == 2
+    assert meter.block_time(meter.block_at(13.0)) <= 13.0 < meter.block_time(meter.block_at(13.0) + 1)
+    print(f"✅ Rows start at {meter.times().round(4).tolist()}")
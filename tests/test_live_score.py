@@ -0,0 +1,77 @@
+"""
+Tests for the running loudness score.
+
+Checks that the accumulated score equals the two-pass computation over
+the whole recording at every point of the song, that the Welford spread
+matches numpy, and that reading the score does not depend on the song
+length.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.scoring.live_score import LiveScore
+
+THRESHOLD = 500
+
+
+def _two_pass(rms_values: np.ndarray) -> float:
+    """Score over the whole recording, computed from scratch."""
+    if not len(rms_values):
+        return 0.0
+    active = rms_values[rms_values > THRESHOLD]
+    coverage = len(active) / len(rms_values) * 100
+    avg_rms = active.mean() if len(active) else 0.0
+    score = min(coverage / 80.0, 1.0) * 50 + min(avg_rms / 5000.0, 1.0) * 50
+    return round(max(0.0, min(100.0, score)), 2)
+
+
+def test_running_score_matches_whole_recording():
+    """Silence, quiet and loud singing: same score as two passes, at any time."""
+    rng = np.random.default_rng(7)
+    rms_values = np.concatenate([
+        rng.uniform(0, 400, 500),       # Intro, not singing
+        rng.uniform(600, 3000, 2000),   # Quiet singing
+        rng.uniform(0, 8000, 1500),     # Loud with pauses
+    ])
+    live = LiveScore(THRESHOLD)
+    assert live.score() == 0.0
+    for index, rms in enumerate(rms_values, 1):
+        live.add(float(rms))
+        if index % 250 == 0:
+            assert abs(live.score() - _two_pass(rms_values[:index])) <= 0.01, index
+
+    active = rms_values[rms_values > THRESHOLD]
+    result = live.breakdown()
+    assert live.blocks == len(rms_values)
+    assert np.isclose(result['avg_rms'], active.mean())
+    assert np.isclose(result['rms_std'], active.std())
+    assert np.isclose(result['mean_rms'], rms_values.mean())
+    assert np.isclose(result['coverage'], len(active) / len(rms_values) * 100)
+    print(f"✅ Running score {result['score']} matches the two-pass score")
+
+    live.reset()
+    assert live.blocks == 0 and live.score() == 0.0
+
+
+def test_reading_the_score_is_constant_time():
+    """A 10-minute song's score costs no more to read than a 1-second one's."""
+    def _read_time(blocks: int) -> float:
+        live = LiveScore(THRESHOLD)
+        for _ in range(blocks):
+            live.add(1000.0)
+        started = time.perf_counter()
+        for _ in range(1000):
+            live.score()
+        return time.perf_counter() - started
+
+    short, long = _read_time(188), _read_time(112500)
+    assert long < 3 * short + 0.005, f"{1e6 * short:.0f}µs vs {1e6 * long:.0f}µs per 1000 reads"
+    print(f"✅ {long:.4f}s per 1000 reads after 10 minutes of blocks")
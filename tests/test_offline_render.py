@@ -0,0 +1,157 @@
+"""
+Offline render tests for the AudioRouter.
+
+Plays songs through an OfflineBackend, which runs the real stream
+callbacks on a virtual clock and records what each device would have
+played, then checks routing, lead-in padding, fades and inter-device
+sync sample by sample. No audio device is opened and a song renders in
+milliseconds.
+"""
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.offline_backend import OfflineBackend
+from modules.audio_router import AudioRouter
+
+SR = 48000
+SECONDS = 2.0
+VOCAL_LEVEL = 0.25
+INSTRUMENTAL_LEVEL = 0.5
+
+
+def _write_tracks(directory: Path):
+    """Write constant-level vocal and instrumental tracks, easy to tell apart."""
+    frames = int(SECONDS * SR)
+    vocal = directory / 'vocal.wav'
+    instrumental = directory / 'instrumental.wav'
+    sf.write(str(vocal), np.full((frames, 2), VOCAL_LEVEL), SR, subtype='FLOAT')
+    sf.write(str(instrumental), np.full((frames, 2), INSTRUMENTAL_LEVEL), SR, subtype='FLOAT')
+    return str(vocal), str(instrumental)
+
+
+def _play(mode: str, seconds=None):
+    """Load both tracks, play them offline and return (backend, router)."""
+    backend = OfflineBackend(samplerate=SR)
+    router = AudioRouter(backend=backend)
+    with tempfile.TemporaryDirectory() as tmp:
+        assert router.load_audio(*_write_tracks(Path(tmp)))
+    if mode == 'performance':
+        router.set_performance_mode()
+    assert router.play()
+    backend.run(seconds)
+    return backend, router
+
+
+def _heard(backend: OfflineBackend, router: AudioRouter, stream_key: str) -> np.ndarray:
+    """Left channel of what a stream's device played."""
+    return backend.output(router._device_for(stream_key))[:, 0]
+
+
+def test_performance_routes_each_track_to_its_device():
+    """Vocal reaches the headphones only, instrumental the speakers only."""
+    started = time.perf_counter()
+    backend, router = _play('performance')
+    elapsed = time.perf_counter() - started
+
+    headphone = _heard(backend, router, 'headphone')
+    speaker = _heard(backend, router, 'speaker')
+    fade = int(round(router.fade_in * SR))
+    assert np.allclose(headphone[np.flatnonzero(headphone)[0] + fade:][:SR], VOCAL_LEVEL)
+    assert np.allclose(speaker[np.flatnonzero(speaker)[0] + fade:][:SR], INSTRUMENTAL_LEVEL)
+    assert elapsed < SECONDS, f"Offline render took {elapsed:.2f}s for {SECONDS}s of audio"
+    print(f"✅ Routed {SECONDS}s of audio in {elapsed * 1000:.0f} ms")
+
+
+def test_rehearsal_leaves_speakers_silent():
+    """Rehearsal mode opens no speaker stream."""
+    backend, router = _play('rehearsal')
+    assert np.count_nonzero(_heard(backend, router, 'headphone'))
+    assert len(_heard(backend, router, 'speaker')) == 0
+    print("✅ Rehearsal plays on the headphones only")
+
+
+def test_devices_start_together_after_silent_lead_in():
+    """Both devices are heard from the same DAC frame, every frame played once."""
+    backend, router = _play('performance')
+    onsets = []
+    for key in ('headphone', 'speaker'):
+        heard = _heard(backend, router, key)
+        playing = np.flatnonzero(heard)
+        assert len(playing) == int(SECONDS * SR), f"'{key}' played {len(playing)} frames"
+        assert playing[-1] - playing[0] + 1 == len(playing), f"'{key}' has gaps"
+        onsets.append(playing[0])
+    assert onsets[0] == onsets[1], f"Devices start {onsets[1] - onsets[0]} frames apart"
+    assert onsets[0] > 0, "Start is preceded by lead-in silence"
+    print(f"✅ Both devices start at DAC frame {onsets[0]}")
+
+
+def test_stop_fades_out_and_callbacks_follow_the_blocksize():
+    """stop() ramps to silence, rendered offline while it waits."""
+    backend, router = _play('performance', seconds=0.5)
+    router.stop()
+    heard = _heard(backend, router, 'speaker')
+    playing = np.flatnonzero(heard)
+    tail = heard[playing[-1] - int(router.fade_out * SR) + 2:playing[-1] + 1]
+    assert np.all(np.diff(tail) < 0), "Fade-out falls monotonically"
+    assert tail[-1] < 0.001 and not np.any(heard[playing[-1] + 1:])
+
+    log = backend.log(router._device_for('speaker'))
+    times = np.array([entry[0] for entry in log])
+    assert np.allclose(np.diff(times), router.blocksizes['speaker'] / SR)
+    print(f"✅ Faded out over {len(tail)} frames in {len(log)} callbacks")
+
+
+def test_stem_mode_mixes_guide_vocal_on_headphones_only():
+    """Speakers get the instrumental; headphones add the vocal stem at the guide volume."""
+    backend = OfflineBackend(samplerate=SR)
+    router = AudioRouter(backend=backend)
+    router.set_guide_volume(0.5)
+    with tempfile.TemporaryDirectory() as tmp:
+        vocal, instrumental = _write_tracks(Path(tmp))
+        assert router.load_stems(instrumental, vocal)
+    assert router.has_stems()
+    assert router.audio_data['headphone'] is router.audio_data['speaker'], \
+        "Both devices share one instrumental buffer"
+
+    router.set_performance_mode()
+    assert router.play()
+    backend.run()
+
+    fade = int(round(router.fade_in * SR))
+    headphone = _heard(backend, router, 'headphone')
+    speaker = _heard(backend, router, 'speaker')
+    mixed = INSTRUMENTAL_LEVEL + 0.5 * VOCAL_LEVEL
+    assert np.allclose(headphone[np.flatnonzero(headphone)[0] + fade:][:SR], mixed)
+    assert np.allclose(speaker[np.flatnonzero(speaker)[0] + fade:][:SR], INSTRUMENTAL_LEVEL)
+    print(f"✅ Headphones hear {mixed:.3f}, speakers {INSTRUMENTAL_LEVEL}")
+
+
+def test_renders_without_portaudio():
+    """A box without libportaudio imports the router and renders a song offline."""
+    script = """
+import sys
+sys.modules['sounddevice'] = None  # Any import of sounddevice raises ImportError
+sys.path.insert(0, 'tests')
+from test_offline_render import _heard, _play
+
+backend, router = _play('performance')
+print(float(_heard(backend, router, 'speaker').max()))
+"""
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=str(project_root),
+        capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout.split()[-1]) == INSTRUMENTAL_LEVEL
+    print("✅ AudioRouter imports and renders without PortAudio")
@@ -0,0 +1,89 @@
+"""
+Tests for the memory-mapped raw PCM asset format.
+
+Packs synthetic tracks as float32 and int16, checks the header and data
+alignment, and verifies the audio cache maps a packed sibling instead
+of decoding the WAV.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.audio_cache import AudioAssetCache
+from modules.pcm_assets import (DATA_ALIGNMENT, open_pcm, pack_file, packed_asset,
+                                read_header, to_float32)
+
+
+def _write_wav(path: Path, frames: int = 4800, channels: int = 2, sr: int = 48000) -> np.ndarray:
+    """Write a short 16-bit noise file and return its decoded samples."""
+    data = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, channels))
+    sf.write(str(path), data, sr, subtype='PCM_16')
+    return sf.read(str(path), dtype='float32')[0]
+
+
+def test_float32_round_trip_is_exact():
+    """A float32 asset maps back to the decoded samples bit for bit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = Path(tmp) / 'song.wav'
+        expected = _write_wav(wav)
+
+        packed = pack_file(wav)
+        header = read_header(packed)
+        data, sr = open_pcm(packed)
+
+        assert packed == Path(tmp) / 'song.pcm'
+        assert header['data_offset'] % DATA_ALIGNMENT == 0
+        assert header['source'] == 'song.wav'
+        assert isinstance(data, np.memmap) and not data.flags.writeable
+        assert sr == 48000 and data.shape == expected.shape
+        assert np.array_equal(data, expected)
+        del data
+        print(f"✅ float32 asset, data at offset {header['data_offset']}")
+
+
+def test_int16_asset_is_half_size():
+    """int16 assets store 16-bit samples that scale back to the source."""
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = Path(tmp) / 'mono.wav'
+        expected = _write_wav(wav, channels=1)
+
+        packed = pack_file(wav, Path(tmp) / 'mono16.pcm', dtype='int16')
+        data, _ = open_pcm(packed)
+
+        assert data.dtype == np.int16 and data.shape == expected.shape
+        assert packed.stat().st_size == read_header(packed)['data_offset'] + 2 * len(expected)
+        # 16-bit WAV source: the conversion is lossless
+        assert np.array_equal(to_float32(data), expected)
+        del data
+        print("✅ int16 asset round trip")
+
+
+def test_cache_maps_packed_sibling():
+    """The cache maps an up-to-date packed sibling and ignores a stale one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = Path(tmp) / 'song.wav'
+        expected = _write_wav(wav)
+        packed = pack_file(wav)
+        assert packed_asset(wav) == packed
+
+        data, sr = AudioAssetCache(budget_bytes=64 * 1024 * 1024).get(str(wav))
+        assert isinstance(data, np.memmap), "Packed asset should be mapped, not decoded"
+        assert np.array_equal(data, expected)
+        del data
+
+        # Re-recording the WAV makes the packed copy stale
+        stale = os.stat(packed).st_mtime_ns - 1_000_000_000
+        os.utime(packed, ns=(stale, stale))
+        assert packed_asset(wav) is None
+        data, _ = AudioAssetCache(budget_bytes=64 * 1024 * 1024).get(str(wav))
+        assert not isinstance(data, np.memmap)
+        print("✅ Packed sibling mapped, stale copy ignored")
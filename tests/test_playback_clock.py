@@ -0,0 +1,98 @@
+"""
+Tests for the sample-accurate playback clock.
+
+Drives PlaybackClock with synthetic callback timings (no audio hardware
+needed) and checks that positions follow the DAC, stay monotonic and
+report inter-stream drift.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.playback_clock import PlaybackClock
+
+
+class FakeTimeInfo:
+    """Minimal stand-in for the PortAudio time_info struct."""
+
+    def __init__(self, current_time: float, dac_time: float):
+        self.currentTime = current_time
+        self.outputBufferDacTime = dac_time
+
+
+def test_position_is_zero_before_first_block():
+    """Clock reports 0.0 until a callback advances it."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone'])
+    assert clock.get_position() == 0.0
+    print("✅ Idle clock reports 0.0")
+
+
+def test_position_follows_dac_time():
+    """Position is the block frame shifted by the reported DAC latency."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone'])
+
+    # Block starting at 1.0s reaches the DAC 20 ms from now
+    clock.advance('headphone', 48000, 2048, FakeTimeInfo(10.0, 10.020))
+    position = clock.get_position()
+    assert 0.975 <= position <= 1.0, f"Unexpected position {position}"
+    print(f"✅ Position before DAC time: {position:.4f}s")
+
+
+def test_position_is_monotonic_and_capped():
+    """Positions never go backwards and never pass the current block."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone'])
+    clock.advance('headphone', 0, 480, FakeTimeInfo(1.0, 1.0))
+
+    previous = 0.0
+    for _ in range(20):
+        position = clock.get_position()
+        assert position >= previous, "Clock went backwards"
+        previous = position
+        time.sleep(0.001)
+
+    assert previous <= 480 / 48000, "Clock ran past the rendered block"
+    print(f"✅ Monotonic and capped at {previous:.4f}s")
+
+
+def test_drift_between_streams():
+    """Drift is the offset between two streams at the same instant."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone', 'speaker'])
+    assert clock.get_drift() == 0.0
+
+    clock.advance('headphone', 48000, 2048, FakeTimeInfo(5.0, 5.010))
+    clock.advance('speaker', 48000, 2048, FakeTimeInfo(7.0, 7.030))
+    drift = clock.get_drift()
+    assert abs(drift - 0.020) < 0.002, f"Unexpected drift {drift}"
+    print(f"✅ Drift measured: {drift * 1000:.2f} ms")
+
+
+def test_drift_across_sample_rates():
+    """Streams at different device rates are compared in seconds."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone', 'speaker'], {'speaker': 44100})
+
+    clock.advance('headphone', 48000, 2048, FakeTimeInfo(5.0, 5.010))
+    clock.advance('speaker', 44100, 2048, FakeTimeInfo(7.0, 7.010))
+    drift = clock.get_drift()
+    assert abs(drift) < 0.002, f"Same song time should not drift, got {drift}"
+    print(f"✅ 48 kHz vs 44.1 kHz drift: {drift * 1000:.2f} ms")
+
+
+def test_finished_when_all_streams_end():
+    """is_finished() waits for every registered stream."""
+    clock = PlaybackClock()
+    clock.reset(48000, ['headphone', 'speaker'])
+    clock.mark_finished('headphone')
+    assert not clock.is_finished()
+    clock.mark_finished('speaker')
+    assert clock.is_finished()
+    print("✅ Finished after both streams ended")
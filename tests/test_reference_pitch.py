@@ -0,0 +1,116 @@
+"""
+Tests for the offline reference melody.
+
+Extracts a synthetic vocal line with known notes and checks the stored
+contour: f0, voiced regions and onsets, the content-hash key (a renamed
+copy finds it, an edited file does not), and that loading takes
+milliseconds.
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.scoring.reference_pitch import (
+    extract_and_store, extract_reference, load_reference, note_onsets, reference_path,
+    voiced_regions
+)
+
+SR = 44100
+# (start, end, f0): two sung phrases, the first with a note change
+NOTES = [(0.5, 1.0, 220.0), (1.0, 1.5, 261.63), (2.0, 2.6, 196.0)]
+
+
+def _write_vocal(path: Path, seconds: float = 3.0) -> None:
+    """Mono vocal stem singing NOTES, silent elsewhere."""
+    t = np.arange(int(seconds * SR)) / SR
+    vocal = np.zeros_like(t)
+    for start, end, f0 in NOTES:
+        sung = (t >= start) & (t < end)
+        vocal[sung] = 0.3 * np.sin(2 * np.pi * f0 * t[sung])
+    sf.write(str(path), vocal, SR, subtype='PCM_16')
+
+
+def test_extracts_notes_regions_and_onsets():
+    """The contour follows the sung notes on song time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        vocal = Path(tmp) / 'vocals.wav'
+        _write_vocal(vocal)
+        contour = extract_reference(str(vocal))
+
+    assert contour.frame_rate == 100
+    for start, end, f0 in NOTES:
+        inner = slice(contour.frame_at(start + 0.05), contour.frame_at(end - 0.05))
+        assert np.allclose(contour.f0[inner], f0, rtol=0.003), f0
+    assert contour.f0[contour.frame_at(0.25)] == 0 and contour.f0[contour.frame_at(1.75)] == 0
+
+    assert contour.regions.shape == (2, 2)
+    assert np.allclose(contour.regions, [[0.5, 1.5], [2.0, 2.6]], atol=0.03)
+    assert np.allclose(contour.onsets, [0.5, 1.0, 2.0], atol=0.03)
+    assert np.isclose(contour.times()[contour.frame_at(2.0)], 2.0, atol=0.005)
+    print(f"✅ {len(contour.onsets)} onsets, regions {contour.regions.round(2).tolist()}")
+
+
+def test_stored_by_content_hash_and_loads_fast():
+    """A copy under another name shares the .npz; an edited file does not."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        vocal = root / 'vocals.wav'
+        _write_vocal(vocal)
+        store = str(root / 'reference')
+
+        assert load_reference(str(vocal), store) is None
+        path = extract_and_store(str(vocal), store)
+        mtime = path.stat().st_mtime_ns
+        assert extract_and_store(str(vocal), store).stat().st_mtime_ns == mtime  # Not redone
+
+        copy = root / 'renamed.wav'
+        shutil.copy(vocal, copy)
+        assert reference_path(str(copy), store) == path
+
+        started = time.perf_counter()
+        loaded = load_reference(str(copy), store)
+        elapsed = time.perf_counter() - started
+        expected = extract_reference(str(vocal))
+        assert np.array_equal(loaded.f0, expected.f0)
+        assert np.array_equal(loaded.onsets, expected.onsets)
+        assert loaded.origin == expected.origin and loaded.source == path.stem
+        assert elapsed < 0.05, f"Loading took {1000 * elapsed:.1f}ms"
+
+        _write_vocal(copy, seconds=2.0)
+        assert load_reference(str(copy), store) is None
+    print(f"✅ Reference loaded in {1000 * elapsed:.1f}ms")
+
+
+def test_unvoiced_and_empty_contours_have_no_regions():
+    """All-unvoiced and zero-frame contours give empty regions and onsets."""
+    for f0 in (np.zeros(100, dtype=np.float32), np.zeros(0, dtype=np.float32)):
+        regions = voiced_regions(f0, 100.0)
+        assert regions.shape == (0, 2) and regions.dtype == np.float32
+        assert len(note_onsets(f0, regions, 100.0)) == 0
+    print("✅ No regions without voiced frames")
+
+
+def test_silent_stem_extracts_an_empty_melody():
+    """A silent vocal stem (e.g. an instrumental song) extracts without notes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        vocal = Path(tmp) / 'silence.wav'
+        sf.write(str(vocal), np.zeros(SR), SR, subtype='PCM_16')
+        contour = extract_reference(str(vocal))
+        short = Path(tmp) / 'short.wav'
+        sf.write(str(short), np.zeros(100), SR, subtype='PCM_16')
+        clip = extract_reference(str(short))
+
+    assert not np.any(contour.f0)
+    assert contour.regions.shape == (0, 2) and len(contour.onsets) == 0
+    assert len(clip.f0) == 0 and clip.regions.shape == (0, 2)
+    print(f"✅ Silent stem: {len(contour.f0)} unvoiced frames, no notes")
@@ -0,0 +1,121 @@
+"""
+Tests for the song library.
+
+Verifies catalog indexing from song.json manifests, the most-likely-song
+prediction, background preloading into the audio cache and whole-song
+eviction under the memory budget.
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.audio_cache import AudioAssetCache
+from modules.song_library import Song, SongLibrary
+
+SR = 48000
+SONG_BYTES = SR * 2 * 4 * 2  # 1 s stereo float32, vocal + instrumental
+
+
+def _write_song(root: Path, song_id: str, **manifest) -> None:
+    """Write a song folder with 1 s vocal and instrumental tracks."""
+    folder = root / song_id
+    folder.mkdir()
+    for name in ('mix.wav', 'instrumental.wav'):
+        sf.write(str(folder / name), np.zeros((SR, 2)), SR, subtype='PCM_16')
+    spec = {'title': song_id.title(), 'audio': 'mix.wav', 'instrumental': 'instrumental.wav'}
+    spec.update(manifest)
+    (folder / 'song.json').write_text(json.dumps(spec), encoding='utf-8')
+
+
+def _library(root: Path, budget_bytes: int = 64 * 1024 * 1024) -> SongLibrary:
+    """Library over `root` with its own cache."""
+    cache = AudioAssetCache(budget_bytes=64 * 1024 * 1024)
+    return SongLibrary(str(root), budget_bytes=budget_bytes, cache=cache)
+
+
+def test_indexes_manifests_and_skips_broken_ones():
+    """Every folder with a valid song.json is a song; paths are resolved."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_song(root, 'alpha', video='clip.mp4')
+        _write_song(root, 'beta')
+        (root / 'broken').mkdir()
+        (root / 'broken' / 'song.json').write_text('{"title": "No audio"}')
+
+        library = _library(root)
+
+        assert sorted(library.songs) == ['alpha', 'beta']
+        alpha = library.get('alpha')
+        assert alpha.audio == str(root / 'alpha' / 'mix.wav')
+        assert alpha.video == str(root / 'alpha' / 'clip.mp4')
+        assert alpha.lyrics == str(root / 'alpha' / 'lyrics.json')
+        assert library.get('beta').video is None
+        assert len(alpha.tracks) == 2
+
+
+def test_current_is_the_pick_then_the_most_played():
+    """A guest's pick wins once; afterwards the most played song is next."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_song(root, 'beta')
+        default = Song('alpha', 'Alpha', str(root / 'missing.wav'))
+        library = SongLibrary(str(root), default=default,
+                              cache=AudioAssetCache(budget_bytes=1024))
+
+        assert library.current is default
+
+        assert library.select('beta').song_id == 'beta'
+        assert library.current.song_id == 'beta'
+        library.record_play(library.current)
+        # Pick consumed, but beta is now the most played song
+        assert library.current.song_id == 'beta'
+
+        library.record_play(default)
+        library.record_play(default)
+        assert library.current is default
+
+
+def test_preload_warms_every_track_in_the_background():
+    """After the preload thread finishes, loading the song is a cache hit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_song(root, 'alpha')
+        library = _library(root)
+        song = library.get('alpha')
+
+        library.preload(song).join()
+
+        assert library.warm_songs == ['alpha']
+        assert library.cache.size_bytes == SONG_BYTES
+        misses = library.cache.misses
+        library.cache.get(song.audio, None, 'float32')
+        assert library.cache.misses == misses
+
+
+def test_preloading_evicts_whole_songs_over_budget():
+    """Only as many songs stay warm as fit the budget, oldest evicted first."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for song_id in ('alpha', 'beta', 'gamma'):
+            _write_song(root, song_id)
+        library = _library(root, budget_bytes=2 * SONG_BYTES)
+
+        for song_id in ('alpha', 'beta', 'gamma'):
+            library.preload(library.get(song_id)).join()
+
+        assert library.warm_songs == ['beta', 'gamma']
+        assert library.cache.size_bytes == 2 * SONG_BYTES
+        assert library.cache.nbytes(library.get('alpha').audio) == 0
+
+        # Re-warming a warm song keeps it and refreshes its position
+        library.preload(library.get('beta')).join()
+        assert library.warm_songs == ['gamma', 'beta']
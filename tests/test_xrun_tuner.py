@@ -0,0 +1,136 @@
+"""
+Tests for the xrun-driven stream profile tuner.
+
+Checks the per-minute underflow threshold, escalation to the next safer
+profile, stepping back down after a clean stretch (never below a profile
+the device failed) and that the chosen profile is persisted for the next
+boot.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.latency_calibration import LatencyProfile
+from modules.xrun_tuner import XrunTuner
+
+DEVICE = 'Speakers (USB Audio Device)'
+
+
+def test_threshold_counts_underflows_per_minute():
+    """Only `threshold` underflows inside a 60 s window trigger a request."""
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = LatencyProfile(str(Path(tmp) / 'latency.json'))
+        tuner = XrunTuner(DEVICE, profile, threshold=3)
+
+        # Spread out: never 3 within a minute
+        assert not any(tuner.record_underflow(t) for t in (0.0, 70.0, 140.0, 210.0))
+        # Burst: the third one within a minute crosses the threshold
+        assert not tuner.record_underflow(211.0)
+        assert tuner.record_underflow(212.0)
+        assert tuner.underflows == 6
+        print("✅ Threshold applies per minute")
+
+
+def test_burst_requests_one_escalation():
+    """Underflows past the threshold before the request is serviced escalate once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = LatencyProfile(str(Path(tmp) / 'latency.json'))
+        profile.set_stream_profile(DEVICE, 'low')
+        tuner = XrunTuner(DEVICE, profile, threshold=3)
+
+        requests = [tuner.record_underflow(t) for t in (0.0, 0.1, 0.2, 0.3)]
+        assert requests == [False, False, True, False]
+        assert tuner.escalate()
+        assert tuner.profile_name == tuner.floor == 'balanced'
+        print("✅ One escalation per burst")
+
+
+def test_escalation_is_persisted_per_device():
+    """Escalating moves to the next profile and the next boot starts there."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'latency.json')
+        tuner = XrunTuner(DEVICE, LatencyProfile(path), threshold=1)
+        first = tuner.profile_name
+
+        assert tuner.record_underflow(0.0)
+        assert tuner.escalate()
+        assert tuner.profile_name != first
+        # No new request until the stream is reopened with the new profile
+        assert not tuner.record_underflow(1.0)
+        tuner.mark_opened()
+        assert tuner.record_underflow(2.0) == (tuner.next_profile is not None)
+
+        reloaded = XrunTuner(DEVICE, LatencyProfile.load(path))
+        assert reloaded.profile_name == tuner.profile_name
+        assert XrunTuner('Other device', LatencyProfile.load(path)).profile_name == first
+        print(f"✅ {first} → {tuner.profile_name} persisted for {DEVICE}")
+
+
+def test_safest_profile_does_not_escalate():
+    """At the safest profile underflows are counted but nothing changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = LatencyProfile(str(Path(tmp) / 'latency.json'))
+        profile.set_stream_profile(DEVICE, 'safe')
+        tuner = XrunTuner(DEVICE, profile, threshold=1)
+
+        assert not tuner.record_underflow(0.0)
+        assert not tuner.escalate()
+        assert tuner.profile_name == 'safe'
+        print("✅ Safe profile is final")
+
+
+def test_clean_streaming_steps_down_once_proven():
+    """Underflow-free streaming moves to the next lower-latency profile."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'latency.json')
+        profile = LatencyProfile(path)
+        profile.set_stream_profile(DEVICE, 'safe')
+        tuner = XrunTuner(DEVICE, profile, threshold=1, step_down_seconds=10.0)
+
+        assert not any(tuner.record_clean(1.0) for _ in range(9))
+        tuner.record_underflow(9.0)  # Starts the count over
+        assert not any(tuner.record_clean(1.0) for _ in range(9))
+        assert tuner.record_clean(1.0)
+        assert not tuner.record_clean(1.0)  # Requested once
+        assert tuner.step_down()
+        assert tuner.profile_name == 'balanced'
+        assert XrunTuner(DEVICE, LatencyProfile.load(path)).profile_name == 'balanced'
+        print("✅ safe → balanced after a clean stretch")
+
+
+def test_failed_profile_is_never_stepped_down_to():
+    """Escalating away from a profile makes it the device's floor, across boots."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'latency.json')
+        profile = LatencyProfile(path)
+        profile.set_stream_profile(DEVICE, 'low')
+        tuner = XrunTuner(DEVICE, profile, threshold=1, step_down_seconds=10.0)
+
+        assert tuner.record_underflow(0.0)
+        assert tuner.escalate()
+        tuner.mark_opened()
+        assert tuner.profile_name == tuner.floor == 'balanced'
+        assert not any(tuner.record_clean(1.0) for _ in range(100))
+
+        reloaded = XrunTuner(DEVICE, LatencyProfile.load(path), step_down_seconds=10.0)
+        assert reloaded.previous_profile is None
+        print("✅ low stays out of reach after failing")
+
+
+def test_underflow_after_request_cancels_step_down():
+    """A step down requested by the callback is dropped if an underflow follows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = LatencyProfile(str(Path(tmp) / 'latency.json'))
+        tuner = XrunTuner(DEVICE, profile, threshold=5, step_down_seconds=10.0)
+        first = tuner.profile_name
+
+        assert tuner.record_clean(10.0) == (tuner.previous_profile is not None)
+        tuner.record_underflow(0.0)
+        assert not tuner.step_down()
+        assert tuner.profile_name == first and not tuner.pending
+        print("✅ Step down cancelled by a late underflow")
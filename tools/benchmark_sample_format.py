@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Comparação de memória e CPU entre faixas float32 e int16.
+
+Carrega faixas estéreo de 48 kHz pelo cache de áudio nos dois formatos
+(AUDIO_SAMPLE_FORMAT) e mede, para cada uma e num processo separado, o
+aumento de RSS e o tempo de CPU do ArraySource.read_into por bloco, que
+é o trabalho de cópia/conversão feito dentro do callback.
+
+Uso:
+    python tools/benchmark_sample_format.py              # faixas sintéticas de 1, 2 e 4 min
+    python tools/benchmark_sample_format.py assets/audio/*.wav
+    python tools/benchmark_sample_format.py --blocksize 1024
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.app_config import AUDIO_STREAM_PROFILE, AUDIO_STREAM_PROFILES
+from modules.audio_cache import AudioAssetCache
+from modules.audio_sources import ArraySource
+
+FORMATS = ('float32', 'int16')
+SYNTHETIC_MINUTES = (1, 2, 4)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (None if it cannot be read)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage',
+                    'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _synthesize(directory: Path, minutes: int, samplerate: int = 48000) -> Path:
+    """Write a stereo 16-bit WAV of the given length (tones plus noise)."""
+    path = directory / f"synthetic_{minutes}min.wav"
+    frames = minutes * 60 * samplerate
+    rng = np.random.default_rng(minutes)
+    t = np.arange(frames) / samplerate
+    left = 0.3 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 0.05, frames)
+    right = 0.3 * np.sin(2 * np.pi * 330 * t) + rng.normal(0, 0.05, frames)
+    sf.write(str(path), np.stack([left, right], axis=1), samplerate, subtype='PCM_16')
+    return path
+
+
+def _time_blocks(data: np.ndarray, samplerate: int, blocksize: int) -> Dict[str, float]:
+    """Time read_into() for every block of a track, as the callback would."""
+    source = ArraySource(data, samplerate)
+    out = np.zeros((blocksize, source.channels), dtype='float32')
+    durations = np.empty(-(-source.frames // blocksize))
+    cpu_started = time.process_time()
+    for i in range(len(durations)):
+        started = time.perf_counter()
+        source.read_into(out)
+        durations[i] = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    budget = blocksize / samplerate
+    return {
+        'mean_us': durations.mean() * 1e6,
+        'p99_us': np.percentile(durations, 99) * 1e6,
+        'load_pct': durations.mean() / budget * 100,
+        'cpu_s': cpu,
+    }
+
+
+def _measure(path: Path, dtype: str, blocksize: int) -> Dict[str, float]:
+    """Load one track through the cache and measure RSS growth and block timing."""
+    before = _rss_bytes()
+    data, samplerate = AudioAssetCache(budget_bytes=1 << 40).get(str(path), dtype=dtype)
+    after = _rss_bytes()
+    result = _time_blocks(data, samplerate, blocksize)
+    result['array_mb'] = data.nbytes / 2**20
+    result['rss_mb'] = (after - before) / 2**20 if before and after else None
+    return result
+
+
+def benchmark(paths: List[Path], blocksize: int) -> None:
+    """Print memory and per-block CPU for each track in both formats."""
+    print(f"{'faixa':<28} {'formato':<8} {'RSS (MB)':>9} {'array (MB)':>10} "
+          f"{'média (µs)':>10} {'p99 (µs)':>9} {'carga':>7} {'CPU (s)':>8}")
+    for path in paths:
+        for dtype in FORMATS:
+            # Fresh process per measurement, so memory freed by the
+            # previous one cannot hide this one's RSS growth
+            child = subprocess.run(
+                [sys.executable, __file__, '--measure', dtype,
+                 '--blocksize', str(blocksize), str(path)],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            rss = f"{result['rss_mb']:9.1f}" if result['rss_mb'] is not None else f"{'n/d':>9}"
+            print(
+                f"{path.name[:28]:<28} {dtype:<8} {rss} {result['array_mb']:10.1f} "
+                f"{result['mean_us']:10.2f} {result['p99_us']:9.2f} "
+                f"{result['load_pct']:6.2f}% {result['cpu_s']:8.3f}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compara RSS e CPU do callback entre float32 e int16")
+    parser.add_argument('files', nargs='*', help="Arquivos de áudio (padrão: faixas sintéticas de 1, 2 e 4 min)")
+    default_blocksize = AUDIO_STREAM_PROFILES[AUDIO_STREAM_PROFILE]['blocksize']
+    parser.add_argument('--blocksize', type=int, default=default_blocksize,
+                        help=f"Frames por callback (padrão: {default_blocksize})")
+    parser.add_argument('--measure', choices=FORMATS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(Path(args.files[0]), args.measure, args.blocksize)))
+        return 0
+
+    if args.files:
+        benchmark([Path(f) for f in args.files], args.blocksize)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("🎼 Gerando faixas sintéticas...")
+        paths = [_synthesize(Path(tmp), minutes) for minutes in SYNTHETIC_MINUTES]
+        benchmark(paths, args.blocksize)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Calibração de latência dos dispositivos de saída.
+
+Mede a latência reportada de cada dispositivo (fone e caixas) e,
+opcionalmente, a latência real via loopback pelo microfone. O perfil é
+salvo em LATENCY_PROFILE_FILE e usado pelo AudioRouter para sincronizar
+os dois streams.
+
+Uso:
+    python tools/calibrate_latency.py            # só latência reportada
+    python tools/calibrate_latency.py --loopback # clique + microfone
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.device_registry import get_device_registry
+from modules.latency_calibration import calibrate_devices
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calibra a latência dos dispositivos de saída")
+    parser.add_argument('--samplerate', type=int, default=None,
+                        help="Taxa de amostragem da medição (padrão: a taxa nativa de "
+                             "cada dispositivo, a mesma usada na reprodução)")
+    parser.add_argument('--loopback', action='store_true',
+                        help="Mede a latência real tocando cliques e gravando pelo microfone")
+    args = parser.parse_args()
+
+    analyzer = None
+    if args.loopback:
+        from modules.scoring.audio_analyzer import AudioAnalyzer
+        analyzer = AudioAnalyzer()
+        print("🎤 Aproxime o microfone das caixas e do fone durante os cliques")
+
+    registry = get_device_registry()
+    devices = {key: registry.resolve(key) for key in ('headphone', 'speaker')}
+    missing = [key for key, device in devices.items() if device is None]
+    if missing:
+        print(f"⚠️ Dispositivos não encontrados (ignorados): {missing}")
+    devices = {key: device for key, device in devices.items() if device is not None}
+
+    try:
+        calibrate_devices(
+            devices,
+            args.samplerate,
+            analyzer=analyzer,
+        )
+    except Exception as e:
+        print(f"❌ Erro na calibração: {e}")
+        return 1
+    finally:
+        if analyzer is not None:
+            analyzer.cleanup()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
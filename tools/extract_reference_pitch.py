@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Extração da melodia de referência para a pontuação por afinação.
+
+Analisa a faixa vocal de cada música (o stem de voz, ou a mixagem com voz
+se a música não tiver stems) uma única vez: contorno de f0 a 100 Hz,
+confiança de vozeamento, trechos cantados e ataques de nota. O resultado
+vai para REFERENCE_PITCH_DIR como <hash do conteúdo>.npz comprimido, que
+o AudioAnalyzer carrega em milissegundos no início da performance.
+
+Uso:
+    python tools/extract_reference_pitch.py                 # todas as músicas da biblioteca
+    python tools/extract_reference_pitch.py voz.wav         # arquivos específicos
+    python tools/extract_reference_pitch.py --force         # reextrai mesmo se já existir
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.scoring.reference_pitch import ReferenceContour, extract_and_store
+from modules.song_library import get_song_library
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extrai a melodia de referência das faixas vocais")
+    parser.add_argument('files', nargs='*',
+                        help="Faixas vocais (padrão: a referência de cada música da biblioteca)")
+    parser.add_argument('--force', action='store_true',
+                        help="Reextrai mesmo se o contorno já estiver salvo")
+    parser.add_argument('--output', default=None,
+                        help="Pasta dos .npz (padrão: REFERENCE_PITCH_DIR)")
+    args = parser.parse_args()
+
+    files = args.files or [song.reference for song in get_song_library().songs.values()]
+    failed = 0
+    for filepath in dict.fromkeys(files):
+        started = time.perf_counter()
+        try:
+            stored = extract_and_store(filepath, args.output, force=args.force)
+            contour = ReferenceContour.load(stored)
+        except Exception as e:
+            print(f"❌ {filepath}: {e}")
+            failed += 1
+            continue
+        voiced = contour.regions[:, 1] - contour.regions[:, 0]
+        print(
+            f"🎼 {Path(filepath).name} → {stored.name} "
+            f"({contour.duration:.0f}s, {voiced.sum():.0f}s cantados, "
+            f"{len(contour.onsets)} notas, {stored.stat().st_size / 1024:.0f} KB, "
+            f"{time.perf_counter() - started:.1f}s)"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Empacotamento das faixas em PCM bruto para carregamento instantâneo.
+
+Converte cada arquivo de áudio num asset .pcm (amostras float32 ou
+int16 little-endian com um pequeno cabeçalho JSON) gravado ao lado do
+original. O AudioRouter mapeia esses assets com np.memmap em vez de
+decodificar o WAV a cada entrada de tela.
+
+Uso:
+    python tools/pack_audio.py                      # AUDIO_FILE e INSTRUMENTAL_FILE
+    python tools/pack_audio.py assets/audio/*.wav   # arquivos específicos
+    python tools/pack_audio.py --int16 --samplerate 48000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path for imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.app_config import AUDIO_FILE, INSTRUMENTAL_FILE
+from modules.pcm_assets import pack_file
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Empacota faixas de áudio em PCM bruto mapeável")
+    parser.add_argument('files', nargs='*',
+                        help="Arquivos de áudio (padrão: AUDIO_FILE e INSTRUMENTAL_FILE)")
+    parser.add_argument('--int16', action='store_true',
+                        help="Grava amostras int16 (metade do tamanho do float32)")
+    parser.add_argument('--samplerate', type=int, default=None,
+                        help="Reamostra para esta taxa antes de gravar (padrão: taxa do arquivo)")
+    args = parser.parse_args()
+
+    files = args.files or [AUDIO_FILE, INSTRUMENTAL_FILE]
+    dtype = 'int16' if args.int16 else 'float32'
+    failed = 0
+    for filepath in files:
+        started = time.perf_counter()
+        try:
+            packed = pack_file(filepath, dtype=dtype, samplerate=args.samplerate)
+        except Exception as e:
+            print(f"❌ {filepath}: {e}")
+            failed += 1
+            continue
+        size_mb = packed.stat().st_size / (1024 * 1024)
+        print(
+            f"📦 {Path(filepath).name} → {packed.name} "
+            f"({dtype}, {size_mb:.1f} MB, {time.perf_counter() - started:.1f}s)"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,7 @@ from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager
 
 from data.ranking_manager import RankingManager
+from modules.song_library import get_song_library
 from config.app_config import IDLE_TIMEOUT
 
 
@@ -25,6 +26,11 @@ class AppManager:
         self.ranking = RankingManager()
         self.idle_timeout_event = None
         
+        # Decode the most likely song while the welcome screen is up
+        # (the karaoke screens registered their preloaders by now)
+        self.songs = get_song_library()
+        self.songs.preload()
+        
         print("AppManager initialized for IBP-KaraokeLive Phase 0")
     
     def show_instructions(self):
@@ -41,6 +47,19 @@ class AppManager:
             button_text='Começar Ensaio'
         )
         self.go_to_screen('instructions')
+        
+        # Make sure the song is warm before the countdown ends
+        self.songs.preload()
+    
+    def select_song(self, song_id: str):
+        """
+        Pick the song for the current guest and decode it in the background.
+        
+        Args:
+            song_id: Catalog id (folder name under SONG_LIBRARY_DIR)
+        """
+        song = self.songs.select(song_id)
+        print(f"Song selected: {song.title}")
     
     def proceed_from_instructions(self):
         """Navigate from instructions to countdown before rehearsal."""
@@ -78,6 +97,9 @@ class AppManager:
         print("Returning to welcome")
         self.cancel_idle_timeout()
         self.go_to_screen('welcome')
+        
+        # Next guest: warm the most likely song again
+        self.songs.preload()
     
     def start_idle_timeout(self):
         """Start idle timeout for auto-return to welcome."""
@@ -2,6 +2,9 @@
 Tela de performance - música com letras (fone + caixa).
 Versão melhorada com animações de karaoke profissionais.
 """
+from pathlib import Path
+from threading import Thread
+
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
@@ -12,10 +15,16 @@ from kivy.animation import Animation
 from kivy.core.window import Window
 from kivy.graphics import Color, Rectangle
 
+from modules.audio_cache import source_hash
 from modules.audio_router import AudioRouter
 from modules.lyric_display import LyricDisplay
+from modules.song_library import get_song_library
 from modules.scoring.audio_analyzer import AudioAnalyzer
-from config.app_config import LYRICS_FILE
+from modules.scoring.pitch_tracker import note_name
+from config.app_config import (
+    AUDIO_STREAMING, AUDIO_PERSISTENT_STREAMS, AUDIO_DUPLEX, AUDIO_SAMPLE_FORMAT,
+    AUDIO_STEM_MODE
+)
 
 
 class PerformanceScreen(Screen):
@@ -25,13 +34,29 @@ class PerformanceScreen(Screen):
         super().__init__(**kwargs)
         
         # Componentes de áudio
-        self.audio_router = AudioRouter()
-        self.lyric_display = LyricDisplay(LYRICS_FILE)
-        self.audio_analyzer = AudioAnalyzer()
+        self.audio_router = AudioRouter(
+            streaming=AUDIO_STREAMING, persistent=AUDIO_PERSISTENT_STREAMS,
+            duplex=AUDIO_DUPLEX, sample_format=AUDIO_SAMPLE_FORMAT
+        )
+        self.song = get_song_library().current
+        self.lyric_display = LyricDisplay(self.song.lyrics)
+        # Em modo duplex o microfone vem do mesmo stream do fone
+        self.audio_analyzer = AudioAnalyzer(router=self.audio_router)
+        
+        # A biblioteca decodifica a próxima música em background (nas taxas
+        # deste router) enquanto o convidado está nas telas iniciais
+        get_song_library().add_preloader(self._preload_song)
+        
+        # Abrir fone + caixa uma vez só (silêncio até o play)
+        if AUDIO_PERSISTENT_STREAMS:
+            self.audio_router.open_streams(['headphone', 'speaker'])
+        
+        # Fim da música é avisado pelo AudioRouter (sem checar a cada frame)
+        self.audio_router.add_finished_listener(self._on_audio_finished)
         
         # Video background - add first so it's behind everything
         self.video = Video(
-            source='assets/video/Ibp - Energia da Revolucao.mp4',
+            source=self.song.video or '',
             state='stop',
             allow_stretch=True,
             keep_ratio=False,
@@ -76,6 +101,34 @@ class PerformanceScreen(Screen):
         )
         self.add_widget(subtitle_blocker_upper)
         
+        # Afinação ao vivo (nota cantada) na faixa preta de cima
+        self.pitch_label = Label(
+            text='',
+            font_size='36sp',
+            bold=True,
+            color=(0.4, 1, 0.6, 0),
+            size_hint=(0.2, 0.08),
+            pos_hint={'right': 0.98, 'y': 0.92},
+            halign='right',
+            valign='middle'
+        )
+        self.pitch_label.bind(size=self.pitch_label.setter('text_size'))
+        self.add_widget(self.pitch_label)
+        
+        # Pontuação parcial ao vivo na faixa preta de cima
+        self.score_label = Label(
+            text='',
+            font_size='36sp',
+            bold=True,
+            color=(1, 1, 0, 0.9),
+            size_hint=(0.2, 0.08),
+            pos_hint={'x': 0.02, 'y': 0.92},
+            halign='left',
+            valign='middle'
+        )
+        self.score_label.bind(size=self.score_label.setter('text_size'))
+        self.add_widget(self.score_label)
+        
         # Lyrics container - centered on screen
         lyrics_container = FloatLayout(
             size_hint=(1, 1)
@@ -145,6 +198,9 @@ class PerformanceScreen(Screen):
     
     def on_enter(self):
         """Iniciar performance."""
+        # Música escolhida pelo convidado (ou a mais provável), já no cache
+        self._load_song(get_song_library().current)
+        
         print("=" * 50)
         print("🎬 Entering PerformanceScreen")
         print(f"Video source: {self.video.source}")
@@ -153,11 +209,14 @@ class PerformanceScreen(Screen):
         # Bind keyboard for skip shortcut (development)
         Window.bind(on_keyboard=self._on_keyboard)
         
-        # Configurar roteamento e carregar áudios (vocal + instrumental)
+        # Configurar roteamento e carregar áudios (vocal + instrumental,
+        # ou stems: instrumental nas caixas, instrumental + voz guia no fone)
         self.audio_router.set_performance_mode()
-        vocal_file = 'assets/audio/Ibp - Energia da Revolucao.wav'
-        instrumental_file = 'assets/audio/Ibp - Energia da Revolucao_Voiceless.wav'
-        self.audio_router.load_audio(vocal_file, instrumental_file)
+        if AUDIO_STEM_MODE and self.song.has_stems:
+            self.audio_router.load_stems(self.song.instrumental, self.song.vocals)
+        else:
+            self.audio_router.load_audio(self.song.audio, self.song.instrumental)
+        get_song_library().record_play(self.song)
         
         # Iniciar video with fade-in
         print(f"🎥 Starting video playback")
@@ -167,18 +226,44 @@ class PerformanceScreen(Screen):
         
         # Reset lyrics
         self.last_current_text = ''
+        self.pitch_label.text = ''
+        self.score_label.text = ''
         
         # Tocar música via AudioRouter (dual playback)
-        self.audio_router.play()
+        if not self.audio_router.play():
+            Clock.schedule_once(self._on_song_end)
         
         # Agendar atualização (60 FPS para animações suaves)
         self.update_event = Clock.schedule_interval(self.update, 1/60)
 
         # After existing setup...
         self.audio_analyzer.clear()
+        # Melodia de referência extraída offline (tools/extract_reference_pitch.py)
+        self.audio_analyzer.load_reference(self.song.reference)
         self.audio_analyzer.start_recording()
         print("🎤 Recording started")
     
+    def _preload_song(self, song):
+        """Aquecer o cache com as faixas que o on_enter vai carregar."""
+        if AUDIO_STEM_MODE and song.has_stems:
+            threads = self.audio_router.preload_stems(song.instrumental, song.vocals)
+        else:
+            threads = self.audio_router.preload(song.audio, song.instrumental)
+        # Hash da faixa vocal já calculado: a referência abre sem reler o arquivo
+        if Path(song.reference).exists():
+            hashing = Thread(target=source_hash, args=(song.reference,), daemon=True)
+            hashing.start()
+            threads.append(hashing)
+        return threads
+    
+    def _load_song(self, song):
+        """Trocar letra e vídeo se a música mudou desde a última vez."""
+        if song is self.song:
+            return
+        self.song = song
+        self.lyric_display = LyricDisplay(song.lyrics)
+        self.video.source = song.video or ''
+    
     def _on_keyboard(self, window, key, scancode, codepoint, modifier):
         """Handle keyboard shortcuts for development."""
         # 'S' key = skip
@@ -231,8 +316,25 @@ class PerformanceScreen(Screen):
             self._animate_line_change()
             self.last_current_text = new_current
         
-        # Verificar fim usando is_playing()
-        if not self.audio_router.is_playing():
+        # Pontuação acumulada até agora (O(1), pode ser lida a cada frame)
+        self.score_label.text = f"PONTOS {self.audio_analyzer.get_live_score():.0f}"
+        
+        # Nota cantada agora; some aos poucos quando o cantor para
+        pitch = self.audio_analyzer.get_live_pitch()
+        if pitch is not None:
+            _, f0, confidence = pitch
+            if f0 > 0:
+                self.pitch_label.text = f"NOTA {note_name(f0)}"
+            alpha = confidence if f0 > 0 else max(0.0, self.pitch_label.color[3] - dt * 2)
+            self.pitch_label.color = (0.4, 1, 0.6, alpha)
+    
+    def _on_audio_finished(self):
+        """Chamado pela thread do AudioRouter quando a música termina."""
+        Clock.schedule_once(self._on_song_end)
+    
+    def _on_song_end(self, dt):
+        """Finalizar na thread principal (se ainda estiver em performance)."""
+        if self.update_event is not None:
             self.finish_performance()
     
     def finish_performance(self):
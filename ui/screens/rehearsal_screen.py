@@ -6,6 +6,7 @@ from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.label import Label
+from kivy.uix.slider import Slider
 from kivy.uix.video import Video
 from kivy.clock import Clock
 from kivy.animation import Animation
@@ -14,7 +15,11 @@ from kivy.graphics import Color, Rectangle
 
 from modules.audio_router import AudioRouter
 from modules.lyric_display import LyricDisplay
-from config.app_config import LYRICS_FILE
+from modules.song_library import get_song_library
+from config.app_config import (
+    AUDIO_STREAMING, AUDIO_PERSISTENT_STREAMS, AUDIO_SAMPLE_FORMAT,
+    AUDIO_STEM_MODE, AUDIO_GUIDE_VOLUME
+)
 
 
 class RehearsalScreen(Screen):
@@ -24,12 +29,27 @@ class RehearsalScreen(Screen):
         super().__init__(**kwargs)
         
         # Componentes de áudio
-        self.audio_router = AudioRouter()
-        self.lyric_display = LyricDisplay(LYRICS_FILE)
+        self.audio_router = AudioRouter(
+            streaming=AUDIO_STREAMING, persistent=AUDIO_PERSISTENT_STREAMS,
+            sample_format=AUDIO_SAMPLE_FORMAT
+        )
+        self.song = get_song_library().current
+        self.lyric_display = LyricDisplay(self.song.lyrics)
+        
+        # A biblioteca decodifica a próxima música em background (nas taxas
+        # deste router) enquanto o convidado está nas telas iniciais
+        get_song_library().add_preloader(self._preload_song)
+        
+        # Abrir o fone uma vez só (silêncio até o play)
+        if AUDIO_PERSISTENT_STREAMS:
+            self.audio_router.open_streams(['headphone'])
+        
+        # Fim da música é avisado pelo AudioRouter (sem checar a cada frame)
+        self.audio_router.add_finished_listener(self._on_audio_finished)
         
         # Video background - add first so it's behind everything
         self.video = Video(
-            source='assets/video/Ibp - Energia da Revolucao.mp4',
+            source=self.song.video or '',
             state='stop',
             allow_stretch=True,
             keep_ratio=False,
@@ -137,12 +157,42 @@ class RehearsalScreen(Screen):
         lyrics_container.add_widget(lyrics_box)
         self.add_widget(lyrics_container)
         
+        # Volume da voz guia (só aparece quando a música tem stems)
+        self.guide_box = BoxLayout(
+            orientation='vertical',
+            size_hint=(0.06, 0.5),
+            pos_hint={'right': 0.98, 'center_y': 0.6},
+            opacity=0,
+            disabled=True
+        )
+        self.guide_slider = Slider(
+            orientation='vertical',
+            min=0.0,
+            max=1.0,
+            value=AUDIO_GUIDE_VOLUME
+        )
+        self.guide_slider.bind(value=self._on_guide_volume)
+        self.guide_box.add_widget(self.guide_slider)
+        self.guide_box.add_widget(Label(
+            text='VOZ',
+            font_size='24sp',
+            bold=True,
+            size_hint_y=None,
+            height=40,
+            outline_width=2,
+            outline_color=(0, 0, 0, 1)
+        ))
+        self.add_widget(self.guide_box)
+        
         # Track last displayed line for smooth transitions
         self.last_current_text = ''
         self.update_event = None
     
     def on_enter(self):
         """Iniciar ensaio ao entrar na tela."""
+        # Música escolhida pelo convidado (ou a mais provável), já no cache
+        self._load_song(get_song_library().current)
+        
         print("=" * 50)
         print("🎬 Entering RehearsalScreen")
         print(f"Video source: {self.video.source}")
@@ -151,10 +201,16 @@ class RehearsalScreen(Screen):
         # Bind keyboard for skip shortcut (development)
         Window.bind(on_keyboard=self._on_keyboard)
         
-        # Configurar roteamento e carregar áudio (vocal only)
+        # Configurar roteamento e carregar áudio (vocal only, ou a mixagem
+        # dos stems com a voz guia no volume escolhido pelo cantor)
         self.audio_router.set_rehearsal_mode()
-        vocal_file = 'assets/audio/Ibp - Energia da Revolucao.wav'
-        self.audio_router.load_audio(vocal_file)
+        self.guide_slider.value = AUDIO_GUIDE_VOLUME  # Cada convidado começa do padrão
+        if AUDIO_STEM_MODE and self.song.has_stems:
+            self.audio_router.load_stems(self.song.instrumental, self.song.vocals)
+        else:
+            self.audio_router.load_audio(self.song.audio)
+        self.guide_box.opacity = 1 if self.audio_router.has_stems() else 0
+        self.guide_box.disabled = not self.audio_router.has_stems()
         
         # Iniciar video with fade-in
         print(f"🎥 Starting video playback")
@@ -166,11 +222,32 @@ class RehearsalScreen(Screen):
         self.last_current_text = ''
         
         # Tocar música via AudioRouter
-        self.audio_router.play()
+        if not self.audio_router.play():
+            Clock.schedule_once(self._on_song_end)
         
         # Agendar atualização (60 FPS para animações suaves)
         self.update_event = Clock.schedule_interval(self.update, 1/60)
     
+    def _preload_song(self, song):
+        """Aquecer o cache com as faixas que o on_enter vai carregar."""
+        if AUDIO_STEM_MODE and song.has_stems:
+            return self.audio_router.preload_stems(song.instrumental, song.vocals)
+        return self.audio_router.preload(song.audio)
+    
+    def _on_guide_volume(self, slider, value):
+        """Volume da voz guia no fone (vale também para a performance)."""
+        self.audio_router.set_guide_volume(value)
+        if self.manager is not None and self.manager.has_screen('performance'):
+            self.manager.get_screen('performance').audio_router.set_guide_volume(value)
+    
+    def _load_song(self, song):
+        """Trocar letra e vídeo se a música mudou desde a última vez."""
+        if song is self.song:
+            return
+        self.song = song
+        self.lyric_display = LyricDisplay(song.lyrics)
+        self.video.source = song.video or ''
+    
     def _on_keyboard(self, window, key, scancode, codepoint, modifier):
         """Handle keyboard shortcuts for development."""
         # 'S' key = skip
@@ -222,9 +299,14 @@ class RehearsalScreen(Screen):
         if line_changed:
             self._animate_line_change()
             self.last_current_text = new_current
-        
-        # Verificar fim
-        if not self.audio_router.is_playing():
+    
+    def _on_audio_finished(self):
+        """Chamado pela thread do AudioRouter quando a música termina."""
+        Clock.schedule_once(self._on_song_end)
+    
+    def _on_song_end(self, dt):
+        """Finalizar na thread principal (se ainda estiver no ensaio)."""
+        if self.update_event is not None:
             self.finish_rehearsal()
     
     def finish_rehearsal(self):